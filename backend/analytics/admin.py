@@ -0,0 +1,20 @@
+from django.contrib import admin
+from config.stats import EstimatedCountPaginator
+from .models import DailyRollup
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    """Read-only: rows are maintained by refresh_rollups"""
+    list_display = ['property_id', 'day', 'status', 'nights', 'revenue']
+    list_filter = ['status']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
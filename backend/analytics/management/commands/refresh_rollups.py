@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from analytics.rollup import refresh
+
+class Command(BaseCommand):
+    help = 'Apply bookings changed since the last run to the daily occupancy and revenue rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Discard the rollups and rebuild them from every booking')
+        parser.add_argument('--batch-size', type=int, default=settings.ANALYTICS['REFRESH_BATCH_SIZE'])
+        parser.add_argument('--loop', action='store_true', help='Keep refreshing instead of exiting after one pass')
+        parser.add_argument(
+            '--interval', type=float, default=settings.ANALYTICS['REFRESH_SECONDS'],
+            help='Seconds between refreshes (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        rebuild = options['rebuild']
+        while True:
+            started = time.perf_counter()
+            totals = refresh(rebuild=rebuild, batch_size=options['batch_size'])
+            self.stdout.write(
+                f'{totals["scanned"]} bookings read, {totals["changed"]} changed, '
+                f'{totals["written"]} rollup rows written in {time.perf_counter() - started:.2f}s'
+            )
+            if not options['loop']:
+                break
+            rebuild = False
+            time.sleep(options['interval'])
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupBookingSnapshot',
+            fields=[
+                ('booking_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('property_id', models.UUIDField()),
+                ('check_in', models.DateField()),
+                ('check_out', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('updated_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_id', models.UUIDField()),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('nights', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'ordering': ['property_id', 'day'],
+                'indexes': [models.Index(condition=models.Q(('nights', 0)), fields=['property_id'], name='rollup_empty_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrollup',
+            constraint=models.UniqueConstraint(fields=('property_id', 'day', 'status'), name='rollup_property_day_status_uniq'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import models
+
+class DailyRollup(models.Model):
+    """Booked nights and revenue of one property on one day, per booking status
+
+    Maintained by analytics.rollup; never written by request code. The
+    property is not a foreign key: deleting a property deletes its bookings,
+    whose post_delete subtracts them here, and the emptied rows are pruned.
+    """
+    property_id = models.UUIDField()
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    nights = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['property_id', 'day']
+        constraints = [
+            # Also the index behind every report: property, then a day range
+            models.UniqueConstraint(fields=['property_id', 'day', 'status'], name='rollup_property_day_status_uniq'),
+        ]
+        indexes = [
+            # Rows that dropped to zero, pruned after each refresh
+            models.Index(fields=['property_id'], condition=models.Q(nights=0), name='rollup_empty_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.property_id} {self.day} {self.status}: {self.nights}"
+
+class RollupBookingSnapshot(models.Model):
+    """What a booking contributed to DailyRollup when it was last applied
+
+    Refreshes diff changed bookings against this, so only the difference is
+    written. updated_at is the booking's, and the newest one is the
+    watermark for the next refresh.
+    """
+    booking_id = models.BigIntegerField(primary_key=True)
+    property_id = models.UUIDField()
+    check_in = models.DateField()
+    check_out = models.DateField()
+    status = models.CharField(max_length=20)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"Booking #{self.booking_id} ({self.status})"
@@ -0,0 +1,270 @@
+"""
+Per-property, per-day rollups of booked nights and revenue.
+
+DailyRollup holds one row per (property, day, booking status). A booking
+adds one night to every day in [check_in, check_out) (same-day bookings
+count one night, like Booking.get_nights()), with its total price split
+evenly across those nights.
+
+refresh() keeps the table current incrementally: it reads only bookings
+whose updated_at is at or after the watermark (the newest updated_at
+already applied, less ANALYTICS['REFRESH_OVERLAP_SECONDS'] for
+transactions that committed late), diffs each one against its
+RollupBookingSnapshot, and upserts the difference. Deleted bookings are
+subtracted by a post_delete signal (see analytics.signals). Reports then
+read at most one row per property, day and status, however many bookings
+there are.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import ROUND_DOWN, Decimal
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import DateField, Max, Sum
+from django.db.models.functions import Trunc
+
+from bookings.models import Booking
+from .models import DailyRollup, RollupBookingSnapshot
+
+# Statuses that occupy the property and earn revenue
+OCCUPYING_STATUSES = ('confirmed', 'completed')
+
+CENT = Decimal('0.01')
+
+# Arbitrary constant for the PostgreSQL advisory lock serialising writers
+LOCK_KEY = 0x726f6c6c
+
+SNAPSHOT_FIELDS = ('property_id', 'check_in', 'check_out', 'status', 'total_price')
+
+def nightly_amounts(check_in, check_out, total_price):
+    """[(day, revenue)] for each night; the rounding remainder goes to the first night"""
+    nights = max((check_out - check_in).days, 1)
+    nightly = (total_price / nights).quantize(CENT, rounding=ROUND_DOWN)
+    first = total_price - nightly * (nights - 1)
+    return [(check_in + timedelta(days=i), first if i == 0 else nightly) for i in range(nights)]
+
+def _add(deltas, row, sign):
+    for day, revenue in nightly_amounts(row['check_in'], row['check_out'], row['total_price']):
+        entry = deltas[(row['property_id'], day, row['status'])]
+        entry[0] += sign
+        entry[1] += sign * revenue
+
+def _lock(using):
+    """Serialise rollup writers; two refreshes applying the same booking would count it twice"""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [LOCK_KEY])
+    # SQLite already allows a single writer at a time
+
+def _apply(deltas, using):
+    """Add {(property_id, day, status): [nights, revenue]} to the rollup rows in one upsert"""
+    rows = [(key, value) for key, value in deltas.items() if value[0] or value[1]]
+    if not rows:
+        return 0
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    opts = DailyRollup._meta
+    fields = [opts.get_field(name) for name in ('property_id', 'day', 'status', 'nights', 'revenue')]
+    table = qn(opts.db_table)
+    columns = [qn(field.column) for field in fields]
+    nights, revenue = columns[3], columns[4]
+    sql = (
+        f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join(["%s"] * len(columns))}) '
+        f'ON CONFLICT ({", ".join(columns[:3])}) DO UPDATE SET '
+        f'{nights} = {table}.{nights} + EXCLUDED.{nights}, '
+        f'{revenue} = {table}.{revenue} + EXCLUDED.{revenue}'
+    )
+    params = [
+        [field.get_db_prep_save(value, connection) for field, value in zip(fields, (*key, *value))]
+        for key, value in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+    return len(rows)
+
+def _prune(using):
+    DailyRollup.objects.using(using).filter(nights=0).delete()
+
+def _apply_chunk(bookings, using):
+    """Apply one chunk of changed bookings; returns (changed bookings, rollup rows written)"""
+    with transaction.atomic(using=using):
+        _lock(using)
+        snapshots = {
+            snapshot['booking_id']: snapshot
+            for snapshot in RollupBookingSnapshot.objects.using(using)
+            .filter(booking_id__in=[booking['id'] for booking in bookings])
+            .values('booking_id', *SNAPSHOT_FIELDS)
+        }
+        deltas = defaultdict(lambda: [0, Decimal('0')])
+        changed = 0
+        for booking in bookings:
+            previous = snapshots.get(booking['id'])
+            if previous is not None and all(previous[name] == booking[name] for name in SNAPSHOT_FIELDS):
+                continue
+            if previous is not None:
+                _add(deltas, previous, -1)
+            _add(deltas, booking, 1)
+            changed += 1
+        written = _apply(deltas, using)
+        # Every snapshot is rewritten, so the watermark moves past the chunk
+        RollupBookingSnapshot.objects.using(using).bulk_create(
+            [
+                RollupBookingSnapshot(booking_id=booking['id'], updated_at=booking['updated_at'], **{
+                    name: booking[name] for name in SNAPSHOT_FIELDS
+                })
+                for booking in bookings
+            ],
+            update_conflicts=True,
+            unique_fields=['booking_id'],
+            update_fields=[*SNAPSHOT_FIELDS, 'updated_at'],
+        )
+    return changed, written
+
+def watermark(using='default'):
+    newest = RollupBookingSnapshot.objects.using(using).aggregate(newest=Max('updated_at'))['newest']
+    if newest is None:
+        return None
+    return newest - timedelta(seconds=settings.ANALYTICS['REFRESH_OVERLAP_SECONDS'])
+
+def refresh(rebuild=False, batch_size=None, using='default'):
+    """Bring DailyRollup up to date with the bookings table
+
+    Returns {'scanned', 'changed', 'written'}: bookings read, bookings whose
+    contribution changed, and rollup rows upserted.
+    """
+    batch_size = batch_size or settings.ANALYTICS['REFRESH_BATCH_SIZE']
+    if rebuild:
+        with transaction.atomic(using=using):
+            _lock(using)
+            DailyRollup.objects.using(using).all().delete()
+            RollupBookingSnapshot.objects.using(using).all().delete()
+
+    since = watermark(using)
+    bookings = Booking.objects.using(using).order_by('updated_at', 'id')
+    if since is not None:
+        bookings = bookings.filter(updated_at__gte=since)
+    bookings = bookings.values('id', 'updated_at', *SNAPSHOT_FIELDS)
+
+    totals = {'scanned': 0, 'changed': 0, 'written': 0}
+    last = None
+    while True:
+        # Keyset pagination on (updated_at, id), so rows touched mid-run are not skipped
+        page = bookings
+        if last is not None:
+            page = page.filter(updated_at__gte=last[0]).exclude(updated_at=last[0], id__lte=last[1])
+        chunk = list(page[:batch_size])
+        if not chunk:
+            break
+        changed, written = _apply_chunk(chunk, using)
+        totals['scanned'] += len(chunk)
+        totals['changed'] += changed
+        totals['written'] += written
+        last = (chunk[-1]['updated_at'], chunk[-1]['id'])
+
+    with transaction.atomic(using=using):
+        _prune(using)
+    return totals
+
+def forget_booking(booking_id, using='default'):
+    """Subtract a deleted booking's contribution (called from post_delete)"""
+    with transaction.atomic(using=using):
+        _lock(using)
+        snapshot = (
+            RollupBookingSnapshot.objects.using(using)
+            .filter(booking_id=booking_id)
+            .values('booking_id', *SNAPSHOT_FIELDS)
+            .first()
+        )
+        if snapshot is None:
+            return
+        deltas = defaultdict(lambda: [0, Decimal('0')])
+        _add(deltas, snapshot, -1)
+        _apply(deltas, using)
+        RollupBookingSnapshot.objects.using(using).filter(booking_id=booking_id).delete()
+        _prune(using)
+
+def periods(start, end, group):
+    """Start date of every day or month period overlapping [start, end]"""
+    if group == 'day':
+        return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    months = []
+    current = start.replace(day=1)
+    while current <= end:
+        months.append(current)
+        current = (current + timedelta(days=32)).replace(day=1)
+    return months
+
+def _period_days(period, start, end, group):
+    """Days of the period that fall inside [start, end]"""
+    if group == 'day':
+        return 1
+    following = (period + timedelta(days=32)).replace(day=1)
+    return (min(following - timedelta(days=1), end) - max(period, start)).days + 1
+
+def _metrics(nights, revenue, available):
+    return {
+        'available_nights': available,
+        'booked_nights': nights,
+        'occupancy_rate': round(nights / available, 4) if available else 0.0,
+        'adr': (revenue / nights).quantize(CENT) if nights else Decimal('0.00'),
+        'revenue': revenue,
+    }
+
+def occupancy_report(properties, start, end, group='month', using=None):
+    """Occupancy, ADR and revenue per property and period between start and end (inclusive)
+
+    properties is a list of (id, title). Reads one rollup row per property,
+    day and occupying status at most.
+    """
+    rows = (
+        DailyRollup.objects.using(using)
+        .filter(
+            property_id__in=[property_id for property_id, _ in properties],
+            day__gte=start,
+            day__lte=end,
+            status__in=OCCUPYING_STATUSES,
+        )
+        .annotate(period=Trunc('day', group, output_field=DateField()))
+        .order_by()
+        .values('property_id', 'period')
+        .annotate(nights=Sum('nights'), revenue=Sum('revenue'))
+    )
+    found = {(row['property_id'], row['period']): row for row in rows}
+
+    report = []
+    for property_id, title in properties:
+        entries = []
+        total_nights, total_revenue, total_available = 0, Decimal('0.00'), 0
+        for period in periods(start, end, group):
+            row = found.get((property_id, period), {})
+            nights = row.get('nights') or 0
+            revenue = row.get('revenue') or Decimal('0.00')
+            available = _period_days(period, start, end, group)
+            entries.append({'period': period, **_metrics(nights, revenue, available)})
+            total_nights += nights
+            total_revenue += revenue
+            total_available += available
+        report.append({
+            'property': property_id,
+            'title': title,
+            'totals': _metrics(total_nights, total_revenue, total_available),
+            'periods': entries,
+        })
+    return report
+
+def monthly_totals(start, end, using=None):
+    """[{'month', 'nights', 'revenue'}] across all properties, for the dashboard"""
+    return list(
+        DailyRollup.objects.using(using)
+        .filter(day__gte=start, day__lte=end, status__in=OCCUPYING_STATUSES)
+        .annotate(month=Trunc('day', 'month', output_field=DateField()))
+        .order_by('month')
+        .values('month')
+        .annotate(nights=Sum('nights'), revenue=Sum('revenue'))
+    )
+
+def default_start(end):
+    """Start of the default report: twelve whole months before end's month"""
+    return date(end.year - 1, end.month, 1)
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+from .rollup import default_start
+
+class OccupancyQuerySerializer(serializers.Serializer):
+    """Query parameters of the occupancy report"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    property = serializers.UUIDField(required=False)
+    group = serializers.ChoiceField(choices=['month', 'day'], default='month')
+    owner = serializers.UUIDField(required=False, help_text='Report on another owner (staff only)')
+    
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.localdate()
+        start = attrs.get('start') or default_start(end)
+        if start > end:
+            raise serializers.ValidationError('start must not be after end')
+        max_days = settings.ANALYTICS['MAX_REPORT_DAYS'][attrs['group']]
+        if (end - start).days + 1 > max_days:
+            raise serializers.ValidationError(f'At most {max_days} days can be reported by {attrs["group"]}')
+        return {**attrs, 'start': start, 'end': end}
+
+class OccupancyMetricsSerializer(serializers.Serializer):
+    available_nights = serializers.IntegerField()
+    booked_nights = serializers.IntegerField()
+    occupancy_rate = serializers.FloatField()
+    adr = serializers.DecimalField(max_digits=12, decimal_places=2, help_text='Average daily rate: revenue per booked night')
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+class OccupancyPeriodSerializer(OccupancyMetricsSerializer):
+    period = serializers.DateField(help_text='First day of the day or month')
+
+class OccupancyReportSerializer(serializers.Serializer):
+    property = serializers.UUIDField()
+    title = serializers.CharField()
+    totals = OccupancyMetricsSerializer()
+    periods = OccupancyPeriodSerializer(many=True)
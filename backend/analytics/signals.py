@@ -0,0 +1,9 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from bookings.models import Booking
+from .rollup import forget_booking
+
+@receiver(post_delete, sender=Booking)
+def subtract_deleted_booking(sender, instance, using, **kwargs):
+    """Deletes leave no updated_at behind for refresh() to find, so apply them here"""
+    forget_booking(instance.pk, using=using)
@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+from .views import AnalyticsViewSet
+
+router = DefaultRouter()
+router.register(r'', AnalyticsViewSet, basename='analytics')
+
+urlpatterns = router.urls
@@ -0,0 +1,44 @@
+from rest_framework import viewsets, permissions, decorators, status
+from rest_framework.response import Response
+from listings.models import Property
+from .rollup import occupancy_report
+from .serializers import OccupancyQuerySerializer, OccupancyReportSerializer
+
+class AnalyticsViewSet(viewsets.GenericViewSet):
+    serializer_class = OccupancyReportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    queryset = Property.objects.none()
+    # Rollups already trail the bookings table, so replica lag is harmless
+    replica_read_actions = ('occupancy',)
+    # Properties, then rollup rows (see config/query_budget.py)
+    query_budget = {'occupancy': 2}
+
+    @decorators.action(detail=False, methods=['get'])
+    def occupancy(self, request):
+        """Occupancy rate, ADR and revenue of the caller's properties per month (or day)
+
+        Read from the daily rollups, so figures lag bookings by up to one
+        refresh_rollups interval.
+        """
+        query = OccupancyQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+
+        owner = params.get('owner', request.user.pk)
+        if owner != request.user.pk and not request.user.is_staff:
+            return Response({'detail': 'Only staff can report on other owners'}, status=status.HTTP_403_FORBIDDEN)
+        properties = Property.objects.filter(owner_id=owner).order_by('title')
+        if 'property' in params:
+            properties = properties.filter(pk=params['property'])
+        properties = list(properties.values_list('id', 'title'))
+        if 'property' in params and not properties:
+            return Response({'detail': 'Property not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        report = occupancy_report(properties, params['start'], params['end'], params['group']) if properties else []
+        return Response({
+            'start': params['start'],
+            'end': params['end'],
+            'group': params['group'],
+            'properties': OccupancyReportSerializer(report, many=True).data,
+        })
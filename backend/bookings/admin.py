@@ -1,11 +1,31 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from config.stats import EstimatedCountPaginator
 from .models import Booking
+from .transitions import ALLOWED_SOURCES, InvalidTransition, bulk_transition, transition
+
+class BookingAdminForm(forms.ModelForm):
+    # The change form never writes status directly; a choice here goes through transition()
+    change_status = forms.ChoiceField(required=False, label='Change status to')
+    
+    class Meta:
+        model = Booking
+        fields = '__all__'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        current = self.instance.status
+        self.fields['change_status'].choices = [('', 'Keep current status')] + [
+            (value, label) for value, label in Booking.STATUS_CHOICES
+            if current in ALLOWED_SOURCES.get(value, ())
+        ]
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
+    form = BookingAdminForm
     list_display = [
         'booking_id', 'user_email', 'property_name', 'check_in', 'check_out', 
         'guests', 'total_price', 'status_badge', 'payment_status', 'created_at'
@@ -17,7 +37,11 @@ class BookingAdmin(admin.ModelAdmin):
     ]
     readonly_fields = ['created_at', 'updated_at', 'total_price', 'nights_display']
     list_per_page = 25
-    date_hierarchy = 'check_in'
+    # user_email and property_name read both relations on every row
+    list_select_related = ['user', 'property']
+    # No full COUNT(*) per page view (see config/stats.py)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Booking Information', {
@@ -40,6 +64,21 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_readonly_fields(self, request, obj=None):
+        readonly = super().get_readonly_fields(request, obj)
+        return [*readonly, 'status'] if obj else readonly
+    
+    def get_fieldsets(self, request, obj=None):
+        fieldsets = super().get_fieldsets(request, obj)
+        if obj is None:
+            return fieldsets
+        # status is shown read-only next to the transition choice
+        return [
+            (name, {**options, 'fields': ('status', 'change_status', 'payment_status', 'payment_id')})
+            if name == 'Status & Payment' else (name, options)
+            for name, options in fieldsets
+        ]
+    
     actions = ['confirm_bookings', 'cancel_bookings', 'complete_bookings']
     
     def booking_id(self, obj):
@@ -77,12 +116,31 @@ class BookingAdmin(admin.ModelAdmin):
         return f"{obj.get_nights()} night(s)"
     nights_display.short_description = 'Nights'
     
+    def save_model(self, request, obj, form, change):
+        if not change:
+            super().save_model(request, obj, form, change)
+            return
+        # Every field but status, so a concurrent transition is never overwritten
+        obj.save(update_fields=[
+            field.name for field in obj._meta.concrete_fields
+            if not field.primary_key and field.name != 'status'
+        ])
+        to_status = form.cleaned_data.get('change_status')
+        if to_status:
+            try:
+                transition(
+                    obj, to_status, actor=request.user, reason='Changed by admin',
+                    fee_policy='admin' if to_status == 'cancelled' else None,
+                )
+            except InvalidTransition as e:
+                self.message_user(request, str(e), level=messages.ERROR)
+    
+    def _apply_transition(self, request, queryset, to_status, **kwargs):
+        # One UPDATE for the selection; bookings in other states are skipped
+        return bulk_transition(queryset, to_status, actor=request.user, **kwargs)
+    
     def confirm_bookings(self, request, queryset):
-        updated = 0
-        for booking in queryset.filter(status='pending'):
-            booking.status = 'confirmed'
-            booking.save()
-            updated += 1
+        updated = self._apply_transition(request, queryset, 'confirmed', reason='Confirmed by admin')
         
         self.message_user(
             request, 
@@ -91,13 +149,10 @@ class BookingAdmin(admin.ModelAdmin):
     confirm_bookings.short_description = "Confirm selected bookings"
     
     def cancel_bookings(self, request, queryset):
-        updated = 0
-        for booking in queryset.filter(status__in=['pending', 'confirmed']):
-            booking.status = 'cancelled'
-            # Calculate refund (98% of total price)
-            booking.refund_amount = booking.total_price * 0.98
-            booking.save()
-            updated += 1
+        # Admin cancellations are refunded in full
+        updated = self._apply_transition(
+            request, queryset, 'cancelled', fee_policy='admin', reason='Cancelled by admin'
+        )
         
         self.message_user(
             request, 
@@ -106,11 +161,7 @@ class BookingAdmin(admin.ModelAdmin):
     cancel_bookings.short_description = "Cancel selected bookings"
     
     def complete_bookings(self, request, queryset):
-        updated = 0
-        for booking in queryset.filter(status='confirmed'):
-            booking.status = 'completed'
-            booking.save()
-            updated += 1
+        updated = self._apply_transition(request, queryset, 'completed', reason='Completed by admin')
         
         self.message_user(
             request, 
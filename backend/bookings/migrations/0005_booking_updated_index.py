@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_alter_booking_options_booking_cancellation_fee_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['updated_at', 'id'], name='booking_updated_idx'),
+        ),
+    ]
@@ -50,6 +50,10 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Changed-since scans of refresh_rollups (see analytics/rollup.py)
+            models.Index(fields=['updated_at', 'id'], name='booking_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Booking #{self.id} - {self.property.title} by {self.user.email}"
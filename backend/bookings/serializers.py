@@ -1,11 +1,12 @@
 from rest_framework import serializers
+from config.metrics import TimedSerializerMixin
 from django.utils import timezone
 from datetime import timedelta
 from .models import Booking
 from listings.models import Property
 from listings.serializers import PropertySerializer
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     property_details = PropertySerializer(source='property', read_only=True)
     nights = serializers.SerializerMethodField()
     
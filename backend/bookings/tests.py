@@ -0,0 +1,11 @@
+import pytest
+from django.urls import reverse
+
+@pytest.mark.django_db
+def test_booking_list_within_budget(api_client, user, make_properties, make_bookings, page_rows):
+    make_bookings(user, make_properties(user, page_rows))
+
+    response = api_client.get(reverse('booking-list'))
+
+    assert response.status_code == 200
+    assert len(response.data['results']) == page_rows
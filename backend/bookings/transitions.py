@@ -0,0 +1,191 @@
+"""
+Booking status transitions.
+
+Every workflow status change (user and admin actions in the API and the Django
+admin) goes through `transition`. It applies a single conditional
+``UPDATE ... WHERE id = ? AND status IN (...) RETURNING ...``, so two concurrent
+clicks can never both succeed, and then records exactly one history row and
+one notification in the same transaction. Because the update bypasses
+``save()``, the notifications signals do not fire a second time.
+`bulk_transition` does the same for a whole admin selection at once.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from notifications.signals import record_status_change, record_status_changes
+from .models import Booking
+
+# Target status -> statuses a booking may move from
+ALLOWED_SOURCES = {
+    # Admins can put a confirmed booking back on hold
+    'pending': ('confirmed',),
+    'confirmed': ('pending',),
+    'cancelled': ('pending', 'confirmed'),
+    'completed': ('confirmed',),
+    'refunded': ('cancelled',),
+}
+
+# Share of the total price kept as cancellation fee, by who cancels
+CANCELLATION_FEE_RATES = {
+    'user': Decimal('0.02'),   # 2% deduction
+    'admin': Decimal('0'),     # full refund
+}
+
+class InvalidTransition(Exception):
+    def __init__(self, booking_id, current_status, to_status):
+        self.booking_id = booking_id
+        self.current_status = current_status
+        self.to_status = to_status
+        super().__init__(f'Cannot change booking #{booking_id} from {current_status} to {to_status}')
+
+def cancellation_amounts(total_price, fee_policy):
+    """(cancellation_fee, refund_amount) for a total; mirrors the SQL used by transition()"""
+    fee = (total_price * CANCELLATION_FEE_RATES[fee_policy]).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    return fee, total_price - fee
+
+def transition(booking, to_status, *, actor, reason='', fee_policy=None, conditions=None):
+    """
+    Move `booking` to `to_status` if its current status allows it.
+
+    `fee_policy` ('user' or 'admin') recomputes cancellation_fee/refund_amount
+    from the stored total price. `conditions` are extra filter kwargs the row
+    must satisfy (e.g. ``{'check_out__lte': today}``). The instance is updated
+    in place and returned; InvalidTransition is raised if the row was not in
+    an allowed state, including when a concurrent request got there first.
+    """
+    sources = ALLOWED_SOURCES.get(to_status, ())
+    using = router.db_for_write(Booking, instance=booking)
+    now = timezone.now()
+
+    with transaction.atomic(using=using):
+        rows = []
+        if sources:
+            candidates = Booking.objects.using(using).filter(pk=booking.pk, status__in=sources, **(conditions or {}))
+            rows = _update(using, candidates, to_status, now, fee_policy)
+        if not rows:
+            current_status = (
+                Booking.objects.using(using).filter(pk=booking.pk).values_list('status', flat=True).first()
+            )
+            raise InvalidTransition(booking.pk, current_status, to_status)
+
+        _, old_status, booking.refund_amount, booking.cancellation_fee, booking.confirmed = rows[0]
+        booking.status = to_status
+        booking.updated_at = now
+
+        record_status_change(
+            booking,
+            old_status,
+            changed_by=actor,
+            reason=reason or f'Status changed from {old_status} to {to_status}',
+            refund_amount=booking.refund_amount if fee_policy else None,
+            deduction_amount=booking.cancellation_fee if fee_policy else None,
+        )
+    return booking
+
+def bulk_transition(queryset, to_status, *, actor, reason='', fee_policy=None):
+    """
+    Move every booking in `queryset` that is in an allowed state to `to_status`.
+
+    The set-based counterpart of `transition` for admin actions: one
+    conditional UPDATE for the whole selection, then the history rows,
+    notifications and queued emails in one bulk insert each. Bookings in
+    any other state are skipped. Returns the number of bookings changed.
+    """
+    sources = ALLOWED_SOURCES.get(to_status, ())
+    if not sources:
+        return 0
+    using = router.db_for_write(Booking)
+    now = timezone.now()
+
+    with transaction.atomic(using=using):
+        candidates = Booking.objects.using(using).filter(
+            pk__in=queryset.order_by().values('pk'), status__in=sources
+        )
+        rows = _update(using, candidates, to_status, now, fee_policy)
+        if not rows:
+            return 0
+
+        changed = {pk: row for pk, *row in rows}
+        bookings = list(Booking.objects.using(using).filter(pk__in=changed).select_related('user', 'property'))
+        changes = []
+        for booking in bookings:
+            old_status, booking.refund_amount, booking.cancellation_fee, booking.confirmed = changed[booking.pk]
+            changes.append((
+                booking,
+                old_status,
+                reason or f'Status changed from {old_status} to {to_status}',
+                booking.refund_amount if fee_policy else None,
+                booking.cancellation_fee if fee_policy else None,
+            ))
+        record_status_changes(changes, changed_by=actor)
+    return len(rows)
+
+def _update(using, candidates, to_status, now, fee_policy):
+    """Apply the change to the candidate rows; [(id, old status, refund_amount, cancellation_fee, confirmed)]"""
+    if connections[using].vendor == 'postgresql':
+        return _update_returning(using, candidates, to_status, now, fee_policy)
+    return _update_locked(using, candidates, to_status, now, fee_policy)
+
+def _update_returning(using, candidates, to_status, now, fee_policy):
+    """One UPDATE ... FROM (SELECT ... FOR UPDATE) ... RETURNING round trip (PostgreSQL)"""
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    table = qn(Booking._meta.db_table)
+
+    assignments = [f'{qn("status")} = %s', f'{qn("updated_at")} = %s']
+    params = [to_status, now]
+    if to_status == 'confirmed':
+        assignments.append(f'{qn("confirmed")} = TRUE')
+    if fee_policy:
+        fee = f'ROUND({table}.{qn("total_price")} * %s, 2)'
+        assignments.append(f'{qn("cancellation_fee")} = {fee}')
+        assignments.append(f'{qn("refund_amount")} = {table}.{qn("total_price")} - {fee}')
+        params += [CANCELLATION_FEE_RATES[fee_policy]] * 2
+
+    # The locked subquery yields the pre-update status; it is re-checked after
+    # waiting on a concurrent writer, so the loser of a race matches no row.
+    # Locking in id order keeps concurrent bulk updates from deadlocking.
+    candidates = candidates.order_by('pk').select_for_update().values('pk', 'status')
+    candidate_sql, candidate_params = candidates.query.get_compiler(using).as_sql()
+
+    sql = (
+        f'UPDATE {table} SET {", ".join(assignments)} '
+        f'FROM ({candidate_sql}) AS prev '
+        f'WHERE {table}.{qn("id")} = prev.{qn("id")} '
+        f'RETURNING {table}.{qn("id")}, prev.{qn("status")}, {table}.{qn("refund_amount")}, '
+        f'{table}.{qn("cancellation_fee")}, {table}.{qn("confirmed")}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + list(candidate_params))
+        return cursor.fetchall()
+
+def _update_locked(using, candidates, to_status, now, fee_policy):
+    """Portable equivalent for backends without UPDATE ... FROM ... RETURNING (e.g. SQLite in development)"""
+    current = list(
+        candidates.order_by('pk')
+        .select_for_update()
+        .values('pk', 'status', 'total_price', 'refund_amount', 'cancellation_fee', 'confirmed')
+    )
+    if not current:
+        return []
+
+    updates = {'status': to_status, 'updated_at': now}
+    if to_status == 'confirmed':
+        updates['confirmed'] = True
+    Booking.objects.using(using).filter(pk__in=[row['pk'] for row in current]).update(**updates)
+
+    rows = []
+    for row in current:
+        old_status = row['status']
+        row.update(updates)
+        if fee_policy:
+            row['cancellation_fee'], row['refund_amount'] = cancellation_amounts(row['total_price'], fee_policy)
+        rows.append((row['pk'], old_status, row['refund_amount'], row['cancellation_fee'], row['confirmed']))
+    if fee_policy:
+        Booking.objects.using(using).bulk_update(
+            [Booking(pk=row[0], refund_amount=row[2], cancellation_fee=row[3]) for row in rows],
+            ['refund_amount', 'cancellation_fee'],
+        )
+    return rows
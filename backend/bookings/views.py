@@ -1,4 +1,6 @@
-from rest_framework import viewsets, permissions, decorators, status
+import logging
+
+from rest_framework import viewsets, permissions, decorators, status, exceptions
 from rest_framework.response import Response
 from django.utils.dateparse import parse_date
 from django.utils import timezone
@@ -6,6 +8,9 @@ from decimal import Decimal
 from .models import Booking
 from listings.models import Property
 from .serializers import BookingSerializer
+from .transitions import transition, InvalidTransition
+
+logger = logging.getLogger(__name__)
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -18,21 +23,31 @@ class BookingViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     # Safe default for schema generation and unauthenticated access during introspection
     queryset = Booking.objects.none()
+    # Served from a read replica when one is configured (see config/routers.py)
+    replica_read_actions = ('availability',)
+    # Queries per request regardless of page size (see config/query_budget.py)
+    query_budget = {'list': 3, 'retrieve': 2, 'availability': 2, 'receipt': 3}
 
     def get_queryset(self):
         # When generating schema, drf-spectacular sets swagger_fake_view
         if getattr(self, 'swagger_fake_view', False):  # pragma: no cover
             return Booking.objects.none()
-        return Booking.objects.filter(user=self.request.user).select_related('property').order_by('-created_at')
+        return (
+            Booking.objects.filter(user=self.request.user)
+            .select_related('property')
+            .prefetch_related('property__images')
+            .order_by('-created_at')
+        )
     
     def create(self, request, *args, **kwargs):
-        # Enhanced error handling for booking creation
         try:
             return super().create(request, *args, **kwargs)
-        except Exception as e:
-            # Log the error for debugging
-            print(f"Booking creation error: {str(e)}")
-            # Re-raise to let DRF handle the response
+        except exceptions.APIException:
+            # Validation and permission errors are ordinary 4xx responses
+            raise
+        except Exception:
+            # Anything else becomes a 500; keep the traceback
+            logger.exception('Booking creation failed for user %s', request.user.pk)
             raise
 
     @decorators.action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
@@ -67,29 +82,19 @@ class BookingViewSet(viewsets.ModelViewSet):
         """Cancel a booking with 2% deduction"""
         booking = self.get_object()
         
-        if booking.status in ['cancelled', 'completed', 'refunded']:
+        # Refund with 2% deduction
+        try:
+            transition(booking, 'cancelled', actor=request.user, fee_policy='user', reason='Cancelled by user')
+        except InvalidTransition as e:
             return Response({
-                'detail': f'Cannot cancel booking with status: {booking.status}'
+                'detail': f'Cannot cancel booking with status: {e.current_status}'
             }, status=400)
         
-        # Calculate refund with 2% deduction
-        from decimal import Decimal
-        deduction_percentage = Decimal('0.02')  # 2%
-        deduction_amount = booking.total_price * deduction_percentage
-        refund_amount = booking.total_price - deduction_amount
-        
-        # Update booking
-        old_status = booking.status
-        booking.status = 'cancelled'
-        booking.refund_amount = refund_amount
-        booking.cancellation_fee = deduction_amount
-        booking.save()
-        
         return Response({
             'detail': 'Booking cancelled successfully',
             'original_amount': str(booking.total_price),
-            'deduction_amount': str(deduction_amount),
-            'refund_amount': str(refund_amount),
+            'deduction_amount': str(booking.cancellation_fee),
+            'refund_amount': str(booking.refund_amount),
             'deduction_percentage': '2%',
             'status': 'cancelled'
         })
@@ -101,16 +106,14 @@ class BookingViewSet(viewsets.ModelViewSet):
         except Booking.DoesNotExist:
             return Response({'detail': 'Booking not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        if booking.status == 'confirmed':
-            return Response({'detail': 'Booking is already confirmed'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if booking.status == 'cancelled':
-            return Response({'detail': 'Cannot confirm a cancelled booking'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Confirm the booking
-        booking.status = 'confirmed'
-        booking.confirmed = True  # For backward compatibility
-        booking.save()
+        try:
+            transition(booking, 'confirmed', actor=request.user)
+        except InvalidTransition as e:
+            if e.current_status == 'confirmed':
+                return Response({'detail': 'Booking is already confirmed'}, status=status.HTTP_400_BAD_REQUEST)
+            if e.current_status == 'cancelled':
+                return Response({'detail': 'Cannot confirm a cancelled booking'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'detail': f'Cannot confirm booking with status: {e.current_status}'}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({'detail': 'Booking confirmed successfully'}, status=status.HTTP_200_OK)
 
@@ -121,9 +124,10 @@ class BookingViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Permission denied'}, status=403)
         
         booking = self.get_object()
-        booking.status = 'confirmed'
-        booking.confirmed = True
-        booking.save()
+        try:
+            transition(booking, 'confirmed', actor=request.user, reason='Confirmed by admin')
+        except InvalidTransition as e:
+            return Response({'detail': f'Cannot confirm booking with status: {e.current_status}'}, status=400)
         
         return Response({'detail': 'Booking confirmed successfully'})
 
@@ -169,14 +173,13 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         booking = self.get_object()
         
-        if booking.status != 'confirmed':
+        try:
+            transition(booking, 'completed', actor=request.user, reason='Completed by admin')
+        except InvalidTransition:
             return Response({
                 'detail': 'Only confirmed bookings can be marked as completed'
             }, status=400)
         
-        booking.status = 'completed'
-        booking.save()
-        
         return Response({
             'detail': 'Booking marked as completed',
             'booking_id': booking.id,
@@ -191,14 +194,13 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         booking = self.get_object()
         
-        if booking.status in ['cancelled', 'refunded']:
-            return Response({'detail': 'Booking already cancelled'}, status=400)
-        
         # Admin cancellation - full refund
-        booking.status = 'cancelled'
-        booking.refund_amount = booking.total_price  # Full refund for admin cancellation
-        booking.cancellation_fee = 0
-        booking.save()
+        try:
+            transition(booking, 'cancelled', actor=request.user, fee_policy='admin', reason='Cancelled by admin')
+        except InvalidTransition as e:
+            if e.current_status in ['cancelled', 'refunded']:
+                return Response({'detail': 'Booking already cancelled'}, status=400)
+            return Response({'detail': f'Cannot cancel booking with status: {e.current_status}'}, status=400)
         
         return Response({
             'detail': 'Booking cancelled by admin',
@@ -212,16 +214,13 @@ class BookingViewSet(viewsets.ModelViewSet):
         """User confirms their own booking"""
         booking = self.get_object()
         
-        if booking.status != 'pending':
+        try:
+            transition(booking, 'confirmed', actor=request.user, reason='Confirmed by user')
+        except InvalidTransition as e:
             return Response({
-                'detail': f'Cannot confirm booking with status: {booking.status}'
+                'detail': f'Cannot confirm booking with status: {e.current_status}'
             }, status=400)
         
-        # User confirms booking
-        booking.status = 'confirmed'
-        booking.confirmed = True
-        booking.save()
-        
         return Response({
             'detail': 'Booking confirmed successfully',
             'booking_id': booking.id,
@@ -234,21 +233,21 @@ class BookingViewSet(viewsets.ModelViewSet):
         """User marks their booking as completed after stay"""
         booking = self.get_object()
         
-        if booking.status != 'confirmed':
+        # Only after the check-out date has passed
+        try:
+            transition(
+                booking, 'completed', actor=request.user, reason='Completed by user',
+                conditions={'check_out__lte': timezone.now().date()},
+            )
+        except InvalidTransition as e:
+            if e.current_status == 'confirmed':
+                return Response({
+                    'detail': 'Cannot complete booking before check-out date'
+                }, status=400)
             return Response({
                 'detail': 'Only confirmed bookings can be marked as completed'
             }, status=400)
         
-        # Check if check-out date has passed
-        from django.utils import timezone
-        if booking.check_out > timezone.now().date():
-            return Response({
-                'detail': 'Cannot complete booking before check-out date'
-            }, status=400)
-        
-        booking.status = 'completed'
-        booking.save()
-        
         return Response({
             'detail': 'Booking marked as completed',
             'booking_id': booking.id,
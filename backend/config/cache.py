@@ -0,0 +1,95 @@
+"""
+Cache backends with hit/miss counters, and a proxy for the auth cache.
+
+CACHES (see settings) defines one alias per feature area, all on the backend
+chosen by CACHE_BACKEND:
+
+- default
+- listings
+- bookings
+- auth
+
+Each alias has its own key prefix and version, so one area's keys can be
+invalidated by bumping its version without touching the others. Only the
+redis backend is shared between worker processes and machines; locmem is per
+process and file is per host.
+
+Counters are per process. The staff stats endpoint also reports the Redis
+server's own totals when that backend is used.
+"""
+import threading
+
+from django.core.cache import caches
+from django.core.cache.backends import filebased, locmem, redis
+from django.utils.connection import ConnectionProxy
+
+# The listings and bookings aliases have no callers yet; reach them with caches[alias]
+auth_cache = ConnectionProxy(caches, 'auth')
+
+_lock = threading.Lock()
+_counters = {}
+_missing = object()
+
+def _count(namespace, hits, misses):
+    with _lock:
+        counters = _counters.setdefault(namespace, {'hits': 0, 'misses': 0})
+        counters['hits'] += hits
+        counters['misses'] += misses
+
+class StatsMixin:
+    # Backends whose get_many() is BaseCache's loop over get() are already
+    # counted there
+    get_many_calls_get = True
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self.namespace = params.get('NAMESPACE', 'default')
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        if value is _missing:
+            _count(self.namespace, 0, 1)
+            return default
+        _count(self.namespace, 1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        if self.get_many_calls_get:
+            return super().get_many(keys, version)
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        _count(self.namespace, len(found), len(keys) - len(found))
+        return found
+
+class LocMemCache(StatsMixin, locmem.LocMemCache):
+    pass
+
+class FileBasedCache(StatsMixin, filebased.FileBasedCache):
+    pass
+
+class RedisCache(StatsMixin, redis.RedisCache):
+    get_many_calls_get = False
+
+    def server_stats(self):
+        info = self._cache.get_client().info('stats')
+        return {'keyspace_hits': info.get('keyspace_hits'), 'keyspace_misses': info.get('keyspace_misses')}
+
+def cache_stats():
+    result = {}
+    for alias in caches:
+        backend = caches[alias]
+        namespace = getattr(backend, 'namespace', alias)
+        with _lock:
+            counters = dict(_counters.get(namespace, {'hits': 0, 'misses': 0}))
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else None
+        counters['backend'] = type(backend).__name__
+        counters['key_prefix'] = backend.key_prefix
+        counters['version'] = backend.version
+        if isinstance(backend, RedisCache):
+            try:
+                counters['server'] = backend.server_stats()
+            except Exception as e:
+                counters['server'] = {'error': str(e)}
+        result[alias] = counters
+    return result
@@ -0,0 +1,40 @@
+"""
+PostgreSQL backend with connection instrumentation.
+
+Behaves exactly like django.db.backends.postgresql, except that opening a
+connection is timed. Without a pool that time is the TCP and authentication
+handshake; with Django 5.1+'s psycopg pool it is the wait for a pooled
+connection. Counters are per process; `connection_stats()` also includes
+the pool's own statistics when one is configured.
+"""
+import threading
+
+_lock = threading.Lock()
+_stats = {}
+
+def _empty():
+    return {'opened': 0, 'connect_seconds_total': 0.0, 'connect_seconds_max': 0.0}
+
+def record_connect(alias, seconds):
+    with _lock:
+        stats = _stats.setdefault(alias, _empty())
+        stats['opened'] += 1
+        stats['connect_seconds_total'] += seconds
+        stats['connect_seconds_max'] = max(stats['connect_seconds_max'], seconds)
+
+def connection_stats():
+    from django.db import connections
+
+    result = {}
+    for alias in connections:
+        connection = connections[alias]
+        with _lock:
+            stats = dict(_stats.get(alias) or _empty())
+        stats['connect_seconds_avg'] = stats['connect_seconds_total'] / stats['opened'] if stats['opened'] else 0.0
+        stats['conn_max_age'] = connection.settings_dict['CONN_MAX_AGE']
+        # Only Django 5.1+ has a pool, and only when OPTIONS['pool'] is set
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            stats['pool'] = pool.get_stats()
+        result[alias] = stats
+    return result
@@ -0,0 +1,12 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from . import record_connect
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        record_connect(self.alias, time.perf_counter() - started)
+        return connection
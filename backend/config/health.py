@@ -0,0 +1,72 @@
+"""
+Liveness and readiness probes.
+
+HealthCheckMiddleware is the first middleware and answers these paths
+itself, before sessions, authentication, metrics or URL resolution:
+
+- /healthz: the process is up and serving requests; no I/O at all
+- /readyz: the default database and the default cache each answer within
+  HEALTH['TIMEOUT_SECONDS']; 503 otherwise
+
+Readiness checks run on a small per-process thread pool so a hung database
+or cache fails the probe on time instead of holding it open. The pool's
+threads keep their own database connection between probes.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+
+# Threads start on the first probe, so this is safe to create before forking
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='readyz')
+
+def check_database():
+    # Drops a connection that failed, or outlived CONN_MAX_AGE, on the previous probe
+    connection.close_if_unusable_or_obsolete()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+def check_cache():
+    cache.get('readyz')
+
+CHECKS = {'database': check_database, 'cache': check_cache}
+
+def readiness():
+    """({check: 'ok' | error}, all ok)"""
+    timeout = settings.HEALTH['TIMEOUT_SECONDS']
+    futures = {name: _executor.submit(check) for name, check in CHECKS.items()}
+    results = {}
+    for name, future in futures.items():
+        try:
+            future.result(timeout=timeout)
+        except TimeoutError:
+            results[name] = f'timed out after {timeout}s'
+        except Exception as e:
+            # The exception type only; messages can name hosts and users
+            results[name] = type(e).__name__
+        else:
+            results[name] = 'ok'
+    return results, all(result == 'ok' for result in results.values())
+
+def _json(data, status=200):
+    response = HttpResponse(json.dumps(data), content_type='application/json', status=status)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+class HealthCheckMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.liveness_path = settings.HEALTH['LIVENESS_PATH']
+        self.readiness_path = settings.HEALTH['READINESS_PATH']
+
+    def __call__(self, request):
+        if request.path == self.liveness_path:
+            return _json({'status': 'ok'})
+        if request.path == self.readiness_path:
+            checks, ready = readiness()
+            return _json({'status': 'ok' if ready else 'unavailable', 'checks': checks}, 200 if ready else 503)
+        return self.get_response(request)
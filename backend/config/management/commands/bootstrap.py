@@ -0,0 +1,144 @@
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.migrations.executor import MigrationExecutor
+
+from config.openapi import write_schema
+
+FINGERPRINT_FILE = '.bootstrap-fingerprint'
+MANIFEST_FILE = 'staticfiles.json'
+
+def static_fingerprint():
+    """Hash of every collectable file's path, size and mtime plus the storage in use"""
+    digest = hashlib.sha256()
+    digest.update(f'{django.get_version()}|{settings.STATICFILES_STORAGE}'.encode())
+    entries = []
+    for finder in get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            stat = os.stat(storage.path(path))
+            entries.append(f'{path}|{stat.st_size}|{stat.st_mtime_ns}')
+    for entry in sorted(entries):
+        digest.update(entry.encode())
+    return digest.hexdigest()
+
+class Command(BaseCommand):
+    help = 'Prepare the container for serving: migrate, collect static files, build the API schema and create the superuser, skipping steps that are already done'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wait', type=int, default=60, help='Seconds to wait for the database (0 = fail immediately)')
+        parser.add_argument('--skip-static', action='store_true')
+        parser.add_argument('--skip-schema', action='store_true')
+        parser.add_argument('--import-report', action='store_true', help='Print the slowest imports of a cold start and exit')
+        parser.add_argument('--top', type=int, default=15, help='Rows in the import report')
+
+    def handle(self, *args, **options):
+        if options['import_report']:
+            self.import_report(options['top'])
+            return
+
+        started = time.perf_counter()
+        self.step('database', self.wait_for_database, options['wait'])
+        self.step('migrations', self.migrate)
+        if not options['skip_static']:
+            self.step('static files', self.collect_static)
+        if not options['skip_schema']:
+            self.step('API schema', self.build_schema)
+        self.step('superuser', self.create_superuser)
+        self.stdout.write(self.style.SUCCESS(f'Bootstrap finished in {time.perf_counter() - started:.2f}s'))
+
+    def step(self, name, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        self.stdout.write(f'{name}: {result} ({time.perf_counter() - started:.2f}s)')
+
+    def wait_for_database(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                connection.ensure_connection()
+                return 'ready'
+            except OperationalError as e:
+                if time.monotonic() >= deadline:
+                    raise CommandError(f'Database not available: {e}')
+                self.stdout.write(f'Waiting for database ({e})'.strip())
+                connection.close()
+                time.sleep(1)
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if not plan:
+            return 'up to date'
+        call_command('migrate', interactive=False, verbosity=0)
+        return f'applied {len(plan)}'
+
+    def collect_static(self):
+        fingerprint = static_fingerprint()
+        marker = os.path.join(settings.STATIC_ROOT, FINGERPRINT_FILE)
+        try:
+            with open(marker) as f:
+                unchanged = f.read() == fingerprint
+        except OSError:
+            unchanged = False
+        if unchanged and os.path.exists(os.path.join(settings.STATIC_ROOT, MANIFEST_FILE)):
+            return 'up to date'
+
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(marker, 'w') as f:
+            f.write(fingerprint)
+        return 'collected'
+
+    def build_schema(self):
+        return 'generated' if write_schema() else 'up to date'
+
+    def create_superuser(self):
+        email = os.environ.get('DJANGO_SUPERUSER_EMAIL')
+        password = os.environ.get('DJANGO_SUPERUSER_PASSWORD')
+        if not email or not password:
+            return 'not configured'
+        User = get_user_model()
+        if User.objects.filter(email=email).exists():
+            return 'exists'
+        User.objects.create_superuser(email=email, password=password)
+        return 'created'
+
+    def import_report(self, top):
+        """Run a fresh interpreter with -X importtime and summarise where startup goes"""
+        code = f'import django; django.setup(); import {settings.ROOT_URLCONF}'
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, env=os.environ.copy(), cwd=settings.BASE_DIR,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        modules = []
+        packages = {}
+        for line in result.stderr.splitlines():
+            match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+            if not match:
+                continue
+            self_us, cumulative_us, _, name = match.groups()
+            modules.append((int(cumulative_us), name))
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + int(self_us)
+
+        total = sum(packages.values())
+        self.stdout.write(f'Cold import of {settings.ROOT_URLCONF}: {total / 1000:.0f}ms')
+        self.stdout.write('\nSlowest modules (cumulative):')
+        for cumulative_us, name in sorted(modules, reverse=True)[:top]:
+            self.stdout.write(f'{cumulative_us / 1000:>9.1f}ms  {name}')
+        self.stdout.write('\nPackages (own time):')
+        for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+            self.stdout.write(f'{self_us / 1000:>9.1f}ms  {package}')
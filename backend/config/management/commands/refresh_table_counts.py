@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from config.stats import refresh_exact_counts, stats_alias
+
+class Command(BaseCommand):
+    help = 'Count the dashboard tables exactly (on the stats database) and cache the results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep refreshing instead of exiting after one pass')
+        parser.add_argument(
+            '--interval', type=float, default=settings.DASHBOARD_STATS['REFRESH_SECONDS'],
+            help='Seconds between refreshes (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            results = refresh_exact_counts()
+            counts = ', '.join(f'{model._meta.label}={entry["count"]}' for model, entry in results.items())
+            self.stdout.write(f'{counts} on {stats_alias()} in {time.perf_counter() - started:.2f}s')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
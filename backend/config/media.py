@@ -0,0 +1,20 @@
+"""
+Uploaded media, served with cache headers.
+
+No separate web server fronts the backend, so with MEDIA_SERVING['SERVE']
+Django serves MEDIA_ROOT itself (django.views.static.serve, which answers
+If-Modified-Since with 304). Image variants have content-hashed names and
+never change, so browsers may keep them for a year without revalidating;
+other uploads are cached for MEDIA_SERVING['MAX_AGE_SECONDS'].
+"""
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+def serve_media(request, path):
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if '/variants/' in f'/{path}':
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_SERVING['IMMUTABLE_MAX_AGE_SECONDS'], immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_SERVING['MAX_AGE_SECONDS'])
+    return response
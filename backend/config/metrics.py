@@ -0,0 +1,179 @@
+"""
+Per-request timings and Prometheus metrics.
+
+MetricsMiddleware times every request and, through a database execute
+wrapper, the number and duration of its SQL queries. Serializers that
+include TimedSerializerMixin add the time spent turning instances into
+response data. Each request gets a `Server-Timing` header with the
+breakdown:
+
+- db: SQL time (description holds the query count)
+- serialize: to_representation() time of the outermost serializer
+- render: turning the response data into bytes
+- app: everything else in the view and middleware
+- total
+
+The same figures feed Prometheus histograms labelled by URL name, served in
+text format on /metrics. Scrapes need METRICS['TOKEN'] as a bearer token;
+with no token set, only direct requests from METRICS['ALLOWED_NETWORKS']
+(loopback by default) are answered. Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in
+gunicorn.conf.py) makes every worker write its samples there so a scrape of
+any worker returns the totals of all of them.
+"""
+import hmac
+import ipaddress
+import logging
+import os
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+logger = logging.getLogger('pakbooking.requests')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+REQUESTS = Counter('pakbooking_http_requests_total', 'Requests served', ['view', 'method', 'status'])
+LATENCY = Histogram('pakbooking_http_request_duration_seconds', 'Time to produce the response', ['view', 'method'], buckets=LATENCY_BUCKETS)
+DB_TIME = Histogram('pakbooking_db_duration_seconds', 'SQL time per request', ['view'], buckets=LATENCY_BUCKETS)
+DB_QUERIES = Histogram('pakbooking_db_queries', 'SQL queries per request', ['view'], buckets=QUERY_COUNT_BUCKETS)
+SERIALIZE_TIME = Histogram('pakbooking_serialize_duration_seconds', 'Serializer time per request', ['view'], buckets=LATENCY_BUCKETS)
+RENDER_TIME = Histogram('pakbooking_render_duration_seconds', 'Response rendering time per request', ['view'], buckets=LATENCY_BUCKETS)
+
+class RequestTimings:
+    __slots__ = ('queries', 'db', 'serialize', 'serialize_depth', 'render', 'render_started')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.serialize_depth = 0
+        self.render = 0.0
+        self.render_started = None
+
+_timings = ContextVar('request_timings', default=None)
+
+class TimedSerializerMixin:
+    """Count to_representation() time; nested and per-item calls are counted once"""
+
+    def to_representation(self, instance):
+        timings = _timings.get()
+        if timings is None or timings.serialize_depth:
+            return super().to_representation(instance)
+        timings.serialize_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serialize += time.perf_counter() - started
+            timings.serialize_depth -= 1
+
+def _record_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings = _timings.get()
+        if timings is not None:
+            timings.queries += 1
+            timings.db += time.perf_counter() - started
+
+def _view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    # Unmatched paths share one label so scanners can't blow up cardinality
+    if match is None:
+        return '<unmatched>'
+    return match.view_name or match.route
+
+def _ms(seconds):
+    return f'{seconds * 1000:.1f}'
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == settings.METRICS['PATH']:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_record_query))
+                response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        total = time.perf_counter() - started
+
+        view = _view_label(request)
+        app = max(0.0, total - timings.db - timings.serialize - timings.render)
+        REQUESTS.labels(view, request.method, response.status_code).inc()
+        LATENCY.labels(view, request.method).observe(total)
+        DB_TIME.labels(view).observe(timings.db)
+        DB_QUERIES.labels(view).observe(timings.queries)
+        SERIALIZE_TIME.labels(view).observe(timings.serialize)
+        RENDER_TIME.labels(view).observe(timings.render)
+
+        if settings.METRICS['SERVER_TIMING']:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={_ms(timings.db)};desc="{timings.queries} queries"',
+                f'serialize;dur={_ms(timings.serialize)}',
+                f'render;dur={_ms(timings.render)}',
+                f'app;dur={_ms(app)}',
+                f'total;dur={_ms(total)}',
+            ])
+
+        if total * 1000 >= settings.METRICS['SLOW_REQUEST_MS']:
+            logger.warning(
+                'Slow request %s %s (%s): %sms, %d queries in %sms, serialize %sms',
+                request.method, request.path, view, _ms(total), timings.queries, _ms(timings.db), _ms(timings.serialize),
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        timings = _timings.get()
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+            response.add_post_render_callback(self._rendered)
+        return response
+
+    def _rendered(self, response):
+        timings = _timings.get()
+        if timings is not None and timings.render_started is not None:
+            timings.render += time.perf_counter() - timings.render_started
+
+def _from_allowed_network(request):
+    """Whether the request comes straight from one of METRICS['ALLOWED_NETWORKS']"""
+    # Anything relayed by a proxy arrives from the proxy's address; only direct scrapes count
+    if 'X-Forwarded-For' in request.headers:
+        return False
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in network for network in settings.METRICS['ALLOWED_NETWORKS'])
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; needs METRICS['TOKEN'], or a direct request from an allowed network"""
+    token = settings.METRICS['TOKEN']
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse(status=401)
+    elif not _from_allowed_network(request):
+        return HttpResponse(status=403)
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
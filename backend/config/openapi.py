@@ -0,0 +1,112 @@
+"""
+The OpenAPI schema as a prebuilt file.
+
+Generating the schema introspects every view and serializer, so it is not
+done per request. `manage.py bootstrap` writes it to API_SCHEMA['FILE']
+whenever the code it describes has changed (by fingerprint of the project's
+Python sources and the installed versions), and /api/schema/ serves that
+file from memory with an ETag and Cache-Control, answering revalidations
+with 304.
+
+With API_SCHEMA['LIVE'] (the default when DEBUG is on) /api/schema/ is
+generated on every request instead, so it follows code edits during
+development.
+"""
+import hashlib
+import os
+
+import django
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.module_loading import import_string
+from django.views.decorators.http import condition, require_safe
+
+CONTENT_TYPE = 'application/vnd.oai.openapi+json'
+SKIP_DIRS = {'__pycache__', 'migrations', 'static', 'media', 'var', 'node_modules'}
+
+def source_fingerprint():
+    """Hash of the project's Python sources (path, size, mtime), the schema settings and library versions"""
+    import drf_spectacular
+    import rest_framework
+
+    digest = hashlib.sha256()
+    digest.update(f'{django.get_version()}|{rest_framework.__version__}|{drf_spectacular.__version__}'.encode())
+    digest.update(repr(sorted(settings.SPECTACULAR_SETTINGS.items())).encode())
+    entries = []
+    for root, dirs, files in os.walk(settings.BASE_DIR):
+        dirs[:] = [name for name in dirs if name not in SKIP_DIRS and not name.startswith('.')]
+        for name in files:
+            if name.endswith('.py'):
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                entries.append(f'{os.path.relpath(path, settings.BASE_DIR)}|{stat.st_size}|{stat.st_mtime_ns}')
+    for entry in sorted(entries):
+        digest.update(entry.encode())
+    return digest.hexdigest()
+
+def generate_schema():
+    """The schema as JSON bytes, exactly as `manage.py spectacular --format openapi-json` renders it"""
+    from drf_spectacular.renderers import OpenApiJsonRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return OpenApiJsonRenderer().render(generator.get_schema(request=None, public=True), renderer_context={})
+
+def _fingerprint_file(path):
+    return f'{path}.fingerprint'
+
+def write_schema(force=False):
+    """Regenerate the schema file if its sources changed; returns whether it was written"""
+    path = settings.API_SCHEMA['FILE']
+    fingerprint = source_fingerprint()
+    if not force and os.path.exists(path):
+        try:
+            with open(_fingerprint_file(path)) as f:
+                if f.read() == fingerprint:
+                    return False
+        except OSError:
+            pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    content = generate_schema()
+    # Written aside and renamed, so a serving process never reads half a file
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(content)
+    os.replace(temporary, path)
+    with open(_fingerprint_file(path), 'w') as f:
+        f.write(fingerprint)
+    return True
+
+_loaded = None  # (mtime_ns, content, etag)
+
+def _schema():
+    """(content, etag) of the schema file, re-read only when the file changes"""
+    global _loaded
+    path = settings.API_SCHEMA['FILE']
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        # Not bootstrapped (e.g. a bare runserver); build it once
+        write_schema(force=True)
+        mtime = os.stat(path).st_mtime_ns
+    if _loaded is None or _loaded[0] != mtime:
+        with open(path, 'rb') as f:
+            content = f.read()
+        _loaded = (mtime, content, hashlib.sha256(content).hexdigest()[:32])
+    return _loaded[1], _loaded[2]
+
+_live_view = None
+
+@require_safe
+@condition(etag_func=lambda request: None if settings.API_SCHEMA['LIVE'] else _schema()[1])
+def schema_view(request):
+    global _live_view
+    if settings.API_SCHEMA['LIVE']:
+        if _live_view is None:
+            _live_view = import_string('drf_spectacular.views.SpectacularAPIView').as_view()
+        return _live_view(request)
+    response = HttpResponse(_schema()[0], content_type=CONTENT_TYPE)
+    patch_cache_control(response, public=True, max_age=settings.API_SCHEMA['MAX_AGE_SECONDS'])
+    return response
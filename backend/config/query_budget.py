@@ -0,0 +1,89 @@
+"""
+Per-endpoint SQL query budgets.
+
+Views declare how many queries each action may run, independent of page
+size, so N+1 regressions fail loudly instead of slowing down production:
+
+    class PropertyViewSet(viewsets.ModelViewSet):
+        query_budget = {'list': 3, 'retrieve': 2}
+
+Keys are viewset action names, or the lower-case HTTP method for plain
+APIViews. The budget covers the whole request, authentication included.
+
+QueryBudgetMiddleware enforces budgets when QUERY_BUDGET['ENFORCE'] is set,
+which the `query_budget` pytest fixture (backend/conftest.py) does for
+tests. Otherwise it removes itself from the stack at startup. An endpoint
+over budget raises QueryBudgetExceeded listing the statements that ran
+more than once, which is what an N+1 looks like.
+"""
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class QueryLog:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.statements)
+
+    def report(self, label, budget):
+        lines = [f'{label} ran {len(self)} queries, budget is {budget}']
+        duplicates = [(count, sql) for sql, count in Counter(self.statements).most_common() if count > 1]
+        if duplicates:
+            lines.append('Repeated statements:')
+            lines.extend(f'  {count}x {sql}' for count, sql in duplicates)
+        else:
+            lines.append('Statements:')
+            lines.extend(f'  {sql}' for sql in self.statements)
+        return '\n'.join(lines)
+
+@contextmanager
+def _capture(log):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+        yield log
+
+@contextmanager
+def max_queries(budget, label='block'):
+    """Raise QueryBudgetExceeded if the block runs more than `budget` queries"""
+    with _capture(QueryLog()) as log:
+        yield log
+    if len(log) > budget:
+        raise QueryBudgetExceeded(log.report(label, budget))
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET['ENFORCE']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with _capture(QueryLog()) as log:
+            response = self.get_response(request)
+
+        budget = getattr(request, '_query_budget', None)
+        if budget is not None and len(log) > budget[1]:
+            raise QueryBudgetExceeded(log.report(*budget))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        budgets = getattr(view_class, 'query_budget', None) or {}
+        actions = getattr(view_func, 'actions', None)
+        method = request.method.lower()
+        key = actions.get(method) if actions else method
+        if key in budgets:
+            request._query_budget = (f'{view_class.__name__}.{key} ({request.method} {request.path})', budgets[key])
+        return None
@@ -0,0 +1,95 @@
+"""
+Primary/replica database routing.
+
+Everything reads from and writes to the primary unless the current request
+opted in to replica reads: a view lists the actions that tolerate replication
+lag in `replica_read_actions`, and ReplicaRoutingMiddleware enables replica
+reads for GET/HEAD requests to those actions.
+
+After a successful write a user is pinned to the primary for
+DATABASE_REPLICAS['PIN_SECONDS'] (tracked in the shared cache), so their
+next reads see their own writes even while the replicas catch up.
+"""
+import random
+from contextvars import ContextVar
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework_simplejwt.settings import api_settings
+
+_use_replica = ContextVar('use_replica', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+def _pin_key(user_id):
+    return f'db:pin:{user_id}'
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        replicas = settings.DATABASE_REPLICAS['ALIASES']
+        if not replicas or not _use_replica.get() or connections['default'].in_atomic_block:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+def _token_user_id(request):
+    """
+    User id from the bearer token, without verifying it.
+
+    Only used to choose a database; authentication still happens in the view,
+    so a forged token can at most route its own request to the primary.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(header) != 2 or header[0] not in api_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        claims = jwt.decode(header[1], options={'verify_signature': False})
+    except jwt.InvalidTokenError:
+        return None
+    return claims.get(api_settings.USER_ID_CLAIM)
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _use_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400 and settings.DATABASE_REPLICAS['ALIASES']:
+            user_id = _token_user_id(request)
+            if user_id:
+                cache.set(_pin_key(user_id), 1, settings.DATABASE_REPLICAS['PIN_SECONDS'])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or not settings.DATABASE_REPLICAS['ALIASES']:
+            return None
+        view_class = getattr(view_func, 'cls', None)
+        # HEAD is served by the GET action
+        action = (getattr(view_func, 'actions', None) or {}).get('get')
+        if action not in getattr(view_class, 'replica_read_actions', ()):
+            return None
+
+        user_id = _token_user_id(request)
+        if user_id and cache.get(_pin_key(user_id)):
+            return None
+        _use_replica.set(True)
+        return None
@@ -1,3 +1,4 @@
+import ipaddress
 import os
 from pathlib import Path
 
@@ -24,13 +25,22 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
     'drf_spectacular',
+    # Project-wide management commands (bootstrap, refresh_table_counts)
+    'config',
     'users',
     'listings',
     'bookings',
     'notifications',
+    'analytics',
 ]
 
 MIDDLEWARE = [
+    # Answers /healthz and /readyz before anything else runs
+    'config.health.HealthCheckMiddleware',
+    # Next, so its timings cover the rest of the stack
+    'config.metrics.MetricsMiddleware',
+    # Only active when QUERY_BUDGET['ENFORCE'] is set (tests)
+    'config.query_budget.QueryBudgetMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -40,6 +50,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'config.routers.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -65,14 +76,64 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # django.db.backends.postgresql plus connection timing (see config/db)
+        'ENGINE': 'config.db',
         'NAME': os.environ.get('POSTGRES_DB', 'booking'),
         'USER': os.environ.get('POSTGRES_USER', 'booking'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'booking_password'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Reuse connections across requests, checking them before reuse
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true',
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+        },
+    }
+}
+
+# psycopg's connection pool replaces persistent connections. It needs Django
+# 5.1+ and psycopg[pool], which requirements.txt does not provide yet, so
+# DB_POOL refuses to start rather than silently keep per-worker connections.
+if os.environ.get('DB_POOL', 'False').lower() == 'true':
+    import django
+    from django.core.exceptions import ImproperlyConfigured
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured(f'DB_POOL needs Django 5.1 or later; this is {django.get_version()}')
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured('DB_POOL needs the psycopg_pool package (pip install "psycopg[pool]")')
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
     }
+
+# Read replicas: DB_REPLICA_HOSTS is a comma-separated list of host[:port]
+# entries with the primary's credentials (add /name to use another database,
+# e.g. "localhost/booking_replica" to try routing locally). Only views that
+# opt in read from them (see config/routers.py).
+DATABASE_REPLICAS = {
+    'ALIASES': [],
+    # How long a user who just wrote keeps reading from the primary
+    'PIN_SECONDS': int(os.environ.get('DB_REPLICA_PIN_SECONDS', '5')),
 }
+for _n, _replica in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    _address, _, _name = _replica.strip().partition('/')
+    _host, _, _port = _address.partition(':')
+    DATABASES[f'replica_{_n}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'NAME': _name or DATABASES['default']['NAME'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS['ALIASES'].append(f'replica_{_n}')
+
+DATABASE_ROUTERS = ['config.routers.PrimaryReplicaRouter']
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -90,6 +151,51 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher is used for new hashes; existing hashes are upgraded to it
+# on the next successful login (e.g. put Argon2PasswordHasher first once
+# argon2-cffi is installed)
+PASSWORD_HASHERS = os.environ.get(
+    'DJANGO_PASSWORD_HASHERS',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher,'
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher,'
+    'django.contrib.auth.hashers.Argon2PasswordHasher,'
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher,'
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+).split(',')
+
+# Per-process pool that password hashing runs in (see users.hashing)
+PASSWORD_HASHING = {
+    'WORKERS': int(os.environ.get('PASSWORD_HASHING_WORKERS', '2')),
+    'MAX_PENDING': int(os.environ.get('PASSWORD_HASHING_MAX_PENDING', '8')),
+    'WAIT_SECONDS': float(os.environ.get('PASSWORD_HASHING_WAIT_SECONDS', '2')),
+}
+
+# Caches (see config/cache.py). CACHE_BACKEND is locmem (per process), file
+# (per host) or redis (any Redis-protocol server, shared by all workers).
+# Each alias has its own key prefix and a version that can be bumped from
+# the environment to invalidate just that area.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_URL = os.environ.get('CACHE_URL', 'redis://localhost:6379/0')
+CACHE_DIR = os.environ.get('CACHE_DIR', '/var/tmp/pakbooking_cache')
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'pakbooking')
+
+def _cache(namespace):
+    backend, location = {
+        'locmem': ('config.cache.LocMemCache', namespace),
+        'file': ('config.cache.FileBasedCache', os.path.join(CACHE_DIR, namespace)),
+        'redis': ('config.cache.RedisCache', CACHE_URL),
+    }[CACHE_BACKEND]
+    return {
+        'BACKEND': backend,
+        'LOCATION': location,
+        'NAMESPACE': namespace,
+        'KEY_PREFIX': f'{CACHE_KEY_PREFIX}:{namespace}',
+        'VERSION': int(os.environ.get(f'CACHE_VERSION_{namespace.upper()}', os.environ.get('CACHE_VERSION', '1'))),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', '300')),
+    }
+
+CACHES = {namespace: _cache(namespace) for namespace in ('default', 'listings', 'bookings', 'auth')}
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -105,6 +211,20 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Serving MEDIA_ROOT from Django (see config/media.py)
+MEDIA_SERVING = {
+    'SERVE': os.environ.get('MEDIA_SERVE', 'True').lower() == 'true',
+    'MAX_AGE_SECONDS': int(os.environ.get('MEDIA_MAX_AGE', '86400')),
+    # Content-hashed image variants
+    'IMMUTABLE_MAX_AGE_SECONDS': 31536000,
+}
+
+# Resized copies of property photos (see listings/variants.py)
+IMAGE_VARIANTS = {
+    # Processes per server process that encode variants
+    'WORKERS': int(os.environ.get('IMAGE_VARIANT_WORKERS', '2')),
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -114,7 +234,7 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -130,7 +250,61 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True,
+    # Rotated and logged-out tokens are revoked by users.revocation instead
+    'BLACKLIST_AFTER_ROTATION': False,
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.RevocableTokenRefreshSerializer',
+}
+
+# Revoked token JTIs (see users.revocation)
+JWT_REVOCATION = {
+    # How often each process pulls new revocations into its Bloom filter
+    'SYNC_SECONDS': float(os.environ.get('JWT_REVOCATION_SYNC_SECONDS', '1')),
+    'BLOOM_CAPACITY': int(os.environ.get('JWT_REVOCATION_BLOOM_CAPACITY', '100000')),
+    'BLOOM_ERROR_RATE': float(os.environ.get('JWT_REVOCATION_BLOOM_ERROR_RATE', '0.001')),
+    # How often one process publishes its filter for new processes to start from
+    'SNAPSHOT_SECONDS': float(os.environ.get('JWT_REVOCATION_SNAPSHOT_SECONDS', '60')),
+}
+
+# Auth endpoint rate limits as "burst:per minute" token buckets: `burst`
+# requests at once, refilled at `per minute` (see users.throttling)
+AUTH_THROTTLE_RATES = {
+    'login_ip': os.environ.get('AUTH_THROTTLE_LOGIN_IP', '20:10'),
+    'login_account': os.environ.get('AUTH_THROTTLE_LOGIN_ACCOUNT', '5:2'),
+    'register_ip': os.environ.get('AUTH_THROTTLE_REGISTER_IP', '5:1'),
+    # One-time code issuance (see users.otp.issue)
+    'otp_account': os.environ.get('AUTH_THROTTLE_OTP_ACCOUNT', '3:1'),
+    'otp_ip': os.environ.get('AUTH_THROTTLE_OTP_IP', '10:2'),
+}
+
+# One-time email codes (see users.otp)
+OTP = {
+    'TTL_SECONDS': int(os.environ.get('OTP_TTL_SECONDS', '600')),
+    'MAX_ATTEMPTS': int(os.environ.get('OTP_MAX_ATTEMPTS', '5')),
+    # Also keep hashed codes in the EmailOTP table, for caches that may be flushed
+    'DB_FALLBACK': os.environ.get('OTP_DB_FALLBACK', 'False').lower() == 'true',
+    'PURGE_BATCH_SIZE': int(os.environ.get('OTP_PURGE_BATCH_SIZE', '1000')),
+}
+
+# Bulk user import (see users.importer)
+USER_IMPORT = {
+    'CHUNK_SIZE': int(os.environ.get('USER_IMPORT_CHUNK_SIZE', '1000')),
+    # Hashing processes; 0 = one per CPU
+    'WORKERS': int(os.environ.get('USER_IMPORT_WORKERS', '0')),
+    # Largest file the API accepts; bigger imports go through `manage.py import_users`
+    'MAX_UPLOAD_BYTES': int(os.environ.get('USER_IMPORT_MAX_UPLOAD_BYTES', str(50 * 1024 * 1024))),
+    # A running job whose worker has not finished it by then is picked up again
+    'JOB_TIMEOUT_SECONDS': int(os.environ.get('USER_IMPORT_JOB_TIMEOUT_SECONDS', '3600')),
+}
+
+# Request authentication trusts token claims / cached user state instead of
+# loading the user row (see users.authentication)
+AUTH_USER_CACHE = {
+    # Token claims read from the user row (at login or refresh) less than this
+    # long ago are trusted on a cold cache
+    'CLAIMS_TRUST_SECONDS': int(os.environ.get('AUTH_CLAIMS_TRUST_SECONDS', '300')),
+    'LOCAL_TTL_SECONDS': int(os.environ.get('AUTH_USER_LOCAL_TTL_SECONDS', '10')),
+    'LOCAL_MAX_ENTRIES': int(os.environ.get('AUTH_USER_LOCAL_MAX_ENTRIES', '4096')),
+    'SHARED_TTL_SECONDS': int(os.environ.get('AUTH_USER_SHARED_TTL_SECONDS', '900')),
 }
 
 # CORS Configuration
@@ -146,6 +320,35 @@ EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True').lower() == 'true'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '10'))
+
+# Outbound mail queue (drained by `manage.py send_queued_emails`)
+EMAIL_QUEUE = {
+    'BATCH_SIZE': int(os.environ.get('EMAIL_QUEUE_BATCH_SIZE', '50')),
+    'MAX_ATTEMPTS': int(os.environ.get('EMAIL_QUEUE_MAX_ATTEMPTS', '5')),
+    # Retry delay doubles with every failed attempt, capped at RETRY_MAX_SECONDS
+    'RETRY_BASE_SECONDS': int(os.environ.get('EMAIL_QUEUE_RETRY_BASE_SECONDS', '30')),
+    'RETRY_MAX_SECONDS': int(os.environ.get('EMAIL_QUEUE_RETRY_MAX_SECONDS', '3600')),
+    # Merge a user's pending notification mails into one digest message
+    'DIGEST': os.environ.get('EMAIL_QUEUE_DIGEST', 'False').lower() == 'true',
+    'DIGEST_WINDOW_SECONDS': int(os.environ.get('EMAIL_QUEUE_DIGEST_WINDOW_SECONDS', '300')),
+    # A claimed batch returns to the queue after this long if its worker died
+    'CLAIM_SECONDS': int(os.environ.get('EMAIL_QUEUE_CLAIM_SECONDS', '600')),
+    # Delivered and permanently failed rows are deleted after this many days
+    'SENT_RETENTION_DAYS': int(os.environ.get('EMAIL_QUEUE_SENT_RETENTION_DAYS', '7')),
+    'FAILED_RETENTION_DAYS': int(os.environ.get('EMAIL_QUEUE_FAILED_RETENTION_DAYS', '30')),
+}
+
+# Notification retention (see `manage.py prune_notifications`)
+NOTIFICATION_RETENTION = {
+    # Read notifications older than this are moved out of the hot table
+    'READ_DAYS': int(os.environ.get('NOTIFICATION_RETENTION_READ_DAYS', '90')),
+    # Hard ceiling for unread notifications; 0 keeps them forever
+    'UNREAD_DAYS': int(os.environ.get('NOTIFICATION_RETENTION_UNREAD_DAYS', '365')),
+    # 'archive' copies rows into NotificationArchive before deleting, 'purge' just deletes
+    'MODE': os.environ.get('NOTIFICATION_RETENTION_MODE', 'archive'),
+    'BATCH_SIZE': int(os.environ.get('NOTIFICATION_RETENTION_BATCH_SIZE', '1000')),
+}
 
 # API Documentation
 SPECTACULAR_SETTINGS = {
@@ -153,19 +356,93 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'Hotel booking platform API',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
+    # Loads users.schema (and drf-spectacular) only when a schema is generated
+    'PREPROCESSING_HOOKS': ['users.schema.register_extensions'],
+}
+
+# /api/schema/ serves a file written by `manage.py bootstrap` (see config/openapi.py)
+API_SCHEMA = {
+    'FILE': os.environ.get('API_SCHEMA_FILE', os.path.join(BASE_DIR, 'var', 'openapi.json')),
+    # Generate per request instead, following code edits
+    'LIVE': os.environ.get('API_SCHEMA_LIVE', str(DEBUG)).lower() == 'true',
+    'MAX_AGE_SECONDS': int(os.environ.get('API_SCHEMA_MAX_AGE', '300')),
+}
+
+# Liveness and readiness probes (see config/health.py)
+HEALTH = {
+    'LIVENESS_PATH': '/healthz',
+    'READINESS_PATH': '/readyz',
+    # Per check (database, cache) on /readyz
+    'TIMEOUT_SECONDS': float(os.environ.get('HEALTH_TIMEOUT_SECONDS', '2')),
 }
 
 # Logging
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '{asctime} {levelname} [{process}] {name}: {message}',
+            'style': '{',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
         },
     },
     'root': {
         'handlers': ['console'],
-        'level': 'INFO',
+        'level': os.environ.get('LOG_LEVEL', 'INFO'),
     },
 }
+
+# Row counts for the Streamlit dashboard and admin changelists (see config/stats.py)
+DASHBOARD_STATS = {
+    # Database alias to read from; empty means the first replica, else default
+    'DATABASE': os.environ.get('DASHBOARD_DATABASE', ''),
+    'MODELS': ['users.User', 'listings.Property', 'bookings.Booking', 'notifications.Notification'],
+    # Tables estimated below this many rows are cheap enough to count exactly
+    'EXACT_BELOW': int(os.environ.get('DASHBOARD_EXACT_BELOW', '100000')),
+    'EXACT_MAX_AGE_SECONDS': int(os.environ.get('DASHBOARD_EXACT_MAX_AGE', '3600')),
+    # refresh_table_counts --loop interval
+    'REFRESH_SECONDS': int(os.environ.get('DASHBOARD_REFRESH_SECONDS', '900')),
+    # st.cache_data TTL in streamlit_app.py
+    'CACHE_SECONDS': int(os.environ.get('DASHBOARD_CACHE_SECONDS', '60')),
+    # Filtered admin changelists count at most this many rows
+    'ADMIN_COUNT_LIMIT': int(os.environ.get('ADMIN_COUNT_LIMIT', '10000')),
+}
+
+# Daily occupancy and revenue rollups (see analytics/rollup.py)
+ANALYTICS = {
+    'REFRESH_BATCH_SIZE': int(os.environ.get('ANALYTICS_REFRESH_BATCH_SIZE', '2000')),
+    # Bookings updated this long before the watermark are re-read, in case
+    # their transaction committed after a later one
+    'REFRESH_OVERLAP_SECONDS': int(os.environ.get('ANALYTICS_REFRESH_OVERLAP', '300')),
+    # refresh_rollups --loop interval
+    'REFRESH_SECONDS': int(os.environ.get('ANALYTICS_REFRESH_SECONDS', '300')),
+    # Longest range one report may cover, per grouping
+    'MAX_REPORT_DAYS': {'month': 1096, 'day': 366},
+}
+
+# Per-endpoint query budgets, enforced in tests (see config/query_budget.py)
+QUERY_BUDGET = {
+    'ENFORCE': os.environ.get('QUERY_BUDGET_ENFORCE', 'False').lower() == 'true',
+}
+
+# Request timings and the Prometheus endpoint (see config/metrics.py)
+METRICS = {
+    'PATH': '/metrics',
+    # Bearer token required to scrape /metrics
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+    # Without a token, /metrics only answers direct requests from these networks
+    'ALLOWED_NETWORKS': [
+        ipaddress.ip_network(network.strip())
+        for network in os.environ.get('METRICS_ALLOWED_NETWORKS', '127.0.0.0/8,::1/128').split(',')
+        if network.strip()
+    ],
+    'SERVER_TIMING': os.environ.get('METRICS_SERVER_TIMING', 'True').lower() == 'true',
+    # Requests slower than this are logged with their query count
+    'SLOW_REQUEST_MS': int(os.environ.get('METRICS_SLOW_REQUEST_MS', '1000')),
+}
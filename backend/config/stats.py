@@ -0,0 +1,113 @@
+"""
+Cheap row counts for dashboards.
+
+COUNT(*) is a full scan on PostgreSQL, so dashboards read counts from here
+instead:
+
+- exact counts written by `manage.py refresh_table_counts` (run it on a
+  schedule, or with --loop) are used while they are younger than
+  DASHBOARD_STATS['EXACT_MAX_AGE_SECONDS']
+- otherwise large tables report the planner's estimate
+  (pg_class.reltuples, kept current by autovacuum/ANALYZE)
+- small tables, and databases without estimates, are counted exactly
+
+Everything runs on DASHBOARD_STATS['DATABASE'], defaulting to the first read
+replica, so dashboards don't add load to the primary when one exists.
+Exact counts are kept in the default cache, which must be shared (redis)
+for the refresh command's results to reach other processes.
+
+EstimatedCountPaginator applies the same idea to admin changelists.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+def stats_alias():
+    configured = settings.DASHBOARD_STATS['DATABASE']
+    if configured:
+        return configured
+    replicas = settings.DATABASE_REPLICAS['ALIASES']
+    return replicas[0] if replicas else 'default'
+
+def dashboard_models():
+    return [apps.get_model(label) for label in settings.DASHBOARD_STATS['MODELS']]
+
+def _cache_key(model):
+    return f'stats:count:{model._meta.label_lower}'
+
+def estimated_counts(models, using):
+    """{model: planner estimate}, None where there is none (not PostgreSQL, or never analysed)"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return {model: None for model in models}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT relname, reltuples::bigint FROM pg_class WHERE oid = ANY(%s::regclass[])',
+            [[connection.ops.quote_name(model._meta.db_table) for model in models]],
+        )
+        found = dict(cursor.fetchall())
+    estimates = {}
+    for model in models:
+        estimate = found.get(model._meta.db_table)
+        # -1 means the table has not been vacuumed or analysed yet
+        estimates[model] = estimate if estimate is not None and estimate >= 0 else None
+    return estimates
+
+def refresh_exact_counts(models=None, using=None):
+    """Count every table exactly and store the results for table_counts()"""
+    using = using or stats_alias()
+    results = {}
+    for model in models or dashboard_models():
+        results[model] = _store(model, model._default_manager.using(using).count())
+    return results
+
+def _store(model, count):
+    entry = {'count': count, 'exact': True, 'as_of': timezone.now().isoformat(timespec='seconds')}
+    cache.set(_cache_key(model), entry, settings.DASHBOARD_STATS['EXACT_MAX_AGE_SECONDS'])
+    return entry
+
+def table_counts(models=None):
+    """{model label: {'count', 'exact', 'as_of'}} without scanning large tables"""
+    models = models or dashboard_models()
+    using = stats_alias()
+    cached = cache.get_many([_cache_key(model) for model in models])
+    missing = [model for model in models if _cache_key(model) not in cached]
+    estimates = estimated_counts(missing, using) if missing else {}
+
+    results = {}
+    for model in models:
+        entry = cached.get(_cache_key(model))
+        if entry is None:
+            estimate = estimates[model]
+            if estimate is None or estimate < settings.DASHBOARD_STATS['EXACT_BELOW']:
+                entry = _store(model, model._default_manager.using(using).count())
+            else:
+                entry = {'count': estimate, 'exact': False, 'as_of': None}
+        results[model._meta.label] = entry
+    return results
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that never counts a large table in full.
+
+    An unfiltered changelist of a large table reports the planner's estimate;
+    a filtered or searched one counts at most
+    DASHBOARD_STATS['ADMIN_COUNT_LIMIT'] rows, so pages beyond that are not
+    linked. Pair with ModelAdmin.show_full_result_count = False.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        if not queryset.query.has_filters():
+            estimate = estimated_counts([queryset.model], queryset.db)[queryset.model]
+            if estimate is not None and estimate >= settings.DASHBOARD_STATS['EXACT_BELOW']:
+                return estimate
+        return queryset.order_by()[:settings.DASHBOARD_STATS['ADMIN_COUNT_LIMIT']].count()
@@ -0,0 +1,17 @@
+"""
+Settings for the test suite (pytest.ini points pytest-django here).
+
+The production settings with an SQLite database, so tests need no
+PostgreSQL server, and a fast password hasher.
+"""
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+DATABASE_REPLICAS = {**DATABASE_REPLICAS, 'ALIASES': []}  # noqa: F405
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
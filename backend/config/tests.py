@@ -0,0 +1,40 @@
+import pytest
+from django.urls import path
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from listings.models import PropertyImage
+from .query_budget import QueryBudgetExceeded
+
+class ImageTitlesView(APIView):
+    """An N+1: each image's property is loaded on its own"""
+    query_budget = {'get': 2}
+
+    def get(self, request):
+        return Response([image.property.title for image in PropertyImage.objects.all()])
+
+urlpatterns = [path('image-titles/', ImageTitlesView.as_view())]
+
+@pytest.mark.django_db
+@pytest.mark.urls('config.tests')
+def test_over_budget_view_reports_repeated_statement(api_client, user, make_properties):
+    make_properties(user, 3)
+
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        api_client.get('/image-titles/')
+
+    message = str(excinfo.value)
+    assert 'ImageTitlesView.get (GET /image-titles/) ran 7 queries, budget is 2' in message
+    repeated = message.split('Repeated statements:\n')[1]
+    assert repeated.startswith('  6x SELECT')
+    assert 'FROM "listings_property" WHERE "listings_property"."id" = %s' in repeated
+
+@pytest.mark.django_db
+def test_max_queries_fixture(query_budget, user, make_properties):
+    make_properties(user, 2)
+
+    with query_budget(2):
+        list(PropertyImage.objects.select_related('property'))
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(2):
+            [image.property.title for image in PropertyImage.objects.all()]
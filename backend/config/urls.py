@@ -1,22 +1,38 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from django.utils.module_loading import import_string
 from django.views.generic import RedirectView
+from . import media, metrics, openapi, views
+
+def lazy_view(path, **initkwargs):
+    """Import a class-based view on its first request instead of at startup"""
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+    return wrapper
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    # Prebuilt at startup; drf-spectacular is only imported when the docs are first requested
+    path('api/schema/', openapi.schema_view, name='schema'),
+    path('api/docs/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/redoc/', lazy_view('drf_spectacular.views.SpectacularRedocView', url_name='schema'), name='redoc'),
     path('api/auth/', include('users.urls')),
     path('api/listings/', include('listings.urls')),
     path('api/bookings/', include('bookings.urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('api/analytics/', include('analytics.urls')),
+    path('api/ops/db/', views.DatabaseStatsView.as_view(), name='ops-db-stats'),
+    path('api/ops/cache/', views.CacheStatsView.as_view(), name='ops-cache-stats'),
+    path('metrics', metrics.metrics_view, name='metrics'),
     # Redirect root to API docs instead of 404
     path('', RedirectView.as_view(url='/api/docs/', permanent=False)),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT) 
\ No newline at end of file
+if settings.MEDIA_SERVING['SERVE']:
+    urlpatterns += [re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.*)$', media.serve_media, name='media')] 
\ No newline at end of file
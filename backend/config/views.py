@@ -0,0 +1,21 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import cache_stats
+from .db import connection_stats
+
+class OpsView(APIView):
+    """Operational endpoints; figures are for the process that served the request"""
+    permission_classes = [IsAdminUser]
+    schema = None  # not part of the public API
+
+class DatabaseStatsView(OpsView):
+    def get(self, request):
+        """Connection counts, connect/pool wait times and pool size"""
+        return Response(connection_stats())
+
+class CacheStatsView(OpsView):
+    def get(self, request):
+        """Hit/miss counts per cache alias"""
+        return Response(cache_stats())
@@ -0,0 +1,77 @@
+import pytest
+
+@pytest.fixture(autouse=True)
+def query_budget():
+    """
+    Enforce the views' query budgets for every test (see config/query_budget.py).
+
+    Requests over budget raise QueryBudgetExceeded through the test client.
+    The fixture value wraps other code in a budget too:
+
+        with query_budget(2):
+            list(Booking.objects.select_related('property'))
+    """
+    from django.conf import settings
+    from django.test import override_settings
+    from config.query_budget import max_queries
+
+    with override_settings(QUERY_BUDGET={**settings.QUERY_BUDGET, 'ENFORCE': True}):
+        yield max_queries
+
+@pytest.fixture
+def user(db):
+    from users.models import User
+
+    return User.objects.create_user('guest@example.com', 'password', is_active=True)
+
+@pytest.fixture
+def api_client(user):
+    """A REST framework test client sending `user`'s access token, as the frontend does"""
+    from rest_framework.test import APIClient
+    from users.tokens import UserRefreshToken
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {UserRefreshToken.for_user(user).access_token}')
+    return client
+
+@pytest.fixture
+def make_properties(db):
+    """make_properties(owner, count): available properties with two images each"""
+    from listings.models import Property, PropertyImage
+
+    def make(owner, count):
+        properties = Property.objects.bulk_create([
+            Property(owner=owner, title=f'Property {n}', city='Lahore', price_per_night=5000, max_guests=4)
+            for n in range(count)
+        ])
+        PropertyImage.objects.bulk_create([
+            PropertyImage(property=prop, image=f'property_images/{prop.pk}-{n}.jpg')
+            for prop in properties for n in range(2)
+        ])
+        return properties
+    return make
+
+@pytest.fixture
+def make_bookings(db):
+    """make_bookings(user, properties): one pending two-night booking per property"""
+    import datetime
+    from bookings.models import Booking
+
+    def make(user, properties):
+        check_in = datetime.date(2026, 12, 1)
+        # One at a time: saving a booking writes its notification and history
+        return [
+            Booking.objects.create(
+                property=prop, user=user, check_in=check_in, check_out=check_in + datetime.timedelta(days=2),
+                guests=2, total_price=10000,
+            )
+            for prop in properties
+        ]
+    return make
+
+@pytest.fixture(params=['short', 'full'])
+def page_rows(request):
+    """Rows to list: a short page and a full one, since query counts must not grow with the rows"""
+    from django.conf import settings
+
+    return 2 if request.param == 'short' else settings.REST_FRAMEWORK['PAGE_SIZE']
@@ -0,0 +1,78 @@
+"""
+Gunicorn settings for the production server (see entrypoint.sh).
+
+Every value can be overridden from the environment. Defaults size the server
+from the CPUs actually available to the container:
+
+- WSGI (SERVER_MODE=wsgi): threaded workers, so requests waiting on the
+  database or SMTP don't hold a whole process.
+- ASGI (SERVER_MODE=asgi): uvicorn workers, one event loop per process.
+
+`kill -HUP <master>` re-reads this file and replaces workers gracefully. With
+preload_app, new code needs `kill -USR2` (new master) followed by
+`kill -TERM` of the old master instead.
+"""
+import multiprocessing
+import os
+import shutil
+
+def _available_cpus():
+    """CPUs this process may use, honouring cpusets and cgroup v2 quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = multiprocessing.cpu_count()
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+_asgi = os.environ.get('SERVER_MODE', 'wsgi') == 'asgi'
+_cpus = _available_cpus()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+wsgi_app = 'config.asgi:application' if _asgi else 'config.wsgi:application'
+
+if _asgi:
+    worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn.workers.UvicornWorker')
+    workers = int(os.environ.get('WEB_CONCURRENCY', _cpus))
+else:
+    worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+    workers = int(os.environ.get('WEB_CONCURRENCY', _cpus + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Recycle workers periodically (jittered so they don't all restart together)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+# Heartbeat files on tmpfs; a disk-backed /tmp can stall workers in Docker
+worker_tmp_dir = os.environ.get('GUNICORN_WORKER_TMP_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+
+# Workers write Prometheus samples here so /metrics can sum them (see
+# config/metrics.py); must be set before the app is imported
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/dev/shm/pakbooking-metrics' if os.path.isdir('/dev/shm') else '/tmp/pakbooking-metrics')
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def on_starting(server):
+    # Samples of workers from a previous run would be added to the new totals
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
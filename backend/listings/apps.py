@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class ListingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'listings' 
\ No newline at end of file
+    name = 'listings'
+    
+    def ready(self):
+        import listings.signals 
\ No newline at end of file
@@ -0,0 +1,350 @@
+"""
+Deterministic synthetic data for benchmark databases.
+
+Every row is a pure function of the seed, so the same seed always produces
+the same database. Each table draws from its own random stream, so changing
+one count does not reshuffle the others. Nothing is held in memory at
+bookings scale: ids are derived from row numbers, and the booking stream is
+regenerated to produce its notifications and status history.
+
+Shape of the data:
+- properties are spread over Pakistani cities roughly by population and
+  tourism, with prices by property type
+- bookings follow a Zipf-like popularity, so a few properties are hot; they
+  never overlap on one property, lead times are mostly short, stays 1-7
+  nights, and statuses follow from the dates (past stays completed or
+  cancelled, future ones confirmed or pending)
+- each booking has its creation notification and history row, plus one more
+  of each when its status moved on
+
+load() streams rows into PostgreSQL with COPY and falls back to bulk_create
+elsewhere. bulk_create applies auto_now/auto_now_add, so timestamps are the
+load time with the fallback.
+"""
+import datetime
+import hashlib
+import heapq
+import random
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.db import connections, router
+from django.utils import timezone
+
+from notifications.messages import booking_params
+
+CITIES = [
+    ('Karachi', 18), ('Lahore', 16), ('Islamabad', 12), ('Rawalpindi', 6), ('Faisalabad', 4),
+    ('Multan', 3), ('Peshawar', 4), ('Quetta', 2), ('Hyderabad', 2), ('Sialkot', 2),
+    ('Murree', 8), ('Swat', 5), ('Hunza', 5), ('Skardu', 4), ('Gilgit', 3), ('Naran', 4), ('Gwadar', 2),
+]
+
+# (type, share, typical nightly price in PKR, max guests)
+PROPERTY_TYPES = [
+    ('hotel', 30, 14000, (2, 4)), ('apartment', 18, 9000, (2, 6)), ('guest_house', 14, 6000, (2, 6)),
+    ('house', 8, 15000, (4, 10)), ('villa', 5, 40000, (6, 14)), ('resort', 6, 30000, (2, 6)),
+    ('hostel', 7, 2500, (1, 4)), ('cottage', 5, 11000, (2, 6)), ('cabin', 4, 8000, (2, 5)),
+    ('luxury_suite', 3, 55000, (2, 4)),
+]
+
+FIRST_NAMES = [
+    'Ahmed', 'Ali', 'Hassan', 'Usman', 'Bilal', 'Hamza', 'Omar', 'Zain', 'Fahad', 'Imran', 'Kamran', 'Saad',
+    'Ayesha', 'Fatima', 'Zainab', 'Maryam', 'Hira', 'Sana', 'Amna', 'Mahnoor', 'Iqra', 'Sara', 'Nida', 'Rabia',
+]
+LAST_NAMES = [
+    'Khan', 'Ahmed', 'Malik', 'Hussain', 'Butt', 'Chaudhry', 'Qureshi', 'Sheikh', 'Siddiqui', 'Raza',
+    'Akram', 'Iqbal', 'Javed', 'Mirza', 'Baig', 'Shah', 'Abbasi', 'Awan', 'Rana', 'Jamil',
+]
+TITLE_WORDS = ['Royal', 'Grand', 'Pearl', 'Serene', 'Mountain', 'Garden', 'Crescent', 'Heritage', 'Valley', 'Lake', 'City', 'Green']
+AREAS = ['Gulberg', 'DHA', 'Clifton', 'F-7', 'Blue Area', 'Model Town', 'Saddar', 'Mall Road', 'Cantt', 'Bahria Town']
+AMENITIES = ['WiFi', 'Parking', 'Restaurant', 'Swimming Pool', 'Gym', 'Spa', 'Room Service', 'Air Conditioning', 'Heating', 'Mountain View', '24/7 Reception', 'Breakfast']
+
+PAST_DAYS = 730
+FUTURE_DAYS = 180
+
+STAY_NIGHTS = (1, 2, 3, 4, 5, 7)
+STAY_WEIGHTS = (30, 55, 72, 84, 92, 100)  # cumulative
+MEAN_STAY = 2.75
+
+def _stream(seed, name):
+    return random.Random(f'{seed}:{name}')
+
+def _uuid(seed, kind, number):
+    digest = hashlib.blake2b(f'{seed}:{kind}:{number}'.encode(), digest_size=16).digest()
+    return uuid.UUID(bytes=digest, version=4)
+
+def _weighted(pairs):
+    names = [name for name, *_ in pairs]
+    cumulative, total = [], 0
+    for _, weight, *_ in pairs:
+        total += weight
+        cumulative.append(total)
+    return names, cumulative
+
+def _moment(rng, day):
+    """A datetime on `day` at a random time"""
+    return datetime.datetime.combine(day, datetime.time(), tzinfo=datetime.timezone.utc) + datetime.timedelta(seconds=rng.randrange(86400))
+
+class Dataset:
+    USER_FIELDS = ['id', 'password', 'last_login', 'is_superuser', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'date_joined']
+    PROPERTY_FIELDS = [
+        'id', 'owner_id', 'title', 'description', 'city', 'address', 'price_per_night', 'max_guests',
+        'property_type', 'amenities', 'image_url', 'is_available', 'rating', 'created_at', 'updated_at',
+    ]
+    BOOKING_FIELDS = [
+        'id', 'property_id', 'user_id', 'check_in', 'check_out', 'guests', 'total_price', 'contact_phone',
+        'contact_email', 'special_requests', 'status', 'payment_status', 'payment_id', 'refund_amount',
+        'cancellation_fee', 'created_at', 'updated_at', 'confirmed',
+    ]
+    NOTIFICATION_FIELDS = ['user_id', 'booking_id', 'notification_type', 'params', 'title', 'message', 'is_read', 'created_at']
+    HISTORY_FIELDS = ['booking_id', 'user_id', 'old_status', 'new_status', 'changed_by_id', 'reason', 'refund_amount', 'deduction_amount', 'created_at']
+    FAVORITE_FIELDS = ['user_id', 'property_id', 'created_at']
+
+    def __init__(self, seed, users, properties, bookings, favorites, password_hash, email_domain, first_booking_id=1, as_of=None):
+        self.seed = seed
+        self.user_count = users
+        self.property_count = properties
+        self.booking_count = bookings
+        self.favorite_count = favorites
+        self.password_hash = password_hash
+        self.email_domain = email_domain
+        self.first_booking_id = first_booking_id
+        # Dates are relative to as_of (default: now); pin it to reproduce a database exactly
+        if as_of is None:
+            self.now = timezone.now().replace(microsecond=0)
+        else:
+            self.now = datetime.datetime.combine(as_of, datetime.time(12), tzinfo=datetime.timezone.utc)
+        self.today = self.now.date()
+        self.start = self.today - datetime.timedelta(days=PAST_DAYS)
+        self.end = self.today + datetime.timedelta(days=FUTURE_DAYS)
+        # 1 in 20 users is a host
+        self.host_count = max(1, users // 20)
+        self._properties = None
+
+    def user_id(self, number):
+        return _uuid(self.seed, 'user', number)
+
+    def user_email(self, number):
+        return f'user{number}@{self.email_domain}'
+
+    def users(self):
+        rng = _stream(self.seed, 'users')
+        joined_days = PAST_DAYS + 365
+        for number in range(self.user_count):
+            yield (
+                self.user_id(number), self.password_hash, None, False, self.user_email(number),
+                rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.random() < 0.95, False,
+                _moment(rng, self.today - datetime.timedelta(days=rng.randrange(joined_days))),
+            )
+
+    def properties(self):
+        """Property rows; also kept (small) for generating bookings"""
+        rng = _stream(self.seed, 'properties')
+        cities, city_weights = _weighted(CITIES)
+        types, type_weights = _weighted(PROPERTY_TYPES)
+        type_info = {name: (price, guests) for name, _, price, guests in PROPERTY_TYPES}
+        self._properties = []
+        for number in range(self.property_count):
+            city = rng.choices(cities, cum_weights=city_weights)[0]
+            property_type = rng.choices(types, cum_weights=type_weights)[0]
+            typical_price, (min_guests, max_guests) = type_info[property_type]
+            price = Decimal(max(1000, round(typical_price * rng.lognormvariate(0, 0.35), -2)))
+            title = f'{rng.choice(TITLE_WORDS)} {property_type.replace("_", " ").title()} {city}'
+            created_at = _moment(rng, self.start - datetime.timedelta(days=rng.randrange(365)))
+            row = (
+                _uuid(self.seed, 'property', number), self.user_id(rng.randrange(self.host_count)), title,
+                f'{title}, {rng.randint(5, 120)} minutes from the city centre.', city,
+                f'{rng.randint(1, 300)} {rng.choice(AREAS)}, {city}', price,
+                rng.randint(min_guests, max_guests), property_type, rng.sample(AMENITIES, rng.randint(3, 8)),
+                None, rng.random() < 0.9, Decimal(f'{rng.uniform(3.0, 5.0):.1f}'), created_at, created_at,
+            )
+            self._properties.append(SimpleNamespace(id=row[0], owner_id=row[1], title=title, price=price, max_guests=row[7]))
+            yield row
+
+    def _popularity(self):
+        """
+        Bookings per property, summing to booking_count.
+
+        Zipf-like over a seeded order, but a property is only given as many
+        stays as fit about 75% of its calendar; the excess goes to the others.
+        """
+        rng = _stream(self.seed, 'popularity')
+        order = list(range(self.property_count))
+        rng.shuffle(order)
+        weights = [0.0] * self.property_count
+        for rank, index in enumerate(order):
+            weights[index] = 1 / (rank + 1) ** 0.9
+        capacity = (self.end - self.start).days * 0.75 / MEAN_STAY
+
+        exact = [0.0] * self.property_count
+        open_indexes, remaining = list(range(self.property_count)), float(self.booking_count)
+        while open_indexes and remaining > 1e-6:
+            total = sum(weights[i] for i in open_indexes)
+            spill, still_open = 0.0, []
+            for i in open_indexes:
+                exact[i] += remaining * weights[i] / total
+                if exact[i] > capacity:
+                    spill += exact[i] - capacity
+                    exact[i] = capacity
+                else:
+                    still_open.append(i)
+            open_indexes, remaining = still_open, spill
+        if remaining > 1e-6:
+            # Every calendar is full; the rest become turned-down requests
+            total = sum(weights)
+            exact = [value + remaining * weights[i] / total for i, value in enumerate(exact)]
+
+        counts = [int(value) for value in exact]
+        by_remainder = sorted(range(self.property_count), key=lambda i: exact[i] - counts[i], reverse=True)
+        for i in by_remainder[:self.booking_count - sum(counts)]:
+            counts[i] += 1
+        return counts
+
+    def _property_stays(self, index, count):
+        """One property's bookings in check-in order, never overlapping"""
+        rng = _stream(self.seed, f'bookings:{index}')
+        prop = self._properties[index]
+        nights = [rng.choices(STAY_NIGHTS, cum_weights=STAY_WEIGHTS)[0] for _ in range(count)]
+        window = (self.end - self.start).days
+        mean_gap = max(0.0, (window - sum(nights)) / count)
+        cursor = self.start
+        for stay in nights:
+            check_in = cursor + datetime.timedelta(days=int(rng.expovariate(1 / mean_gap)) if mean_gap else 0)
+            overflow = check_in + datetime.timedelta(days=stay) > self.end
+            if overflow:
+                # The calendar is full: a request that was turned down or withdrawn
+                check_in = self.start + datetime.timedelta(days=rng.randrange(window - stay))
+            else:
+                cursor = check_in + datetime.timedelta(days=stay)
+            yield check_in, stay, overflow, rng, prop
+
+    def _booking(self, booking_id, check_in, stay, overflow, rng, prop):
+        check_out = check_in + datetime.timedelta(days=stay)
+        if overflow:
+            status = 'cancelled'
+        elif check_out < self.today:
+            status = rng.choices(('completed', 'cancelled', 'refunded'), cum_weights=(85, 95, 100))[0]
+        elif check_in > self.today:
+            status = rng.choices(('confirmed', 'pending', 'cancelled'), cum_weights=(65, 90, 100))[0]
+        else:
+            status = 'confirmed'
+
+        lead = min(180, int(rng.expovariate(1 / 20)))
+        created_day = min(check_in - datetime.timedelta(days=lead), self.today)
+        created_at = min(_moment(rng, created_day), self.now - datetime.timedelta(minutes=rng.randint(1, 600)))
+        if status == 'completed':
+            changed_at = _moment(rng, check_out)
+        elif status == 'refunded':
+            changed_at = _moment(rng, check_out + datetime.timedelta(days=2))
+        else:
+            changed_at = created_at + datetime.timedelta(hours=rng.randint(1, 72))
+        changed_at = min(changed_at, self.now)
+
+        total = prop.price * stay
+        paid = status in ('confirmed', 'completed', 'refunded') or (status == 'cancelled' and rng.random() < 0.5)
+        payment_status = {
+            'pending': 'unpaid', 'confirmed': 'paid', 'completed': 'paid', 'refunded': 'refunded',
+        }.get(status, 'refunded' if paid else 'unpaid')
+        refund = (total * Decimal('0.98')).quantize(Decimal('0.01')) if payment_status == 'refunded' else None
+        user_number = rng.randrange(self.user_count)
+        return SimpleNamespace(
+            id=booking_id, property=prop, user_id=self.user_id(user_number), email=self.user_email(user_number),
+            check_in=check_in, check_out=check_out, guests=rng.randint(1, prop.max_guests), total_price=total,
+            status=status, payment_status=payment_status, refund_amount=refund,
+            created_at=created_at, changed_at=changed_at,
+        )
+
+    def booking_stream(self):
+        """All bookings ordered by check-in, so ids grow with time as they would in production"""
+        if self._properties is None:
+            for _ in self.properties():
+                pass
+        counts = self._popularity()
+        streams = [self._property_stays(index, count) for index, count in enumerate(counts) if count]
+        merged = heapq.merge(*streams, key=lambda stay: stay[0])
+        for booking_id, stay in enumerate(merged, start=self.first_booking_id):
+            yield self._booking(booking_id, *stay)
+
+    def bookings(self):
+        for b in self.booking_stream():
+            yield (
+                b.id, b.property.id, b.user_id, b.check_in, b.check_out, b.guests, b.total_price,
+                '+92 3' + str(b.id % 100000000).zfill(9), b.email, '', b.status, b.payment_status, '',
+                b.refund_amount, Decimal('500.00'), b.created_at,
+                b.changed_at if b.status != 'pending' else b.created_at, b.status in ('confirmed', 'completed'),
+            )
+
+    def notifications(self):
+        week_ago = self.now - datetime.timedelta(days=7)
+        for b in self.booking_stream():
+            read = b.created_at < week_ago
+            yield (
+                b.user_id, b.id, 'booking_pending', booking_params('booking_pending', b, template='booking_created'),
+                '', '', read, b.created_at,
+            )
+            if b.status != 'pending':
+                notification_type = f'booking_{b.status}'
+                yield (
+                    b.user_id, b.id, notification_type, booking_params(notification_type, b),
+                    '', '', b.changed_at < week_ago, b.changed_at,
+                )
+
+    def status_history(self):
+        for b in self.booking_stream():
+            yield b.id, b.user_id, '', 'pending', b.user_id, 'Booking created', None, None, b.created_at
+            if b.status != 'pending':
+                deduction = (b.total_price - b.refund_amount) if b.refund_amount is not None else None
+                yield (
+                    b.id, b.user_id, 'pending', b.status, b.property.owner_id, f'Status changed from pending to {b.status}',
+                    b.refund_amount, deduction, b.changed_at,
+                )
+
+    def favorites(self):
+        rng = _stream(self.seed, 'favorites')
+        limit = min(self.favorite_count, self.user_count * self.property_count)
+        seen = set()
+        while len(seen) < limit:
+            pair = (rng.randrange(self.user_count), rng.randrange(self.property_count))
+            if pair in seen:
+                continue
+            seen.add(pair)
+            yield (
+                self.user_id(pair[0]), _uuid(self.seed, 'property', pair[1]),
+                _moment(rng, self.today - datetime.timedelta(days=rng.randrange(PAST_DAYS))),
+            )
+
+def load(model, fields, rows, batch_size=5000, use_copy=True):
+    """Insert `rows` (tuples in `fields` order); COPY on PostgreSQL, bulk_create otherwise"""
+    connection = connections[router.db_for_write(model)]
+    count = 0
+    with connection.cursor() as cursor:
+        raw = getattr(cursor, 'cursor', None)
+        if use_copy and connection.vendor == 'postgresql' and hasattr(raw, 'copy'):
+            from psycopg.types.json import Jsonb
+
+            model_fields = [model._meta.get_field(name) for name in fields]
+            json_positions = [i for i, field in enumerate(model_fields) if field.get_internal_type() == 'JSONField']
+            columns = ', '.join(connection.ops.quote_name(field.column) for field in model_fields)
+            table = connection.ops.quote_name(model._meta.db_table)
+            with raw.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                for row in rows:
+                    if json_positions:
+                        row = list(row)
+                        for i in json_positions:
+                            row[i] = Jsonb(row[i])
+                    copy.write_row(row)
+                    count += 1
+            return count
+
+    batch = []
+    for row in rows:
+        batch.append(model(**dict(zip(fields, row))))
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
@@ -0,0 +1,48 @@
+"""
+Resizing and encoding of property photos.
+
+Pillow only, no Django: listings.variants runs this in spawned worker
+processes that never set Django up.
+"""
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# Variant name -> longest side in pixels; images are never upscaled
+SIZES = {'thumb': 320, 'card': 800, 'full': 1600}
+
+# Extension -> (Pillow format, save options); WebP first, JPEG as the fallback
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+def _flatten(image):
+    """RGB, with any transparency composited onto white"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB') if image.mode != 'RGB' else image
+
+def render_variants(source, sizes=SIZES):
+    """{name: {'width', 'height', <extension>: bytes, ...}} for the encoded image `source`"""
+    with Image.open(BytesIO(source)) as original:
+        largest = max(sizes.values())
+        # JPEGs decode straight at a reduced scale when they are much larger
+        original.draft('RGB', (largest, largest))
+        image = _flatten(ImageOps.exif_transpose(original))
+
+    variants = {}
+    # Largest first, each size resampled from the previous one
+    for name, longest in sorted(sizes.items(), key=lambda item: item[1], reverse=True):
+        image = image.copy()
+        image.thumbnail((longest, longest), Image.LANCZOS)
+        entry = {'width': image.width, 'height': image.height}
+        for extension, (pil_format, options) in FORMATS.items():
+            buffer = BytesIO()
+            image.save(buffer, pil_format, **options)
+            entry[extension] = buffer.getvalue()
+        variants[name] = entry
+    return variants
@@ -0,0 +1,71 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.imaging import render_variants
+from listings.models import PropertyImage
+from listings.variants import is_current, read_source, store
+
+class Command(BaseCommand):
+    help = 'Build missing or outdated WebP/JPEG variants of property images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild every image, not only those without current variants')
+        parser.add_argument('--workers', type=int, default=settings.IMAGE_VARIANTS['WORKERS'])
+
+    def handle(self, *args, **options):
+        images = [
+            (image.pk, image.image.name)
+            for image in PropertyImage.objects.exclude(image='').only('id', 'image', 'variants').iterator()
+            if options['all'] or not is_current(image)
+        ]
+        if not images:
+            self.stdout.write('All image variants are up to date')
+            return
+
+        started = time.perf_counter()
+        built = missing = failed = 0
+        # Sources held in memory at once: enough to keep every worker busy
+        window = options['workers'] * 2
+        pending = {}
+        workers = self.start_workers(options['workers'])
+        try:
+            for position, (image_id, source_name) in enumerate(images):
+                source = read_source(source_name)
+                if source is None:
+                    self.stderr.write(f'Image {image_id}: {source_name} not found')
+                    missing += 1
+                else:
+                    pending[workers.submit(render_variants, source)] = (image_id, source_name, source, workers)
+                last = position == len(images) - 1
+                while pending and (len(pending) >= window or last):
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        image_id, source_name, source, pool = pending.pop(future)
+                        try:
+                            store(image_id, source_name, source, future.result())
+                        except Exception as e:
+                            # e.g. a corrupt upload Pillow can't decode; the rest still get built
+                            self.stderr.write(f'Image {image_id}: {source_name} failed: {type(e).__name__}: {e}')
+                            failed += 1
+                            if isinstance(e, BrokenProcessPool) and pool is workers:
+                                # A worker died (e.g. out of memory); its pool can't take more work
+                                workers.shutdown(wait=False)
+                                workers = self.start_workers(options['workers'])
+                        else:
+                            built += 1
+        finally:
+            workers.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Built variants of {built} image(s) in {time.perf_counter() - started:.1f}s'
+            + (f'; {missing} missing' if missing else '')
+        ))
+        if failed:
+            raise CommandError(f'{failed} image(s) failed; run again to retry them')
+
+    def start_workers(self, count):
+        return ProcessPoolExecutor(max_workers=count, mp_context=multiprocessing.get_context('spawn'))
@@ -1,19 +1,41 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from config.metrics import TimedSerializerMixin
 from .models import Property, PropertyImage
+from .variants import is_current
 
 class PropertyImageSerializer(serializers.ModelSerializer):
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = PropertyImage
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'variants')
+
+    def get_variants(self, obj) -> dict:
+        """{'thumb'|'card'|'full': {'width', 'height', 'webp', 'jpg'}}; empty until built, so use image meanwhile"""
+        if not is_current(obj):
+            return {}
+        return {
+            name: {key: self._url(value) if isinstance(value, str) else value for key, value in entry.items()}
+            for name, entry in obj.variants.items() if isinstance(entry, dict)
+        }
+
+    def _url(self, path):
+        # Absolute, like the image field's own URL
+        url = default_storage.url(path)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     images = PropertyImageSerializer(many=True, required=False, read_only=True)
+    # Annotated by the queryset (see PropertyViewSet.get_queryset)
+    is_favorite = serializers.BooleanField(read_only=True, default=False)
 
     class Meta:
         model = Property
         fields = (
             'id', 'owner', 'title', 'description', 'city', 'address',
             'price_per_night', 'max_guests', 'property_type', 'amenities',
-            'image_url', 'is_available', 'rating', 'images', 'created_at', 'updated_at'
+            'image_url', 'is_available', 'rating', 'images', 'is_favorite', 'created_at', 'updated_at'
         )
         read_only_fields = ('owner',) 
\ No newline at end of file
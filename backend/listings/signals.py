@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import PropertyImage
+from .variants import build_later, delete_files, is_current, variant_paths
+
+@receiver(post_save, sender=PropertyImage)
+def queue_image_variants(sender, instance, raw=False, **kwargs):
+    """Resize new uploads in the background"""
+    if not raw and instance.image and not is_current(instance):
+        build_later(instance)
+
+@receiver(post_delete, sender=PropertyImage)
+def delete_image_variants(sender, instance, **kwargs):
+    paths = variant_paths(instance.variants)
+    if paths:
+        transaction.on_commit(lambda: delete_files(paths))
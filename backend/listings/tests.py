@@ -0,0 +1,49 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from PIL import Image
+
+from users.models import Favorite
+from .models import PropertyImage
+
+@pytest.mark.django_db
+def test_property_list_within_budget(api_client, user, make_properties, page_rows):
+    properties = make_properties(user, page_rows)
+    Favorite.objects.create(user=user, property=properties[0])
+
+    response = api_client.get(reverse('property-list'))
+
+    assert response.status_code == 200
+    assert len(response.data['results']) == page_rows
+    assert sum(item['is_favorite'] for item in response.data['results']) == 1
+
+@pytest.mark.django_db
+def test_property_list_anonymous_within_budget(client, user, make_properties, page_rows):
+    make_properties(user, page_rows)
+
+    response = client.get(reverse('property-list'))
+
+    assert response.status_code == 200
+    assert len(response.json()['results']) == page_rows
+
+@pytest.mark.django_db
+def test_build_image_variants_continues_past_unreadable_images(settings, tmp_path, user, make_properties):
+    settings.MEDIA_ROOT = tmp_path
+    buffer = io.BytesIO()
+    Image.new('RGB', (400, 300), 'navy').save(buffer, 'JPEG')
+    (tmp_path / 'property_images').mkdir()
+    make_properties(user, 1)
+    good, corrupt = PropertyImage.objects.order_by('image')
+    (tmp_path / good.image.name).write_bytes(buffer.getvalue())
+    (tmp_path / corrupt.image.name).write_bytes(b'not an image')
+
+    with pytest.raises(CommandError, match='1 image'):
+        call_command('build_image_variants', workers=1, stdout=io.StringIO(), stderr=io.StringIO())
+
+    good.refresh_from_db()
+    corrupt.refresh_from_db()
+    assert good.variants['thumb']['width'] == 320
+    assert corrupt.variants == {}
@@ -0,0 +1,150 @@
+"""
+Responsive variants of uploaded property photos.
+
+Saving a PropertyImage with a new file queues it (once the transaction
+commits) on a per-process dispatcher thread, which hands the upload to a
+small pool of spawned worker processes. They encode every size in
+listings.imaging.SIZES as WebP and JPEG; the dispatcher writes the files
+under <upload dir>/variants/ and records them in PropertyImage.variants,
+then deletes the variants of the file it replaced.
+
+Variant names include a hash of the source, so a URL never changes content
+and media can serve them as immutable. Until a job finishes (or if one is
+lost to a restart) the serializer falls back to the original;
+`manage.py build_image_variants` fills in anything missing.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+from .models import PropertyImage
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pools = None
+
+def _get_pools():
+    """(dispatcher thread, worker processes) for this process; recreated after a fork"""
+    global _pools
+    with _lock:
+        if _pools is None or _pools[0] != os.getpid():
+            workers = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_VARIANTS['WORKERS'],
+                # Not fork: the parent is a threaded server process
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-variants')
+            _pools = (os.getpid(), dispatcher, workers)
+        return _pools[1], _pools[2]
+
+def _discard_workers():
+    global _pools
+    with _lock:
+        if _pools is not None and _pools[0] == os.getpid():
+            _pools[2].shutdown(wait=False)
+            _pools = (_pools[0], _pools[1], ProcessPoolExecutor(
+                max_workers=settings.IMAGE_VARIANTS['WORKERS'],
+                mp_context=multiprocessing.get_context('spawn'),
+            ))
+
+def is_current(image):
+    return bool(image.image) and image.variants.get('source') == image.image.name
+
+def variant_paths(variants):
+    """Storage paths of every variant file recorded in `variants`"""
+    return [
+        value
+        for entry in variants.values() if isinstance(entry, dict)
+        for value in entry.values() if isinstance(value, str)
+    ]
+
+def store(image_id, source_name, source, rendered):
+    """Write the encoded variants of `source` and record them, unless the image changed meanwhile"""
+    from .imaging import FORMATS
+
+    digest = hashlib.sha256(source).hexdigest()
+    directory = os.path.join(os.path.dirname(source_name), 'variants')
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    variants = {'source': source_name}
+    for name, entry in rendered.items():
+        variants[name] = {'width': entry['width'], 'height': entry['height']}
+        for extension in FORMATS:
+            path = os.path.join(directory, f'{stem}-{digest[:12]}-{name}.{extension}')
+            if not default_storage.exists(path):
+                path = default_storage.save(path, ContentFile(entry[extension]))
+            variants[name][extension] = path
+
+    with transaction.atomic():
+        previous = (
+            PropertyImage.objects.select_for_update()
+            .filter(pk=image_id, image=source_name)
+            .values_list('variants', flat=True)
+            .first()
+        )
+        if previous is None:
+            # Deleted or replaced while rendering; its own job covers the new file
+            stale = variant_paths(variants)
+        else:
+            PropertyImage.objects.filter(pk=image_id).update(variants=variants)
+            stale = set(variant_paths(previous)) - set(variant_paths(variants))
+    delete_files(stale)
+    return variants
+
+def delete_files(paths):
+    for path in paths:
+        try:
+            default_storage.delete(path)
+        except OSError:
+            logger.warning(f"Could not delete image variant {path}")
+
+def read_source(source_name):
+    """The uploaded file's bytes, or None if it is gone"""
+    try:
+        with default_storage.open(source_name, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def build(image_id, source_name):
+    """Render and store the variants of one image; returns the variants or None if it is gone"""
+    source = read_source(source_name)
+    if source is None:
+        return None
+    # Pillow is only imported once there is work (the workers import it themselves)
+    from .imaging import render_variants
+
+    try:
+        rendered = _get_pools()[1].submit(render_variants, source).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory on a huge upload); start a fresh pool for later jobs
+        _discard_workers()
+        raise
+    return store(image_id, source_name, source, rendered)
+
+def _build_in_background(image_id, source_name):
+    try:
+        build(image_id, source_name)
+    except Exception:
+        logger.exception(f"Building variants of property image {image_id} failed")
+    finally:
+        # This thread is outside the request cycle that normally does this
+        close_old_connections()
+
+def build_later(image):
+    """Queue the variants of `image` for after the current transaction commits"""
+    image_id, source_name = image.pk, image.image.name
+
+    def submit():
+        dispatcher, _ = _get_pools()
+        dispatcher.submit(_build_in_background, image_id, source_name)
+    transaction.on_commit(submit)
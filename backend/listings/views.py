@@ -2,6 +2,8 @@ from rest_framework import viewsets, permissions
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters import rest_framework as filters
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from users.models import Favorite
 from .models import Property
 from .serializers import PropertySerializer
 
@@ -30,6 +32,20 @@ class PropertyViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'description', 'city', 'address']
     ordering_fields = ['price_per_night', 'created_at', 'rating', 'title']
     ordering = ['-rating']  # Default ordering by rating
+    # Served from a read replica when one is configured (see config/routers.py)
+    replica_read_actions = ('list', 'retrieve')
+    # Queries per request regardless of page size (see config/query_budget.py)
+    query_budget = {'list': 3, 'retrieve': 2}
+
+    def get_queryset(self):
+        queryset = super().get_queryset().prefetch_related('images')
+        user = self.request.user
+        if user.is_authenticated:
+            # One EXISTS subquery instead of a favorites/<id>/check/ call per card
+            return queryset.annotate(
+                is_favorite=Exists(Favorite.objects.filter(user=user, property=OuterRef('pk')))
+            )
+        return queryset.annotate(is_favorite=Value(False, output_field=BooleanField()))
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user) 
\ No newline at end of file
@@ -1,21 +1,35 @@
 from django.contrib import admin
-from .models import Notification, BookingStatusHistory
+from .models import Notification, BookingStatusHistory, NotificationArchive, QueuedEmail
+from .messages import render_notification
+from config.stats import EstimatedCountPaginator
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['title', 'user_email', 'notification_type', 'is_read', 'created_at']
+    list_display = ['notification_title', 'user_email', 'notification_type', 'is_read', 'created_at']
     list_filter = ['notification_type', 'is_read', 'created_at']
-    search_fields = ['title', 'message', 'user__email', 'user__first_name', 'user__last_name']
-    readonly_fields = ['created_at']
+    # title/message are blank on new rows; their text comes from the type and params
+    search_fields = ['notification_type', 'params', 'user__email', 'user__first_name', 'user__last_name']
+    readonly_fields = ['created_at', 'rendered_message']
     list_per_page = 25
+    list_select_related = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     def user_email(self, obj):
         return obj.user.email if obj.user else 'N/A'
     user_email.short_description = 'User Email'
     
+    def notification_title(self, obj):
+        return render_notification(obj)[0]
+    notification_title.short_description = 'Title'
+    
+    def rendered_message(self, obj):
+        return render_notification(obj)[1]
+    rendered_message.short_description = 'Message'
+    
     fieldsets = (
         ('Notification Info', {
-            'fields': ('user', 'booking', 'notification_type', 'title', 'message')
+            'fields': ('user', 'booking', 'notification_type', 'params', 'rendered_message')
         }),
         ('Status', {
             'fields': ('is_read',)
@@ -33,6 +47,10 @@ class BookingStatusHistoryAdmin(admin.ModelAdmin):
     search_fields = ['booking__id', 'reason', 'changed_by__email']
     readonly_fields = ['created_at']
     list_per_page = 25
+    # Booking.__str__ reads the property and the user
+    list_select_related = ['booking__property', 'booking__user', 'changed_by']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Status Change', {
@@ -47,3 +65,28 @@ class BookingStatusHistoryAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ['title', 'user', 'notification_type', 'is_read', 'created_at', 'archived_at']
+    list_filter = ['notification_type', 'is_read']
+    search_fields = ['notification_type', 'params', 'user__email']
+    readonly_fields = [f.name for f in NotificationArchive._meta.fields]
+    list_per_page = 25
+    list_select_related = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to_email', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['to_email', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    list_per_page = 25
+    
+    def get_exclude(self, request, obj=None):
+        # One-time codes are never shown, even before the mailer blanks them
+        if obj is not None and obj.kind == 'otp':
+            return ['body']
+        return super().get_exclude(request, obj)
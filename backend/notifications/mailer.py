@@ -0,0 +1,181 @@
+"""
+Outbound mail queue.
+
+Request handlers only insert a QueuedEmail row (inside their own transaction, so
+rolled-back work never sends mail); the send_queued_emails worker drains the
+queue in batches over a single reused SMTP connection.
+
+A batch is claimed in a short transaction (status 'sending', leased for
+EMAIL_QUEUE['CLAIM_SECONDS']) and sent outside it, so a slow SMTP server
+never holds row locks. Rows of a worker that died mid-batch are picked up
+again once their lease runs out. Delivered and failed rows are purged after
+EMAIL_QUEUE['SENT_RETENTION_DAYS'] and ['FAILED_RETENTION_DAYS']; one-time
+code mail has its body blanked as soon as it is sent or fails for good.
+"""
+import logging
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .messages import render_notification
+from .models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+def _queued_email(to_email, subject, body, kind, user):
+    next_attempt_at = timezone.now()
+    if kind == 'notification' and settings.EMAIL_QUEUE['DIGEST']:
+        # Hold notification mail briefly so close-together updates share one digest
+        next_attempt_at += timedelta(seconds=settings.EMAIL_QUEUE['DIGEST_WINDOW_SECONDS'])
+    return QueuedEmail(
+        user=user,
+        kind=kind,
+        to_email=to_email,
+        subject=subject[:255],
+        body=body,
+        next_attempt_at=next_attempt_at,
+    )
+
+def queue_email(to_email, subject, body, *, kind='notification', user=None):
+    """Add a message to the outbox; returns the QueuedEmail or None without a recipient"""
+    if not to_email:
+        return None
+    email = _queued_email(to_email, subject, body, kind, user)
+    email.save()
+    return email
+
+def queue_notification_email(notification):
+    """Queue the email copy of a booking notification"""
+    user = notification.user
+    title, message = render_notification(notification)
+    return queue_email(user.email, title, message, user=user)
+
+def queue_notification_emails(notifications):
+    """Queue the email copies of many booking notifications in one insert"""
+    emails = []
+    for notification in notifications:
+        user = notification.user
+        if user.email:
+            emails.append(_queued_email(user.email, *render_notification(notification), 'notification', user))
+    return QueuedEmail.objects.bulk_create(emails)
+
+def retry_delay(attempts):
+    config = settings.EMAIL_QUEUE
+    return timedelta(seconds=min(config['RETRY_BASE_SECONDS'] * 2 ** (attempts - 1), config['RETRY_MAX_SECONDS']))
+
+def _mark_failed(rows, error):
+    now = timezone.now()
+    for row in rows:
+        row.attempts += 1
+        row.last_error = str(error)[:1000]
+        if row.attempts >= settings.EMAIL_QUEUE['MAX_ATTEMPTS']:
+            row.status = 'failed'
+        else:
+            row.status = 'pending'
+            row.next_attempt_at = now + retry_delay(row.attempts)
+
+def _group_for_delivery(rows):
+    """Yield (rows, EmailMessage) pairs, merging notification mail per recipient when digesting"""
+    digest = settings.EMAIL_QUEUE['DIGEST']
+    singles = [row for row in rows if not digest or row.kind != 'notification']
+    digestible = sorted(
+        (row for row in rows if digest and row.kind == 'notification'),
+        key=lambda row: (row.to_email, row.id),
+    )
+    for row in singles:
+        yield [row], EmailMessage(row.subject, row.body, settings.DEFAULT_FROM_EMAIL, [row.to_email])
+    for to_email, group in groupby(digestible, key=lambda row: row.to_email):
+        group = list(group)
+        if len(group) == 1:
+            subject, body = group[0].subject, group[0].body
+        else:
+            subject = f'You have {len(group)} booking updates'
+            body = '\n\n---\n\n'.join(f'{row.subject}\n\n{row.body}' for row in group)
+        yield group, EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [to_email])
+
+def claim_due(batch_size):
+    """Lease up to batch_size due rows to this worker and return them"""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            QueuedEmail.objects.filter(status__in=('pending', 'sending'), next_attempt_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if rows:
+            QueuedEmail.objects.filter(id__in=[row.id for row in rows]).update(
+                status='sending',
+                next_attempt_at=now + timedelta(seconds=settings.EMAIL_QUEUE['CLAIM_SECONDS']),
+            )
+    return rows
+
+def deliver_pending(batch_size=None, connection=None):
+    """
+    Send one batch of due mail. Returns (sent, failed) counts.
+
+    Rows are claimed with SKIP LOCKED so several workers can drain the queue
+    side by side; no transaction is open while talking to the SMTP server.
+    Each failed message is rescheduled with exponential backoff until
+    EMAIL_QUEUE['MAX_ATTEMPTS'] is reached.
+    """
+    batch_size = batch_size or settings.EMAIL_QUEUE['BATCH_SIZE']
+    sent = failed = 0
+
+    rows = claim_due(batch_size)
+    if not rows:
+        return sent, failed
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning(f"Email connection failed: {str(e)}")
+        _mark_failed(rows, e)
+        failed = len(rows)
+    else:
+        try:
+            for group, message in _group_for_delivery(rows):
+                try:
+                    connection.send_messages([message])
+                except Exception as e:
+                    logger.warning(f"Email to {message.to[0]} failed: {str(e)}")
+                    _mark_failed(group, e)
+                    failed += len(group)
+                else:
+                    now = timezone.now()
+                    for row in group:
+                        row.attempts += 1
+                        row.status = 'sent'
+                        row.sent_at = now
+                        row.last_error = ''
+                    sent += len(group)
+        finally:
+            connection.close()
+
+    for row in rows:
+        if row.kind == 'otp' and row.status in ('sent', 'failed'):
+            # The code only needs to exist until it has been sent
+            row.body = ''
+    QueuedEmail.objects.bulk_update(
+        rows, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body']
+    )
+    return sent, failed
+
+def purge_delivered(batch_size=None):
+    """Delete sent and failed rows past their retention, in batches; returns the number deleted"""
+    config = settings.EMAIL_QUEUE
+    batch_size = batch_size or config['BATCH_SIZE']
+    now = timezone.now()
+    deleted = 0
+    for status, days in (('sent', config['SENT_RETENTION_DAYS']), ('failed', config['FAILED_RETENTION_DAYS'])):
+        expired = QueuedEmail.objects.filter(status=status, created_at__lt=now - timedelta(days=days))
+        while True:
+            ids = list(expired.order_by('created_at').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += QueuedEmail.objects.filter(id__in=ids).delete()[0]
+    return deleted
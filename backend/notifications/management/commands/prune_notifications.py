@@ -0,0 +1,74 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications.models import Notification, NotificationArchive
+
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'booking_id', 'notification_type', 'params',
+    'title', 'message', 'is_read', 'created_at',
+)
+
+class Command(BaseCommand):
+    help = 'Archive or purge old notifications in small batches (safe to interrupt and re-run)'
+
+    def add_arguments(self, parser):
+        retention = settings.NOTIFICATION_RETENTION
+        parser.add_argument('--mode', choices=['archive', 'purge'], default=retention['MODE'])
+        parser.add_argument('--read-days', type=int, default=retention['READ_DAYS'])
+        parser.add_argument('--unread-days', type=int, default=retention['UNREAD_DAYS'])
+        parser.add_argument('--batch-size', type=int, default=retention['BATCH_SIZE'])
+        parser.add_argument('--max-batches', type=int, default=0, help='Stop after N batches (0 = until done)')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        now = timezone.now()
+        expired = Q(is_read=True, created_at__lt=now - timedelta(days=options['read_days']))
+        if options['unread_days'] > 0:
+            expired |= Q(created_at__lt=now - timedelta(days=options['unread_days']))
+        candidates = Notification.objects.filter(expired).order_by('id')
+
+        if options['dry_run']:
+            self.stdout.write(f'{candidates.count()} notification(s) would be {options["mode"]}d')
+            return
+
+        # Every batch commits on its own, so an interrupted run loses nothing and
+        # the next run simply continues with whatever is still eligible.
+        last_id = 0
+        batches = moved = 0
+        while not options['max_batches'] or batches < options['max_batches']:
+            with transaction.atomic():
+                rows = list(
+                    candidates.filter(id__gt=last_id)
+                    .select_for_update(skip_locked=True)
+                    .values(*ARCHIVE_FIELDS)[:options['batch_size']]
+                )
+                if not rows:
+                    break
+                ids = [row['id'] for row in rows]
+                if options['mode'] == 'archive':
+                    NotificationArchive.objects.bulk_create(
+                        [NotificationArchive(**row) for row in rows],
+                        ignore_conflicts=True,
+                    )
+                Notification.objects.filter(id__in=ids).delete()
+
+            last_id = ids[-1]
+            batches += 1
+            moved += len(ids)
+            self.stdout.write(f'Batch {batches}: {options["mode"]}d {len(ids)} notification(s) up to id {last_id}')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{moved} notification(s) {options["mode"]}d in {batches} batch(es)')
+        )
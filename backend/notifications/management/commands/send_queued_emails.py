@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.mailer import deliver_pending, purge_delivered
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued notification and OTP emails in batches, then purge delivered mail past its retention. '
+        'For local testing run a debugging SMTP server (e.g. `python -m aiosmtpd -n -l localhost:1025`) '
+        'and set EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=False.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_QUEUE['BATCH_SIZE'])
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue instead of exiting once it is drained')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to wait when the queue is empty (with --loop)')
+        parser.add_argument('--purge-interval', type=float, default=3600.0, help='Seconds between retention purges (with --loop)')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        last_purge = None
+        while True:
+            sent, failed = deliver_pending(batch_size=options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+                continue
+            # Purge only while the queue is idle, so it never delays delivery
+            if last_purge is None or time.monotonic() - last_purge >= options['purge_interval']:
+                purged = purge_delivered(batch_size=options['batch_size'])
+                last_purge = time.monotonic()
+                if purged:
+                    self.stdout.write(f'Purged {purged} delivered email(s)')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {total_sent} sent, {total_failed} failed'))
@@ -0,0 +1,92 @@
+"""
+Notification wording.
+
+Notifications are stored as a type plus a small params dict; the text below is
+only rendered when a notification is read, so wording can change at any time
+without touching stored rows.
+"""
+from functools import lru_cache
+from string import Template
+
+TEMPLATES = {
+    'booking_created': (
+        'Booking Created',
+        'Your booking for ${property} has been created and is pending confirmation. Booking ID: #${booking_id}',
+    ),
+    'booking_confirmed': (
+        '✅ Booking Confirmed!',
+        '🎉 Congratulations! Your booking for ${property} has been confirmed.\n\n'
+        '📋 Booking Details:\n• Booking ID: #${booking_id}\n• Check-in: ${check_in}\n'
+        '• Check-out: ${check_out}\n• Guests: ${guests}\n• Total: PKR ${total}\n\n'
+        '📄 Your detailed receipt is ready! View it in your dashboard.',
+    ),
+    'booking_cancelled': (
+        '❌ Booking Cancelled',
+        'Your booking for ${property} has been cancelled. If you cancelled this booking, '
+        'refund will be processed with 2% deduction. Booking ID: #${booking_id}',
+    ),
+    'booking_completed': (
+        '🎉 Stay Completed!',
+        'Thank you for staying at ${property}! 🏨\n\n✨ We hope you had a wonderful experience!\n\n'
+        '📋 Booking Summary:\n• Booking ID: #${booking_id}\n• Duration: ${check_in} to ${check_out}\n'
+        '• Total Paid: PKR ${total}\n\n⭐ Please consider leaving a review to help other travelers!',
+    ),
+    'booking_refunded': (
+        '💰 Refund Processed',
+        'Your refund for booking #${booking_id} has been processed. Amount: PKR ${refund}. '
+        'Please allow 3-5 business days for the amount to reflect in your account.',
+    ),
+    'booking_pending': (
+        '⏳ Booking Pending',
+        "Your booking for ${property} is pending confirmation. We will notify you once it's confirmed. "
+        'Booking ID: #${booking_id}',
+    ),
+    'booking_status_updated': (
+        'Booking Status Updated',
+        'Your booking status has been updated to ${status}. Booking ID: #${booking_id}',
+    ),
+}
+
+def _compile(title, message):
+    title, message = Template(title), Template(message)
+    return title, message, frozenset(title.get_identifiers() + message.get_identifiers())
+
+# Compiled once at import: template key -> (title, message, names the pair uses)
+_COMPILED = {key: _compile(*pair) for key, pair in TEMPLATES.items()}
+
+def booking_params(notification_type, booking, template=None):
+    """Params for a booking notification, keeping only the values its wording uses"""
+    template = template or notification_type
+    values = {
+        'booking_id': booking.id,
+        'property': booking.property.title,
+        'check_in': booking.check_in,
+        'check_out': booking.check_out,
+        'guests': booking.guests,
+        'total': booking.total_price,
+        'refund': booking.refund_amount or 0,
+        'status': booking.status,
+    }
+    params = {name: str(values[name]) for name in _COMPILED[template][2]}
+    if template != notification_type:
+        params['template'] = template
+    return params
+
+@lru_cache(maxsize=4096)
+def _render(template, items):
+    title, message, _ = _COMPILED[template]
+    params = dict(items)
+    return title.safe_substitute(params), message.safe_substitute(params)
+
+def render(notification_type, params):
+    """Return (title, message) for stored params; repeated params hit the cache"""
+    template = params.get('template', notification_type)
+    if template not in _COMPILED:
+        template = 'booking_status_updated'
+    return _render(template, tuple(sorted((k, v) for k, v in params.items() if k != 'template')))
+
+def render_notification(notification):
+    """Rendered (title, message), falling back to text stored by older rows"""
+    if not notification.params:
+        return notification.title, notification.message
+    return render(notification.notification_type, notification.params)
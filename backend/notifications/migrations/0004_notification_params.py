@@ -0,0 +1,43 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_queued_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='params',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='notificationarchive',
+            name='params',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='title',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='notificationarchive',
+            name='message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='notificationarchive',
+            name='title',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+    ]
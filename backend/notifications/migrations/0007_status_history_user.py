@@ -0,0 +1,40 @@
+# Generated by Django 5.0.7 on 2026-10-19 18:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_booking_user(apps, schema_editor):
+    BookingStatusHistory = apps.get_model('notifications', 'BookingStatusHistory')
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingStatusHistory.objects.using(schema_editor.connection.alias).filter(user__isnull=True).update(
+        user_id=Subquery(Booking.objects.filter(pk=OuterRef('booking_id')).values('user_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_queued_email_claim_retention'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingstatushistory',
+            name='user',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='booking_status_history', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(copy_booking_user, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='bookingstatushistory',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='booking_status_history', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='bookingstatushistory',
+            index=models.Index(fields=['user', '-created_at'], name='status_hist_user_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from bookings.models import Booking
 
 class Notification(models.Model):
@@ -14,22 +15,56 @@ class Notification(models.Model):
         ('cancellation_request', 'Cancellation Request'),
     ]
     
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
-    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
+    # Indexed through the composite index in Meta
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications', db_index=False)
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True, db_index=False)
     notification_type = models.CharField(max_length=30, choices=NOTIFICATION_TYPES)
-    title = models.CharField(max_length=200)
-    message = models.TextField()
+    # Template params rendered by notifications.messages; title/message only hold legacy text
+    params = models.JSONField(default=dict, blank=True)
+    title = models.CharField(max_length=200, blank=True)
+    message = models.TextField(blank=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Serves the per-user inbox, unread counts and mark_all_read
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_created_idx'),
+            # Latest-first inbox and booking timelines
+            models.Index(fields=['user', '-created_at'], name='notif_user_created_idx'),
+            models.Index(fields=['booking', '-created_at'], name='notif_booking_created_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.title} - {self.user.email}"
+        from .messages import render_notification
+        return f"{render_notification(self)[0]} - {self.user.email}"
+
+class NotificationArchive(models.Model):
+    """Cold copy of notifications moved out of the hot table by prune_notifications"""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_notifications')
+    booking_id = models.BigIntegerField(null=True, blank=True)
+    notification_type = models.CharField(max_length=30, choices=Notification.NOTIFICATION_TYPES)
+    params = models.JSONField(default=dict, blank=True)
+    title = models.CharField(max_length=200, blank=True)
+    message = models.TextField(blank=True)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.title} - archived"
 
 class BookingStatusHistory(models.Model):
-    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='status_history')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='status_history', db_index=False)
+    # The booking's guest, copied so the user-wide timeline reads one index
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='booking_status_history', db_index=False,
+    )
     old_status = models.CharField(max_length=20, blank=True)
     new_status = models.CharField(max_length=20)
     changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -40,6 +75,46 @@ class BookingStatusHistory(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['booking', '-created_at'], name='status_hist_booking_idx'),
+            models.Index(fields=['user', '-created_at'], name='status_hist_user_idx'),
+        ]
     
     def __str__(self):
         return f"Booking #{self.booking.id}: {self.old_status} → {self.new_status}"
+
+class QueuedEmail(models.Model):
+    """Outbox row for mail delivered by the send_queued_emails worker"""
+    KIND_CHOICES = [
+        ('notification', 'Notification'),
+        ('otp', 'OTP'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='queued_emails', null=True, blank=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='notification')
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='queued_email_due_idx'),
+            models.Index(fields=['status', 'created_at'], name='queued_email_retention_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
@@ -1,9 +1,13 @@
 from rest_framework import serializers
+from config.metrics import TimedSerializerMixin
 from .models import Notification, BookingStatusHistory
+from .messages import render_notification
 from bookings.serializers import BookingSerializer
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     booking_details = BookingSerializer(source='booking', read_only=True)
+    title = serializers.SerializerMethodField()
+    message = serializers.SerializerMethodField()
     time_ago = serializers.SerializerMethodField()
     
     class Meta:
@@ -14,6 +18,12 @@ class NotificationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'time_ago']
     
+    def get_title(self, obj) -> str:
+        return render_notification(obj)[0]
+    
+    def get_message(self, obj) -> str:
+        return render_notification(obj)[1]
+    
     def get_time_ago(self, obj) -> str:
         from django.utils import timezone
         from datetime import timedelta
@@ -32,7 +42,7 @@ class NotificationSerializer(serializers.ModelSerializer):
         else:
             return "Just now"
 
-class BookingStatusHistorySerializer(serializers.ModelSerializer):
+class BookingStatusHistorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     changed_by_name = serializers.CharField(source='changed_by.get_full_name', read_only=True)
     
     class Meta:
@@ -43,6 +53,24 @@ class BookingStatusHistorySerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
 
+class TimelineStatusChangeSerializer(BookingStatusHistorySerializer):
+    class Meta(BookingStatusHistorySerializer.Meta):
+        fields = BookingStatusHistorySerializer.Meta.fields + ['booking']
+
+class TimelineNotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    title = serializers.SerializerMethodField()
+    message = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Notification
+        fields = ['id', 'booking', 'notification_type', 'title', 'message', 'is_read', 'created_at']
+    
+    def get_title(self, obj) -> str:
+        return render_notification(obj)[0]
+    
+    def get_message(self, obj) -> str:
+        return render_notification(obj)[1]
+
 class BookingStatusUpdateSerializer(serializers.Serializer):
     status = serializers.ChoiceField(
         choices=[
@@ -2,17 +2,17 @@ from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from bookings.models import Booking
 from .models import Notification, BookingStatusHistory
+from .mailer import queue_notification_email, queue_notification_emails
+from .messages import booking_params
 from decimal import Decimal
 
 @receiver(pre_save, sender=Booking)
 def track_booking_status_change(sender, instance, **kwargs):
     """Track booking status changes before saving"""
     if instance.pk:  # Only for existing bookings
-        try:
-            old_booking = Booking.objects.get(pk=instance.pk)
-            instance._old_status = old_booking.status
-        except Booking.DoesNotExist:
-            instance._old_status = None
+        instance._old_status = (
+            Booking.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
     else:
         instance._old_status = None
 
@@ -22,17 +22,18 @@ def create_booking_notification(sender, instance, created, **kwargs):
     
     if created:
         # New booking created
-        Notification.objects.create(
+        notification = Notification.objects.create(
             user=instance.user,
             booking=instance,
             notification_type='booking_pending',
-            title='Booking Created',
-            message=f'Your booking for {instance.property.title} has been created and is pending confirmation. Booking ID: #{instance.id}'
+            params=booking_params('booking_pending', instance, template='booking_created'),
         )
+        queue_notification_email(notification)
         
         # Create status history
         BookingStatusHistory.objects.create(
             booking=instance,
+            user_id=instance.user_id,
             old_status='',
             new_status=instance.status,
             changed_by=instance.user,
@@ -40,63 +41,67 @@ def create_booking_notification(sender, instance, created, **kwargs):
         )
         
     else:
-        # Status changed
+        # Status edited through save() (e.g. the admin change form); workflow
+        # actions go through bookings.transitions and record the change there
         old_status = getattr(instance, '_old_status', None)
         if old_status and old_status != instance.status:
-            
-            # Create notification based on new status
-            notification_data = get_notification_data(instance, old_status, instance.status)
-            
-            Notification.objects.create(
-                user=instance.user,
-                booking=instance,
-                notification_type=notification_data['type'],
-                title=notification_data['title'],
-                message=notification_data['message']
-            )
-            
-            # Create status history
-            BookingStatusHistory.objects.create(
-                booking=instance,
-                old_status=old_status,
-                new_status=instance.status,
-                changed_by=instance.user,  # This should be set by the view
-                reason=f'Status changed from {old_status} to {instance.status}'
+            record_status_change(
+                instance,
+                old_status,
+                changed_by=getattr(instance, '_changed_by', None) or instance.user,
+                reason=f'Status changed from {old_status} to {instance.status}',
             )
 
+def record_status_change(booking, old_status, changed_by, reason='', refund_amount=None, deduction_amount=None):
+    """Write the user notification and the single history row for one status change"""
+    record_status_changes([(booking, old_status, reason, refund_amount, deduction_amount)], changed_by)
+
+def record_status_changes(changes, changed_by):
+    """
+    Bulk version of record_status_change for
+    [(booking, old_status, reason, refund_amount, deduction_amount)]:
+    one insert each for the notifications, their emails and the history rows.
+    """
+    notifications = []
+    history = []
+    for booking, old_status, reason, refund_amount, deduction_amount in changes:
+        notification_data = get_notification_data(booking, old_status, booking.status)
+        notifications.append(Notification(
+            user=booking.user,
+            booking=booking,
+            notification_type=notification_data['type'],
+            params=notification_data['params'],
+        ))
+        history.append(BookingStatusHistory(
+            booking=booking,
+            user_id=booking.user_id,
+            old_status=old_status,
+            new_status=booking.status,
+            changed_by=changed_by,
+            reason=reason,
+            refund_amount=refund_amount,
+            deduction_amount=deduction_amount,
+        ))
+    
+    Notification.objects.bulk_create(notifications)
+    queue_notification_emails(notifications)
+    BookingStatusHistory.objects.bulk_create(history)
+
 def get_notification_data(booking, old_status, new_status):
-    """Get notification data based on status change"""
+    """Get notification type and template params based on status change"""
     
-    notifications_map = {
-        'confirmed': {
-            'type': 'booking_confirmed',
-            'title': '✅ Booking Confirmed!',
-            'message': f'🎉 Congratulations! Your booking for {booking.property.title} has been confirmed.\n\n📋 Booking Details:\n• Booking ID: #{booking.id}\n• Check-in: {booking.check_in}\n• Check-out: {booking.check_out}\n• Guests: {booking.guests}\n• Total: PKR {booking.total_price}\n\n📄 Your detailed receipt is ready! View it in your dashboard.'
-        },
-        'cancelled': {
-            'type': 'booking_cancelled',
-            'title': '❌ Booking Cancelled',
-            'message': f'Your booking for {booking.property.title} has been cancelled. If you cancelled this booking, refund will be processed with 2% deduction. Booking ID: #{booking.id}'
-        },
-        'completed': {
-            'type': 'booking_completed',
-            'title': '🎉 Stay Completed!',
-            'message': f'Thank you for staying at {booking.property.title}! 🏨\n\n✨ We hope you had a wonderful experience!\n\n📋 Booking Summary:\n• Booking ID: #{booking.id}\n• Duration: {booking.check_in} to {booking.check_out}\n• Total Paid: PKR {booking.total_price}\n\n⭐ Please consider leaving a review to help other travelers!'
-        },
-        'refunded': {
-            'type': 'booking_refunded',
-            'title': '💰 Refund Processed',
-            'message': f'Your refund for booking #{booking.id} has been processed. Amount: PKR {booking.refund_amount or 0}. Please allow 3-5 business days for the amount to reflect in your account.'
-        },
-        'pending': {
-            'type': 'booking_pending',
-            'title': '⏳ Booking Pending',
-            'message': f'Your booking for {booking.property.title} is pending confirmation. We will notify you once it\'s confirmed. Booking ID: #{booking.id}'
-        }
+    notification_types = {
+        'confirmed': 'booking_confirmed',
+        'cancelled': 'booking_cancelled',
+        'completed': 'booking_completed',
+        'refunded': 'booking_refunded',
+        'pending': 'booking_pending',
     }
     
-    return notifications_map.get(new_status, {
+    if new_status in notification_types:
+        notification_type = notification_types[new_status]
+        return {'type': notification_type, 'params': booking_params(notification_type, booking)}
+    return {
         'type': 'booking_pending',
-        'title': 'Booking Status Updated',
-        'message': f'Your booking status has been updated to {new_status}. Booking ID: #{booking.id}'
-    })
+        'params': booking_params('booking_pending', booking, template='booking_status_updated'),
+    }
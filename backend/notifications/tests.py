@@ -0,0 +1,16 @@
+import pytest
+from django.urls import reverse
+
+from .models import Notification
+
+@pytest.mark.django_db
+def test_notification_list_within_budget(api_client, user, make_properties, make_bookings, page_rows):
+    # Each new booking notifies its guest
+    make_bookings(user, make_properties(user, page_rows))
+    assert Notification.objects.filter(user=user, booking__isnull=False).count() == page_rows
+
+    response = api_client.get(reverse('notification-list'))
+
+    assert response.status_code == 200
+    assert len(response.data['results']) == page_rows
+    assert all(item['booking_details'] for item in response.data['results'])
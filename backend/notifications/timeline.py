@@ -0,0 +1,64 @@
+"""
+Booking timeline: status history and notifications merged newest first.
+
+Pages are addressed with an opaque keyset cursor (created_at, kind, id) rather
+than an offset, so every page costs two index range scans of `limit + 1` rows
+no matter how long the timeline has grown.
+"""
+import base64
+import heapq
+from itertools import islice
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# Tie-break between sources when two entries share a timestamp
+KIND_RANK = {'status_change': 1, 'notification': 0}
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at, kind, pk):
+    raw = f'{created_at.isoformat()}|{kind}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        created_at, kind, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        if created_at is None or kind not in KIND_RANK:
+            raise ValueError(cursor)
+        return created_at, kind, int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e))
+
+def _after(kind, cursor):
+    """Filter for the rows of `kind` that sort strictly after the cursor"""
+    created_at, cursor_kind, pk = cursor
+    if KIND_RANK[kind] < KIND_RANK[cursor_kind]:
+        return Q(created_at__lte=created_at)
+    if KIND_RANK[kind] > KIND_RANK[cursor_kind]:
+        return Q(created_at__lt=created_at)
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+
+def timeline_page(sources, cursor=None, limit=20):
+    """
+    Merge `sources` ({kind: queryset}) into one page.
+
+    Returns ([(kind, obj), ...], next_cursor or None).
+    """
+    position = decode_cursor(cursor) if cursor else None
+    streams = []
+    for kind, queryset in sources.items():
+        if position:
+            queryset = queryset.filter(_after(kind, position))
+        rows = queryset.order_by('-created_at', '-pk')[:limit + 1]
+        streams.append([(row.created_at, KIND_RANK[kind], row.pk, kind, row) for row in rows])
+
+    merged = list(islice(heapq.merge(*streams, reverse=True), limit + 1))
+    page = [(kind, row) for _, _, _, kind, row in merged[:limit]]
+    next_cursor = None
+    if len(merged) > limit:
+        created_at, _, pk, kind, _ = merged[limit - 1]
+        next_cursor = encode_cursor(created_at, kind, pk)
+    return page, next_cursor
@@ -3,24 +3,38 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.shortcuts import get_object_or_404
-from decimal import Decimal
+from rest_framework.utils.urls import replace_query_param
+import uuid
 from django.utils import timezone
 
 from .models import Notification, BookingStatusHistory
 from .serializers import (
     NotificationSerializer, 
     BookingStatusHistorySerializer,
+    TimelineStatusChangeSerializer,
+    TimelineNotificationSerializer,
     BookingStatusUpdateSerializer,
     BookingCancellationSerializer
 )
 from bookings.models import Booking
+from bookings.transitions import transition, InvalidTransition
+from .timeline import timeline_page, InvalidCursor
 
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    # Served from a read replica when one is configured (see config/routers.py)
+    replica_read_actions = ('list', 'unread_count')
+    # Queries per request regardless of page size (see config/query_budget.py)
+    query_budget = {'list': 3, 'unread_count': 1}
     
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        # booking_details nests the booking's property and its images
+        return (
+            Notification.objects.filter(user=self.request.user)
+            .select_related('booking__property')
+            .prefetch_related('booking__property__images')
+        )
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
@@ -54,6 +68,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
 class BookingStatusViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = BookingStatusUpdateSerializer
+    # Queries per request regardless of page size (see config/query_budget.py)
+    query_budget = {'status_history': 2, 'timeline': 3, 'user_timeline': 2}
     
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def update_status(self, request, pk=None):
@@ -66,18 +82,18 @@ class BookingStatusViewSet(viewsets.ViewSet):
             new_status = serializer.validated_data['status']
             reason = serializer.validated_data.get('reason', '')
             
-            # Update booking status
-            booking.status = new_status
-            booking.save()
-            
-            # Create status history
-            BookingStatusHistory.objects.create(
-                booking=booking,
-                old_status=old_status,
-                new_status=new_status,
-                changed_by=request.user,
-                reason=reason or f'Status updated by admin from {old_status} to {new_status}'
-            )
+            try:
+                transition(
+                    booking, new_status, actor=request.user,
+                    # Admin cancellations are refunded in full
+                    fee_policy='admin' if new_status == 'cancelled' else None,
+                    reason=reason or f'Status updated by admin from {old_status} to {new_status}',
+                )
+            except InvalidTransition as e:
+                return Response(
+                    {'error': f'Cannot change booking status from {e.current_status} to {new_status}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
             return Response({
                 'status': 'success',
@@ -92,44 +108,23 @@ class BookingStatusViewSet(viewsets.ViewSet):
     def cancel_booking(self, request, pk=None):
         """User can cancel their own booking"""
         booking = get_object_or_404(Booking, pk=pk, user=request.user)
-        
-        # Check if booking can be cancelled
-        if booking.status in ['cancelled', 'completed', 'refunded']:
-            return Response(
-                {'error': f'Cannot cancel booking with status: {booking.status}'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         serializer = BookingCancellationSerializer(data=request.data)
         
         if serializer.is_valid():
-            reason = serializer.validated_data.get('reason', 'Cancelled by user')
+            reason = serializer.validated_data.get('reason') or 'Cancelled by user'
             request_refund = serializer.validated_data.get('request_refund', True)
             
-            old_status = booking.status
-            booking.status = 'cancelled'
-            
-            # Calculate refund with 2% deduction
-            if request_refund:
-                deduction_percentage = Decimal('0.02')  # 2%
-                deduction_amount = booking.total_price * deduction_percentage
-                refund_amount = booking.total_price - deduction_amount
-                
-                booking.refund_amount = refund_amount
-                booking.cancellation_fee = deduction_amount
-            
-            booking.save()
-            
-            # Create status history
-            BookingStatusHistory.objects.create(
-                booking=booking,
-                old_status=old_status,
-                new_status='cancelled',
-                changed_by=request.user,
-                reason=reason,
-                refund_amount=booking.refund_amount,
-                deduction_amount=booking.cancellation_fee
-            )
+            # Refund with 2% deduction when requested
+            try:
+                transition(
+                    booking, 'cancelled', actor=request.user, reason=reason,
+                    fee_policy='user' if request_refund else None,
+                )
+            except InvalidTransition as e:
+                return Response(
+                    {'error': f'Cannot cancel booking with status: {e.current_status}'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
             response_data = {
                 'status': 'success',
@@ -162,11 +157,76 @@ class BookingStatusViewSet(viewsets.ViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        history = BookingStatusHistory.objects.filter(booking=booking)
+        history = BookingStatusHistory.objects.filter(booking=booking).select_related('changed_by')
         serializer = BookingStatusHistorySerializer(history, many=True)
         
         return Response({
             'booking_id': booking.id,
             'current_status': booking.status,
             'history': serializer.data
-        })
\ No newline at end of file
+        })
+    
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Status changes and notifications for one booking, newest first"""
+        booking = get_object_or_404(Booking.objects.only('id', 'user_id'), pk=pk)
+        
+        if not request.user.is_staff and booking.user_id != request.user.id:
+            return Response(
+                {'error': 'Permission denied'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return self._timeline_response(
+            request,
+            BookingStatusHistory.objects.filter(booking_id=booking.id),
+            Notification.objects.filter(booking_id=booking.id),
+        )
+    
+    @action(detail=False, methods=['get'], url_path='user-timeline')
+    def user_timeline(self, request):
+        """Timeline across all of the user's bookings (staff may pass ?user=<id>)"""
+        user_id = request.user.id
+        if request.user.is_staff and request.query_params.get('user'):
+            try:
+                user_id = uuid.UUID(request.query_params['user'])
+            except ValueError:
+                return Response({'error': 'Invalid user id'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return self._timeline_response(
+            request,
+            BookingStatusHistory.objects.filter(user_id=user_id),
+            Notification.objects.filter(user_id=user_id, booking__isnull=False),
+        )
+    
+    def _timeline_response(self, request, history, notifications):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            limit = 20
+        
+        try:
+            page, next_cursor = timeline_page(
+                {
+                    'status_change': history.select_related('changed_by'),
+                    'notification': notifications,
+                },
+                cursor=request.query_params.get('cursor'),
+                limit=limit,
+            )
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = []
+        for kind, obj in page:
+            if kind == 'status_change':
+                data = TimelineStatusChangeSerializer(obj).data
+            else:
+                data = TimelineNotificationSerializer(obj).data
+            results.append({'kind': kind, **data})
+        
+        next_url = None
+        if next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+        
+        return Response({'next': next_url, 'results': results})
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, EmailOTP
+from .models import User, EmailOTP, UserImportJob
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -22,5 +22,14 @@ class UserAdmin(BaseUserAdmin):
 
 @admin.register(EmailOTP)
 class EmailOTPAdmin(admin.ModelAdmin):
-    list_display = ('user', 'code', 'created_at', 'expires_at', 'used')
-    list_filter = ('used',) 
\ No newline at end of file
+    list_display = ('user', 'created_at', 'expires_at', 'used')
+    list_filter = ('used',) 
+
+@admin.register(UserImportJob)
+class UserImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'format', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    # The uploaded file may hold passwords
+    exclude = ('data',)
+    readonly_fields = ('created_by', 'format', 'activate', 'status', 'summary', 'error', 'started_at', 'finished_at')
+
@@ -0,0 +1,137 @@
+"""
+JWT authentication that does not query the users table on every request.
+
+request.user is built from the signed token claims, or from a small
+process-local cache backed by the shared cache, and only the fields needed
+for authentication and permission checks are populated. The remaining fields
+are deferred and loaded from the database the first time a view reads one.
+
+The shared entry is rewritten whenever the user row changes (see
+users.signals), so deactivation or staff changes reach every worker within
+AUTH_USER_CACHE['LOCAL_TTL_SECONDS'].
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from config.cache import auth_cache as cache
+
+from .models import User
+from .revocation import is_revoked
+from .tokens import CLAIMS_ISSUED_AT, USER_CLAIMS
+
+def _cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+class _LocalCache:
+    """Tiny thread-safe LRU with a fixed TTL"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        config = settings.AUTH_USER_CACHE
+        with self._lock:
+            self._entries[key] = (time.monotonic() + config['LOCAL_TTL_SECONDS'], value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > config['LOCAL_MAX_ENTRIES']:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+_local = _LocalCache()
+
+def user_state(user):
+    return {claim: getattr(user, claim) for claim in USER_CLAIMS}
+
+def store_user_state(user_id, state):
+    """Write-through used on login and whenever the user row changes"""
+    key = _cache_key(user_id)
+    _local.set(key, state)
+    cache.set(key, state, settings.AUTH_USER_CACHE['SHARED_TTL_SECONDS'])
+
+def forget_user(user_id):
+    key = _cache_key(user_id)
+    _local.delete(key)
+    cache.delete(key)
+
+def _claims_state(validated_token):
+    """State from the token itself, if it carries the claims and they were read recently"""
+    if any(claim not in validated_token for claim in (*USER_CLAIMS, CLAIMS_ISSUED_AT)):
+        return None
+    # Stamped when the claims were read from the user row (login or refresh),
+    # not when the token was minted
+    if time.time() - validated_token[CLAIMS_ISSUED_AT] > settings.AUTH_USER_CACHE['CLAIMS_TRUST_SECONDS']:
+        return None
+    return {claim: validated_token[claim] for claim in USER_CLAIMS}
+
+def get_user_state(user_id, validated_token):
+    key = _cache_key(user_id)
+    state = _local.get(key)
+    if state is not None:
+        return state
+
+    state = cache.get(key)
+    if state is None:
+        state = _claims_state(validated_token)
+        if state is None:
+            user = User.objects.filter(pk=user_id).only(*USER_CLAIMS).first()
+            if user is None:
+                return None
+            state = user_state(user)
+            cache.set(key, state, settings.AUTH_USER_CACHE['SHARED_TTL_SECONDS'])
+    _local.set(key, state)
+    return state
+
+def claims_user(user_id, state):
+    """A User instance with only the authentication fields loaded"""
+    values = {'id': uuid.UUID(str(user_id)), **state}
+    field_names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    return User.from_db(
+        router.db_for_read(User),
+        field_names,
+        [values[name] for name in field_names],
+    )
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_revoked(validated_token[api_settings.JTI_CLAIM]):
+            raise InvalidToken(_('Token is revoked'))
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        state = get_user_state(user_id, validated_token)
+        if state is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not state['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return claims_user(user_id, state)
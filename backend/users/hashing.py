@@ -0,0 +1,71 @@
+"""
+Password hashing off the request thread.
+
+Hashes run in a small per-process thread pool (PBKDF2, bcrypt, argon2 and
+scrypt all release the GIL while they work), so no more than
+PASSWORD_HASHING['WORKERS'] hashes burn CPU at once in a process however many
+sign-in requests arrive. Callers beyond WORKERS + MAX_PENDING wait up to
+WAIT_SECONDS and then get a 503 instead of queueing without bound.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework.exceptions import APIException
+
+class HashingBusy(APIException):
+    status_code = 503
+    default_detail = 'Too many sign-in requests right now. Please try again shortly.'
+    default_code = 'hashing_busy'
+
+_lock = threading.Lock()
+_pool = None
+
+def _get_pool():
+    """(executor, slots) for this process; recreated after a fork"""
+    global _pool
+    with _lock:
+        if _pool is None or _pool[0] != os.getpid():
+            config = settings.PASSWORD_HASHING
+            executor = ThreadPoolExecutor(max_workers=config['WORKERS'], thread_name_prefix='password-hash')
+            slots = threading.BoundedSemaphore(config['WORKERS'] + config['MAX_PENDING'])
+            _pool = (os.getpid(), executor, slots)
+        return _pool[1], _pool[2]
+
+def _run(func, *args):
+    executor, slots = _get_pool()
+    if not slots.acquire(timeout=settings.PASSWORD_HASHING['WAIT_SECONDS']):
+        raise HashingBusy()
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
+
+def make_password(raw_password):
+    return _run(hashers.make_password, raw_password)
+
+def set_password(user, raw_password):
+    """Like user.set_password(), without saving"""
+    user.password = make_password(raw_password)
+    user._password = raw_password
+
+def _must_update(encoded):
+    preferred = hashers.get_hasher('default')
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+def verify_password(user, raw_password):
+    """
+    Like user.check_password(): on success the stored hash is upgraded if
+    PASSWORD_HASHERS now prefers a different hasher or a higher work factor.
+    """
+    valid = _run(hashers.check_password, raw_password, user.password)
+    if valid and _must_update(user.password):
+        set_password(user, raw_password)
+        user.save(update_fields=['password'])
+    return valid
@@ -0,0 +1,200 @@
+"""
+Bulk user import.
+
+Rows are streamed from CSV or JSON Lines and inserted in chunks with
+bulk_create. Plain passwords are hashed across a process pool (every hash is
+pure CPU at the full PBKDF2 cost), while a `password_hash` column produced by
+another system is stored as is if PASSWORD_HASHERS recognises it. Emails
+already in the database are skipped with one `email IN (...)` query per
+chunk, and repeats within the file with an in-memory set.
+
+Uploads through the API are not imported in the request: they are stored as
+a UserImportJob and picked up by `manage.py run_user_imports`, so a large
+file never runs into the server's request timeout.
+"""
+import csv
+import io
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import User, UserImportJob
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'jsonl')
+MAX_REPORTED_ERRORS = 50
+# Columns read from a row; JSON Lines rows may hold any JSON type in them
+TEXT_FIELDS = ('email', 'first_name', 'last_name', 'password', 'password_hash')
+
+def read_rows(stream, fmt):
+    """Yield one dict per user from a text stream"""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield {}
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+def guess_format(filename):
+    return 'jsonl' if filename.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+def _prepare(row, line):
+    """(User, raw password or None) for a row, or raise ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError(f'line {line}: expected an object, got {type(row).__name__}')
+    for field in TEXT_FIELDS:
+        value = row.get(field)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f'line {line}: {field} must be a string, got {type(value).__name__}')
+    email = User.objects.normalize_email((row.get('email') or '').strip())
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise ValueError(f'line {line}: invalid email {email!r}')
+
+    user = User(
+        email=email,
+        first_name=(row.get('first_name') or '').strip()[:100],
+        last_name=(row.get('last_name') or '').strip()[:100],
+    )
+    password_hash = (row.get('password_hash') or '').strip()
+    if password_hash:
+        try:
+            hashers.identify_hasher(password_hash)
+        except ValueError:
+            raise ValueError(f'line {line}: unrecognised password hash for {email}')
+        user.password = password_hash
+        return user, None
+    raw_password = row.get('password') or None
+    if raw_password is None:
+        user.set_unusable_password()
+    return user, raw_password
+
+def import_users(rows, *, activate=True, chunk_size=None, workers=None, dry_run=False, stdout=None):
+    """
+    Create users from an iterable of dicts (email, first_name, last_name and
+    either password or password_hash). Returns a summary dict.
+    """
+    config = settings.USER_IMPORT
+    chunk_size = chunk_size or config['CHUNK_SIZE']
+    workers = workers or config['WORKERS'] or multiprocessing.cpu_count()
+    summary = {'created': 0, 'existing': 0, 'duplicates': 0, 'invalid': 0, 'errors': []}
+    seen = set()
+
+    # Spawn rather than fork: forked children would share the open database
+    # connection and could close it underneath us when they exit. Spawned
+    # workers need django.setup() before make_password can read the settings.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup,
+    ) as pool:
+        numbered = enumerate(rows, start=1)
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                break
+
+            prepared = []
+            for line, row in chunk:
+                try:
+                    user, raw_password = _prepare(row, line)
+                except ValueError as e:
+                    summary['invalid'] += 1
+                    if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                        summary['errors'].append(str(e))
+                    continue
+                if user.email in seen:
+                    summary['duplicates'] += 1
+                    continue
+                seen.add(user.email)
+                prepared.append((user, raw_password))
+
+            existing = set(
+                User.objects.filter(email__in=[user.email for user, _ in prepared]).values_list('email', flat=True)
+            )
+            summary['existing'] += len(existing)
+            prepared = [(user, raw) for user, raw in prepared if user.email not in existing]
+
+            to_hash = [] if dry_run else [(user, raw) for user, raw in prepared if raw is not None]
+            hashed = pool.map(
+                hashers.make_password,
+                [raw for _, raw in to_hash],
+                chunksize=max(1, len(to_hash) // (workers * 4)),
+            )
+            for (user, _), encoded in zip(to_hash, hashed):
+                user.password = encoded
+
+            users = [user for user, _ in prepared]
+            for user in users:
+                user.is_active = activate
+            created = len(users)
+            if not dry_run and users:
+                with transaction.atomic():
+                    # A concurrent signup may still win a race for an email; those
+                    # rows are skipped, so count what was actually inserted
+                    User.objects.bulk_create(users, batch_size=chunk_size, ignore_conflicts=True)
+                    created = User.objects.filter(pk__in=[user.pk for user in users]).count()
+            summary['created'] += created
+            summary['existing'] += len(users) - created
+
+            if stdout:
+                stdout.write(f'Processed {chunk[-1][0]} row(s), {summary["created"]} created')
+    return summary
+
+def queue_import(data, fmt, *, activate=True, created_by=None):
+    """Store an uploaded file (bytes) for the run_user_imports worker"""
+    return UserImportJob.objects.create(data=data, format=fmt, activate=activate, created_by=created_by)
+
+def claim_job():
+    """The oldest waiting job, marked running; also retakes jobs whose worker died"""
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.USER_IMPORT['JOB_TIMEOUT_SECONDS'])
+    with transaction.atomic():
+        job = (
+            UserImportJob.objects.filter(Q(status='pending') | Q(status='running', started_at__lt=stale))
+            .select_for_update(skip_locked=True)
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = now
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+def run_job(job, stdout=None):
+    """Import a claimed job's file and record the outcome (a re-run skips users already created)"""
+    stream = io.TextIOWrapper(io.BytesIO(bytes(job.data)), encoding='utf-8-sig', newline='')
+    try:
+        job.summary = import_users(read_rows(stream, job.format), activate=job.activate, stdout=stdout)
+        job.status = 'done'
+    except Exception as e:
+        logger.exception(f"User import {job.id} failed")
+        job.status = 'failed'
+        job.error = str(e)[:1000]
+    job.data = b''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['summary', 'status', 'error', 'data', 'finished_at'])
+    return job
+
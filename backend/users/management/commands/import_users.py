@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.importer import FORMATS, guess_format, import_users, read_rows
+
+class Command(BaseCommand):
+    help = 'Create users in bulk from a CSV or JSON Lines file (columns: email, first_name, last_name, password or password_hash)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension (csv otherwise)')
+        parser.add_argument('--chunk-size', type=int, default=None)
+        parser.add_argument('--workers', type=int, default=None, help='Password hashing processes')
+        parser.add_argument('--inactive', action='store_true', help='Create the accounts inactive')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path == '-' else guess_format(path))
+        try:
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with stream:
+            summary = import_users(
+                read_rows(stream, fmt),
+                activate=not options['inactive'],
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                dry_run=options['dry_run'],
+                stdout=self.stdout,
+            )
+
+        for error in summary['errors']:
+            self.stderr.write(error)
+        verb = 'would be created' if options['dry_run'] else 'created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary["created"]} user(s) {verb}, {summary["existing"]} already existed, '
+            f'{summary["duplicates"]} duplicate(s) and {summary["invalid"]} invalid row(s) skipped'
+        ))
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from users.models import EmailOTP
+
+class Command(BaseCommand):
+    help = 'Delete used and expired one-time codes in small batches (safe to interrupt and re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OTP['PURGE_BATCH_SIZE'])
+        parser.add_argument('--max-batches', type=int, default=0, help='Stop after N batches (0 = until done)')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        candidates = EmailOTP.objects.filter(Q(used=True) | Q(expires_at__lt=timezone.now())).order_by('id')
+
+        if options['dry_run']:
+            self.stdout.write(f'{candidates.count()} code(s) would be deleted')
+            return
+
+        last_id = 0
+        batches = deleted = 0
+        while not options['max_batches'] or batches < options['max_batches']:
+            with transaction.atomic():
+                ids = list(
+                    candidates.filter(id__gt=last_id)
+                    .select_for_update(skip_locked=True)
+                    .values_list('id', flat=True)[:options['batch_size']]
+                )
+                if not ids:
+                    break
+                EmailOTP.objects.filter(id__in=ids).delete()
+
+            last_id = ids[-1]
+            batches += 1
+            deleted += len(ids)
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'{deleted} code(s) deleted in {batches} batch(es)'))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.importer import claim_job, run_job
+
+class Command(BaseCommand):
+    help = 'Process user import files uploaded through the API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new uploads instead of exiting once none are waiting')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to wait when nothing is waiting (with --loop)')
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            job = claim_job()
+            if job is not None:
+                job = run_job(job)
+                processed += 1
+                self.stdout.write(f'Import {job.id}: {job.status} {job.summary or job.error}')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {processed} import(s) processed'))
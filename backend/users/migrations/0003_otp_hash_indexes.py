@@ -0,0 +1,38 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_favorite'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='emailotp',
+            name='code',
+        ),
+        migrations.AddField(
+            model_name='emailotp',
+            name='code_hash',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='emailotp',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='otps', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='emailotp',
+            index=models.Index(fields=['user', '-created_at'], name='email_otp_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailotp',
+            index=models.Index(fields=['expires_at'], name='email_otp_expires_idx'),
+        ),
+    ]
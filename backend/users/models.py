@@ -3,7 +3,7 @@ from django.contrib.auth.models import PermissionsMixin
 from django.db import models
 from django.utils import timezone
 import uuid
-import random
+import secrets
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -38,19 +38,40 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def get_full_name(self):
+        return f"{self.first_name} {self.last_name}".strip() or self.email
+
+    def get_short_name(self):
+        return self.first_name or self.email
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # Users authenticated from JWT claims defer everything but a few fields;
+        # load all of them on the first access instead of one query per field
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
 class EmailOTP(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='otps')
-    code = models.CharField(max_length=6)
+    """Database copy of a one-time code, only written when OTP['DB_FALLBACK'] is on (see users.otp)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='otps', db_index=False)
+    code_hash = models.CharField(max_length=64)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='email_otp_user_created_idx'),
+            models.Index(fields=['expires_at'], name='email_otp_expires_idx'),
+        ]
+
     def is_valid(self):
         return (not self.used) and timezone.now() <= self.expires_at
 
     @staticmethod
     def generate_code():
-        return f"{random.randint(100000, 999999)}"
+        return f"{secrets.randbelow(900000) + 100000}"
 
 class Favorite(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorites')
@@ -62,4 +83,35 @@ class Favorite(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"{self.user.email} - {self.property.title}" 
\ No newline at end of file
+        return f"{self.user.email} - {self.property.title}" 
+
+class UserImportJob(models.Model):
+    """An uploaded user file, imported by the run_user_imports worker (see users.importer)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    format = models.CharField(max_length=10)
+    activate = models.BooleanField(default=True)
+    # The uploaded file; emptied once the job finishes since it may hold passwords
+    data = models.BinaryField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    summary = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='user_import_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"User import {self.id} ({self.status})"
@@ -0,0 +1,109 @@
+"""
+One-time email codes.
+
+Codes are kept as an HMAC of (user id, code): the cache holds it under
+`auth:otp:<user id>` with the code's lifetime as TTL, so verification is a
+single keyed lookup and expired codes disappear by themselves. The only
+clear copy is the body of the queued email, which the mailer blanks once
+the message is sent or has failed for good.
+
+Failed guesses are counted per account for OTP['TTL_SECONDS'] from the
+first failure; after OTP['MAX_ATTEMPTS'] the current code is dropped and
+further guesses are refused until the count expires. Issuing a new code
+does not reset the count, and issuance itself is rate limited per account
+and per client (AUTH_THROTTLE_RATES 'otp_account' and 'otp_ip').
+
+With OTP['DB_FALLBACK'] the hash is also written to EmailOTP so codes survive
+a cache flush; those rows are removed by `manage.py purge_otps`.
+"""
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from config.cache import auth_cache as cache
+
+from .models import EmailOTP
+from .throttling import take
+
+class OTPError(Exception):
+    pass
+
+def _key(user_id):
+    return f'auth:otp:{user_id}'
+
+def _attempts_key(user_id):
+    return f'auth:otp:{user_id}:attempts'
+
+def hash_code(user_id, code):
+    message = f'{user_id}:{code}'.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+def issue(user, client=None):
+    """
+    Create a new code for `user`, replacing any previous one, and return it.
+
+    `client` identifies the requester (e.g. its address) for the per-client
+    limit. Raises OTPError when either issuance limit is reached.
+    """
+    for scope, ident in (('otp_account', user.pk), ('otp_ip', client)):
+        if ident is not None and take(scope, ident) is not None:
+            raise OTPError('Too many codes requested, try again later')
+
+    config = settings.OTP
+    code = EmailOTP.generate_code()
+    code_hash = hash_code(user.pk, code)
+    ttl = config['TTL_SECONDS']
+
+    cache.set(_key(user.pk), code_hash, ttl)
+    if config['DB_FALLBACK']:
+        EmailOTP.objects.filter(user=user, used=False).update(used=True)
+        EmailOTP.objects.create(
+            user=user,
+            code_hash=code_hash,
+            expires_at=timezone.now() + timedelta(seconds=ttl),
+        )
+    return code
+
+def _stored_hash(user):
+    code_hash = cache.get(_key(user.pk))
+    if code_hash is None and settings.OTP['DB_FALLBACK']:
+        # Served by the (user, -created_at) index
+        code_hash = (
+            EmailOTP.objects.filter(user=user, used=False, expires_at__gt=timezone.now())
+            .order_by('-created_at')
+            .values_list('code_hash', flat=True)
+            .first()
+        )
+    return code_hash
+
+def _consume(user):
+    """Invalidate the current code; True only for the one caller that did it"""
+    consumed = cache.delete(_key(user.pk))
+    if settings.OTP['DB_FALLBACK']:
+        # The row update decides when codes are also kept in the database
+        consumed = EmailOTP.objects.filter(user=user, used=False).update(used=True) > 0
+    return consumed
+
+def verify(user, code):
+    """Check and consume `code`; raises OTPError when it is not accepted"""
+    max_attempts = settings.OTP['MAX_ATTEMPTS']
+    if (cache.get(_attempts_key(user.pk)) or 0) >= max_attempts:
+        raise OTPError('Too many attempts, try again later')
+
+    code_hash = _stored_hash(user)
+    if code_hash is None:
+        raise OTPError('Code expired or used')
+
+    if not hmac.compare_digest(code_hash, hash_code(user.pk, code)):
+        cache.add(_attempts_key(user.pk), 0, settings.OTP['TTL_SECONDS'])
+        if cache.incr(_attempts_key(user.pk)) >= max_attempts:
+            _consume(user)
+            raise OTPError('Too many attempts, try again later')
+        raise OTPError('Invalid code')
+
+    cache.delete(_attempts_key(user.pk))
+    if not _consume(user):
+        # A concurrent request used the same code first
+        raise OTPError('Code expired or used')
@@ -0,0 +1,196 @@
+"""
+Revoked JWT store.
+
+A revoked JTI is kept in the shared cache only until the token would have
+expired anyway, so entries prune themselves. Every revocation is also
+appended to a short-lived log that each process replays into a local Bloom
+filter at most every JWT_REVOCATION['SYNC_SECONDS']. Membership checks
+(one per authenticated request) are answered by the filter alone unless it
+reports a possible hit, which is then confirmed with a single cache lookup.
+
+Every JWT_REVOCATION['SNAPSHOT_SECONDS'] one process (whichever claims the
+snapshot lock) moves the shared floor past expired log entries and writes
+its filter to the cache with the sequence it covers. A new process starts
+from that snapshot and replays only what was revoked since, so cold starts
+after worker recycling stay cheap however long the log has been running.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from config.cache import auth_cache as cache
+
+SEQUENCE_KEY = 'auth:revoked:seq'
+SNAPSHOT_KEY = 'auth:revoked:snapshot'
+SNAPSHOT_LOCK_KEY = 'auth:revoked:snapshot:lock'
+REPLAY_CHUNK = 500
+
+def _revoked_key(jti):
+    return f'auth:revoked:{jti}'
+
+def _log_key(n):
+    return f'auth:revoked:log:{n}'
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class _RevocationFilter:
+    """Per-process Bloom filter kept in step with the shared revocation log"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset(0)
+
+    def _reset(self, floor):
+        config = settings.JWT_REVOCATION
+        self.bloom = BloomFilter(config['BLOOM_CAPACITY'], config['BLOOM_ERROR_RATE'])
+        self.floor = floor      # oldest log entry that may still be alive
+        self.seen = floor       # last log entry replayed into the filter
+        self.synced_at = 0.0
+        self.snapshot_at = time.monotonic()
+        self.loaded = False
+
+    def _load_snapshot(self, sequence):
+        """Start from the shared snapshot if there is a usable one"""
+        self.loaded = True
+        snapshot = cache.get(SNAPSHOT_KEY)
+        if (
+            snapshot is None
+            or (snapshot['size'], snapshot['hashes']) != (self.bloom.size, self.bloom.hashes)
+            or snapshot['sequence'] > sequence
+        ):
+            return
+        self.bloom.bits = bytearray(snapshot['bits'])
+        self.bloom.count = snapshot['count']
+        self.floor = snapshot['floor']
+        self.seen = snapshot['sequence']
+
+    def _write_snapshot(self):
+        self._advance_floor(self.seen)
+        cache.set(SNAPSHOT_KEY, {
+            'sequence': self.seen,
+            'floor': self.floor,
+            'count': self.bloom.count,
+            'size': self.bloom.size,
+            'hashes': self.bloom.hashes,
+            'bits': bytes(self.bloom.bits),
+        }, None)
+
+    def _advance_floor(self, sequence):
+        """Move the floor up to the oldest log entry that has not expired yet"""
+        start = self.floor + 1
+        while start <= sequence:
+            numbers = range(start, min(start + REPLAY_CHUNK, sequence + 1))
+            entries = cache.get_many([_log_key(n) for n in numbers])
+            for n in numbers:
+                if _log_key(n) in entries:
+                    self.floor = n - 1
+                    return
+            start = numbers[-1] + 1
+        self.floor = sequence
+
+    def _replay(self, start, end):
+        """Add log entries start..end to the filter; returns the first one still alive"""
+        first_alive = None
+        for chunk_start in range(start, end + 1, REPLAY_CHUNK):
+            keys = [_log_key(n) for n in range(chunk_start, min(chunk_start + REPLAY_CHUNK, end + 1))]
+            entries = cache.get_many(keys)
+            for key in keys:
+                if key in entries:
+                    self.bloom.add(entries[key])
+                    if first_alive is None:
+                        first_alive = int(key.rsplit(':', 1)[1])
+        return first_alive
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.synced_at < settings.JWT_REVOCATION['SYNC_SECONDS']:
+            return
+        config = settings.JWT_REVOCATION
+        with self._lock:
+            sequence = cache.get(SEQUENCE_KEY) or 0
+            if sequence < self.seen:
+                # The shared cache was flushed; start over
+                self._reset(0)
+            if not self.loaded:
+                self._load_snapshot(sequence)
+            if self.bloom.count > self.bloom.capacity:
+                # Rebuild from live entries only, dropping expired revocations
+                self._advance_floor(sequence)
+                floor = self.floor
+                self._reset(floor)
+                self.loaded = True
+                first_alive = self._replay(floor + 1, sequence)
+                self.floor = first_alive - 1 if first_alive else sequence
+                self.seen = sequence
+            if sequence > self.seen:
+                first_alive = self._replay(self.seen + 1, sequence)
+                if self.floor == 0 and first_alive:
+                    self.floor = first_alive - 1
+                self.seen = sequence
+            self.synced_at = now
+            if now - self.snapshot_at >= config['SNAPSHOT_SECONDS']:
+                self.snapshot_at = now
+                if cache.add(SNAPSHOT_LOCK_KEY, 1, max(1, int(config['SNAPSHOT_SECONDS']))):
+                    self._write_snapshot()
+
+    def add(self, jti):
+        with self._lock:
+            self.bloom.add(jti)
+
+    def __contains__(self, jti):
+        return jti in self.bloom
+
+_filter = _RevocationFilter()
+
+def _ttl(exp):
+    return int(exp - datetime.now(timezone.utc).timestamp()) + 1
+
+def revoke(jti, exp):
+    """
+    Revoke a token until its `exp` (unix time).
+
+    Returns False if the JTI was already revoked, which makes this usable as
+    an atomic check-and-set when rotating refresh tokens.
+    """
+    ttl = _ttl(exp)
+    if ttl <= 0:
+        return True
+    if not cache.add(_revoked_key(jti), 1, ttl):
+        return False
+    cache.add(SEQUENCE_KEY, 0, None)
+    sequence = cache.incr(SEQUENCE_KEY)
+    cache.set(_log_key(sequence), jti, ttl)
+    _filter.add(jti)
+    return True
+
+def revoke_token(token):
+    return revoke(token['jti'], token['exp'])
+
+def is_revoked(jti):
+    _filter.sync()
+    if jti not in _filter:
+        return False
+    return cache.get(_revoked_key(jti)) is not None
@@ -0,0 +1,16 @@
+"""
+drf-spectacular extensions.
+
+This module is imported through SPECTACULAR_SETTINGS['PREPROCESSING_HOOKS'],
+so it is only loaded when a schema is generated. drf-spectacular itself is
+still imported when serving the API, by its app config and by
+REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'].
+"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    target_class = 'users.authentication.ClaimsJWTAuthentication'
+
+def register_extensions(endpoints):
+    """Preprocessing hook; importing this module registered the extensions above"""
+    return endpoints
@@ -1,9 +1,19 @@
 from rest_framework import serializers
-from django.utils import timezone
-from django.core.mail import send_mail
+from rest_framework.throttling import BaseThrottle
+from config.metrics import TimedSerializerMixin
 from django.conf import settings
-from .models import User, EmailOTP, Favorite
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from listings.serializers import PropertySerializer
+from .models import User, Favorite, UserImportJob
+from notifications.mailer import queue_email
+from .tokens import USER_CLAIMS, UserRefreshToken, stamp_user_claims
+from .authentication import store_user_state, user_state
+from .revocation import is_revoked, revoke_token
+from .hashing import set_password, verify_password
+from . import otp
+from .importer import FORMATS
 
 class RegisterSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -20,7 +30,7 @@ class RegisterSerializer(serializers.Serializer):
             }
         )
         if created:
-            user.set_password(validated_data['password'])
+            set_password(user, validated_data['password'])
             user.is_active = True  # Auto activate for now
             user.save()
         else:
@@ -28,7 +38,7 @@ class RegisterSerializer(serializers.Serializer):
             pass
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         return {
             'access': str(refresh.access_token),
             'refresh': str(refresh),
@@ -51,20 +61,20 @@ class LoginSerializer(serializers.Serializer):
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
-            raise serializers.ValidationError('Invalid credentials')
+            raise serializers.ValidationError('Invalid email or password.')
         
-        if not user.check_password(password):
-            raise serializers.ValidationError('Invalid credentials')
+        if not verify_password(user, password):
+            raise serializers.ValidationError('Invalid email or password.')
         
         if not user.is_active:
-            raise serializers.ValidationError('Account not activated')
+            raise serializers.ValidationError('Account is not activated.')
         
         attrs['user'] = user
         return attrs
 
     def create(self, validated_data):
         user = validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         return {
             'access': str(refresh.access_token),
             'refresh': str(refresh),
@@ -86,22 +96,16 @@ class VerifyOTPSerializer(serializers.Serializer):
         except User.DoesNotExist:
             raise serializers.ValidationError('User not found')
         try:
-            otp = EmailOTP.objects.filter(user=user, code=attrs['code']).latest('created_at')
-        except EmailOTP.DoesNotExist:
-            raise serializers.ValidationError('Invalid code')
-        if not otp.is_valid():
-            raise serializers.ValidationError('Code expired or used')
+            otp.verify(user, attrs['code'])
+        except otp.OTPError as e:
+            raise serializers.ValidationError(str(e))
         attrs['user'] = user
-        attrs['otp'] = otp
         return attrs
 
     def save(self, **kwargs):
         user = self.validated_data['user']
-        otp = self.validated_data['otp']
         user.is_active = True
         user.save(update_fields=['is_active'])
-        otp.used = True
-        otp.save(update_fields=['used'])
         return user
 
 class OTPLoginRequestSerializer(serializers.Serializer):
@@ -112,13 +116,18 @@ class OTPLoginRequestSerializer(serializers.Serializer):
             user = User.objects.get(email=validated_data['email'])
         except User.DoesNotExist:
             raise serializers.ValidationError('User not found')
-        code = EmailOTP.generate_code()
-        EmailOTP.objects.create(
+        request = self.context.get('request')
+        try:
+            code = otp.issue(user, client=BaseThrottle().get_ident(request) if request else None)
+        except otp.OTPError as e:
+            raise serializers.ValidationError(str(e))
+        queue_email(
+            user.email,
+            'Your BookPakistan login code',
+            f'Your one-time login code is {code}. It expires in {settings.OTP["TTL_SECONDS"] // 60} minutes.',
+            kind='otp',
             user=user,
-            code=code,
-            expires_at=timezone.now() + timezone.timedelta(minutes=10)
         )
-        # Skip email for now
         return {'detail': 'OTP sent to email'}
 
 class OTPLoginVerifySerializer(serializers.Serializer):
@@ -131,22 +140,16 @@ class OTPLoginVerifySerializer(serializers.Serializer):
         except User.DoesNotExist:
             raise serializers.ValidationError('User not found')
         try:
-            otp = EmailOTP.objects.filter(user=user, code=attrs['code']).latest('created_at')
-        except EmailOTP.DoesNotExist:
-            raise serializers.ValidationError('Invalid code')
-        if not otp.is_valid():
-            raise serializers.ValidationError('Code expired or used')
+            otp.verify(user, attrs['code'])
+        except otp.OTPError as e:
+            raise serializers.ValidationError(str(e))
         attrs['user'] = user
-        attrs['otp'] = otp
         return attrs
 
     def create(self, validated_data):
         user = validated_data['user']
-        otp = validated_data['otp']
-        otp.used = True
-        otp.save(update_fields=['used'])
         # Issue JWT
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         return {
             'access': str(refresh.access_token),
             'refresh': str(refresh),
@@ -158,22 +161,77 @@ class OTPLoginVerifySerializer(serializers.Serializer):
             }
         }
 
-class UserSerializer(serializers.ModelSerializer):
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh that refuses revoked tokens and revokes the old one on rotation.
+
+    The user row is read on every refresh: inactive or deleted users get no
+    new tokens, and the new pair carries the user's current claims, so a
+    demotion is never carried forward from the login-time refresh token.
+    """
+
+    def validate(self, attrs):
+        try:
+            refresh = self.token_class(attrs['refresh'])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        # revoke() is an atomic check-and-set, so of two concurrent refreshes
+        # with the same token only one gets a new pair
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if not revoke_token(refresh):
+                raise InvalidToken('Token is revoked')
+        elif is_revoked(refresh[api_settings.JTI_CLAIM]):
+            raise InvalidToken('Token is revoked')
+
+        user = User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM)).only(*USER_CLAIMS).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('No active account found for the given token', code='no_active_account')
+        stamp_user_claims(refresh, user)
+        store_user_state(user.pk, user_state(user))
+
+        # As TokenRefreshSerializer.validate, but from the re-stamped token
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
+
+class UserImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=FORMATS, required=False)
+    activate = serializers.BooleanField(default=True)
+
+    def validate_file(self, upload):
+        limit = settings.USER_IMPORT['MAX_UPLOAD_BYTES']
+        if upload.size > limit:
+            raise serializers.ValidationError(
+                f'File is larger than {limit // (1024 * 1024)} MB; use `manage.py import_users` instead.'
+            )
+        return upload
+
+class UserImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserImportJob
+        fields = ('id', 'status', 'format', 'activate', 'summary', 'error', 'created_at', 'started_at', 'finished_at')
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'email', 'first_name', 'last_name', 'is_active')
 
-class FavoriteSerializer(serializers.ModelSerializer):
-    property = serializers.SerializerMethodField()
+class FavoriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    property = PropertySerializer(read_only=True)
     
     class Meta:
         model = Favorite
         fields = ('id', 'property', 'created_at')
         read_only_fields = ('id', 'created_at')
-    
-    def get_property(self, obj) -> dict:
-        from listings.serializers import PropertySerializer
-        return PropertySerializer(obj.property).data
 
 class FavoriteCreateSerializer(serializers.ModelSerializer):
     class Meta:
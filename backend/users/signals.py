@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import User
+from .authentication import store_user_state, forget_user, user_state
+from .tokens import USER_CLAIMS
+
+@receiver(post_save, sender=User)
+def refresh_cached_user(sender, instance, **kwargs):
+    """Keep the authentication cache in step with the user row"""
+    if instance.get_deferred_fields() & set(USER_CLAIMS):
+        forget_user(instance.pk)
+    else:
+        store_user_state(instance.pk, user_state(instance))
+
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
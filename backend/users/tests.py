@@ -0,0 +1,84 @@
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .importer import import_users
+from .models import Favorite, User
+from .throttling import take
+
+@pytest.mark.django_db
+def test_current_user_within_budget(api_client, user):
+    response = api_client.get(reverse('current_user'))
+
+    assert response.status_code == 200
+    assert response.data['email'] == user.email
+
+@pytest.mark.django_db
+def test_favorite_list_within_budget(api_client, user, make_properties, page_rows):
+    Favorite.objects.bulk_create([Favorite(user=user, property=prop) for prop in make_properties(user, page_rows)])
+
+    response = api_client.get(reverse('favorite-list'))
+
+    assert response.status_code == 200
+    assert len(response.data['results']) == page_rows
+
+@pytest.mark.django_db
+def test_favorite_check_within_budget(api_client, user, make_properties, page_rows):
+    properties = make_properties(user, page_rows)
+    Favorite.objects.bulk_create([Favorite(user=user, property=prop) for prop in properties])
+
+    response = api_client.get(reverse('favorite-check', args=[properties[-1].pk]))
+
+    assert response.status_code == 200
+    assert response.data == {'is_favorite': True}
+
+@pytest.fixture
+def throttle_rates(settings):
+    settings.AUTH_THROTTLE_RATES = {**settings.AUTH_THROTTLE_RATES, 'login_account': '5:2', 'login_ip': '100:100'}
+    caches['auth'].clear()
+    yield
+    caches['auth'].clear()
+
+def test_bucket_refills_instead_of_resetting(throttle_rates):
+    now = [1000.0]
+    timer = lambda: now[0]
+
+    assert all(take('login_account', 'victim', timer) is None for _ in range(5))
+    assert take('login_account', 'victim', timer) == pytest.approx(30)
+    # A window counter would allow a fresh burst here; the bucket has earned one token
+    now[0] += 30
+    assert take('login_account', 'victim', timer) is None
+    assert take('login_account', 'victim', timer) is not None
+
+@pytest.mark.django_db
+def test_account_login_limit_ignores_client_address(throttle_rates, user):
+    client = APIClient()
+    statuses = [
+        client.post(reverse('login'), {'email': user.email.upper(), 'password': 'wrong'}, REMOTE_ADDR=f'10.0.0.{n}').status_code
+        for n in range(7)
+    ]
+
+    assert statuses == [400] * 5 + [429] * 2
+
+@pytest.mark.django_db
+def test_import_counts_rows_with_wrong_types_as_invalid():
+    rows = [
+        {'email': 'first@example.com', 'first_name': 'First', 'password': 'secret-1'},
+        {'email': 'named@example.com', 'first_name': 5},
+        {'email': 'numeric@example.com', 'password': 12345678},
+        {'email': ['list@example.com']},
+        {'email': 'hashed@example.com', 'password_hash': None, 'last_name': 'Last'},
+    ]
+
+    summary = import_users(rows, workers=1)
+
+    assert summary['created'] == 2
+    assert summary['invalid'] == 3
+    assert summary['errors'] == [
+        'line 2: first_name must be a string, got int',
+        'line 3: password must be a string, got int',
+        'line 4: email must be a string, got list',
+    ]
+    assert User.objects.get(email='first@example.com').check_password('secret-1')
+    assert not User.objects.get(email='hashed@example.com').has_usable_password()
@@ -0,0 +1,105 @@
+"""
+Rate limits for the authentication endpoints.
+
+Each rate is "burst:per_minute", a token bucket: a client starts with
+`burst` requests and earns back `per_minute` a minute, up to `burst`. A few
+quick retries are never blocked, and no spacing of requests gets more than
+`burst` plus the refill through in any period. Rates come from
+settings.AUTH_THROTTLE_RATES.
+
+A bucket is one cache entry, (tokens, updated at), read and rewritten under
+a short lock taken with cache.add, so every worker draws from the same
+bucket and concurrent requests can't overshoot it (with the redis backend;
+locmem and file are per process or host).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+from config.cache import auth_cache as cache
+
+# The lock only covers a cache read and write
+LOCK_SECONDS = 2
+LOCK_WAIT_SECONDS = 0.5
+
+def parse_rate(rate):
+    """'20:10' -> (capacity 20, refill of 1/6 token per second)"""
+    burst, per_minute = rate.split(':')
+    return int(burst), float(per_minute) / 60
+
+def _acquire(lock):
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+    while not cache.add(lock, 1, LOCK_SECONDS):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.002)
+    return True
+
+def take(scope, ident, timer=time.time):
+    """Take a token from `ident`'s bucket for `scope`; None if allowed, else seconds to wait"""
+    capacity, refill = parse_rate(settings.AUTH_THROTTLE_RATES[scope])
+    key = f'throttle:{scope}:{ident}'
+    if not _acquire(f'{key}:lock'):
+        # Too many requests on this one bucket at once to even count them
+        return 1 / refill
+    try:
+        now = timer()
+        tokens, updated = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + max(now - updated, 0) * refill)
+        if tokens < 1:
+            return (1 - tokens) / refill
+        # Kept until it would be full again, when a missing entry means the same
+        cache.set(key, (tokens - 1, now), int((capacity - tokens + 1) / refill) + 1)
+        return None
+    finally:
+        cache.delete(f'{key}:lock')
+
+class BucketThrottle(BaseThrottle):
+    scope = None
+    timer = time.time
+
+    def __init__(self):
+        self._wait = None
+
+    def get_bucket_ident(self, request, view):
+        raise NotImplementedError('.get_bucket_ident() must be overridden')
+
+    def allow_request(self, request, view):
+        ident = self.get_bucket_ident(request, view)
+        if ident is None:
+            return True
+        self._wait = take(self.scope, ident, self.timer)
+        return self._wait is None
+
+    def wait(self):
+        return self._wait
+
+def _email_hash(request):
+    email = request.data.get('email')
+    if not isinstance(email, str) or not email:
+        return None
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()
+
+class LoginIPThrottle(BucketThrottle):
+    scope = 'login_ip'
+
+    def get_bucket_ident(self, request, view):
+        return self.get_ident(request)
+
+class LoginAccountThrottle(BucketThrottle):
+    """
+    Per target account, from any address, so guessing one account's password
+    from many addresses gets no further than from one. The cost is that
+    anyone can use up an account's logins for a while.
+    """
+    scope = 'login_account'
+
+    def get_bucket_ident(self, request, view):
+        return _email_hash(request)
+
+class RegisterIPThrottle(BucketThrottle):
+    scope = 'register_ip'
+
+    def get_bucket_ident(self, request, view):
+        return self.get_ident(request)
@@ -0,0 +1,24 @@
+import time
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# User attributes copied into every token so requests can be authenticated
+# without loading the user row (see users.authentication)
+USER_CLAIMS = ('email', 'is_staff', 'is_superuser', 'is_active')
+
+# When USER_CLAIMS were read from the database. Access tokens copy every
+# claim of their refresh token, including iat, so neither iat nor exp says
+# how fresh the claims are.
+CLAIMS_ISSUED_AT = 'claims_iat'
+
+def stamp_user_claims(token, user):
+    """Copy the user's current state into `token`"""
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[CLAIMS_ISSUED_AT] = int(time.time())
+    return token
+
+class UserRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        return stamp_user_claims(super().for_user(user), user)
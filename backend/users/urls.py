@@ -13,6 +13,8 @@ urlpatterns = [
     path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('user/', views.CurrentUserView.as_view(), name='current_user'),
     path('profile/', views.UserProfileView.as_view(), name='user_profile'),
+    path('users/import/', views.UserImportView.as_view(), name='user_import'),
+    path('users/import/<uuid:pk>/', views.UserImportStatusView.as_view(), name='user_import_status'),
     # Alternative endpoint that frontend might be calling
     path('current-user/', views.CurrentUserView.as_view(), name='current_user_alt'),
     # Include router URLs
@@ -1,13 +1,23 @@
 from rest_framework import status, viewsets, generics
 from rest_framework.decorators import api_view, permission_classes, action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from .tokens import UserRefreshToken
+from .revocation import revoke_token
+from .hashing import HashingBusy, set_password
+from .throttling import LoginAccountThrottle, LoginIPThrottle, RegisterIPThrottle
+from .importer import guess_format, queue_import
 from django.contrib.auth import authenticate
 from django.shortcuts import get_object_or_404
-from .models import User, Favorite
-from .serializers import RegisterSerializer, LoginSerializer, UserSerializer, FavoriteSerializer, FavoriteCreateSerializer
+from django.db.models import BooleanField, Prefetch, Value
+from listings.models import Property
+from .models import User, Favorite, UserImportJob
+from .serializers import RegisterSerializer, LoginSerializer, UserSerializer, FavoriteSerializer, FavoriteCreateSerializer, LogoutSerializer, UserImportSerializer, UserImportJobSerializer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,22 +25,24 @@ logger = logging.getLogger(__name__)
 class RegisterView(generics.GenericAPIView):
     permission_classes = [AllowAny]
     serializer_class = RegisterSerializer
+    throttle_classes = [RegisterIPThrottle]
     
     def post(self, request):
         try:
             serializer = RegisterSerializer(data=request.data)
             if serializer.is_valid():
-                # Create user
-                user = User.objects.create_user(
-                    email=serializer.validated_data['email'],
-                    password=serializer.validated_data['password'],
+                # Create user; the password is hashed in the bounded hashing pool
+                user = User(
+                    email=User.objects.normalize_email(serializer.validated_data['email']),
                     first_name=serializer.validated_data.get('first_name', ''),
                     last_name=serializer.validated_data.get('last_name', ''),
                     is_active=True  # Auto-activate for now
                 )
+                set_password(user, serializer.validated_data['password'])
+                user.save()
                 
                 # Generate tokens
-                refresh = RefreshToken.for_user(user)
+                refresh = UserRefreshToken.for_user(user)
                 
                 return Response({
                     'access': str(refresh.access_token),
@@ -46,6 +58,8 @@ class RegisterView(generics.GenericAPIView):
             
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
+        except HashingBusy:
+            raise
         except Exception as e:
             logger.error(f"Registration error: {str(e)}")
             return Response({
@@ -55,49 +69,38 @@ class RegisterView(generics.GenericAPIView):
 class LoginView(generics.GenericAPIView):
     permission_classes = [AllowAny]
     serializer_class = LoginSerializer
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
     
     def post(self, request):
         try:
+            # The serializer checks the password (once, in the hashing pool)
             serializer = LoginSerializer(data=request.data)
             if serializer.is_valid():
-                email = serializer.validated_data['email']
-                password = serializer.validated_data['password']
+                user = serializer.validated_data['user']
                 
-                # Authenticate user
-                try:
-                    user = User.objects.get(email=email)
-                    if user.check_password(password):
-                        if not user.is_active:
-                            return Response({
-                                'detail': 'Account is not activated.'
-                            }, status=status.HTTP_400_BAD_REQUEST)
-                        
-                        # Generate tokens
-                        refresh = RefreshToken.for_user(user)
-                        
-                        return Response({
-                            'access': str(refresh.access_token),
-                            'refresh': str(refresh),
-                            'user': {
-                                'id': str(user.id),
-                                'email': user.email,
-                                'first_name': user.first_name,
-                                'last_name': user.last_name,
-                                'is_active': user.is_active,
-                            }
-                        }, status=status.HTTP_200_OK)
-                    else:
-                        return Response({
-                            'detail': 'Invalid email or password.'
-                        }, status=status.HTTP_400_BAD_REQUEST)
-                        
-                except User.DoesNotExist:
-                    return Response({
-                        'detail': 'Invalid email or password.'
-                    }, status=status.HTTP_400_BAD_REQUEST)
+                # Generate tokens
+                refresh = UserRefreshToken.for_user(user)
+                
+                return Response({
+                    'access': str(refresh.access_token),
+                    'refresh': str(refresh),
+                    'user': {
+                        'id': str(user.id),
+                        'email': user.email,
+                        'first_name': user.first_name,
+                        'last_name': user.last_name,
+                        'is_active': user.is_active,
+                    }
+                }, status=status.HTTP_200_OK)
             
+            if 'non_field_errors' in serializer.errors:
+                return Response({
+                    'detail': serializer.errors['non_field_errors'][0]
+                }, status=status.HTTP_400_BAD_REQUEST)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
+        except HashingBusy:
+            raise
         except Exception as e:
             logger.error(f"Login error: {str(e)}")
             return Response({
@@ -106,34 +109,33 @@ class LoginView(generics.GenericAPIView):
 
 class LogoutView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
-    serializer_class = None  # No serializer needed for logout
+    serializer_class = LogoutSerializer
     
     def post(self, request):
-        try:
-            refresh_token = request.data.get('refresh')
-            if refresh_token:
-                try:
-                    token = RefreshToken(refresh_token)
-                    # Try to blacklist if the package supports it
-                    if hasattr(token, 'blacklist'):
-                        token.blacklist()
-                except Exception as token_error:
-                    # If blacklisting fails, just log it but still return success
-                    logger.warning(f"Token blacklist failed: {str(token_error)}")
-            
-            return Response({
-                'detail': 'Successfully logged out.'
-            }, status=status.HTTP_200_OK)
-            
-        except Exception as e:
-            logger.error(f"Logout error: {str(e)}")
-            return Response({
-                'detail': 'Logout successful.'
-            }, status=status.HTTP_200_OK)
+        # Revoke the access token used for this request and, if given, the refresh token
+        if request.auth is not None:
+            revoke_token(request.auth)
+        refresh_token = request.data.get('refresh')
+        if refresh_token:
+            try:
+                token = UserRefreshToken(refresh_token)
+            except TokenError as token_error:
+                logger.warning(f"Logout with invalid refresh token: {str(token_error)}")
+            else:
+                # Only the caller's own refresh token; anyone else's is left alone
+                if str(token.get(api_settings.USER_ID_CLAIM)) == str(request.user.pk):
+                    revoke_token(token)
+                else:
+                    logger.warning(f"Logout by user {request.user.pk} with another user's refresh token")
+        
+        return Response({
+            'detail': 'Successfully logged out.'
+        }, status=status.HTTP_200_OK)
 
 class UserProfileView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
+    query_budget = {'get': 1}
     
     def get(self, request):
         serializer = UserSerializer(request.user)
@@ -149,17 +151,60 @@ class UserProfileView(generics.GenericAPIView):
 class CurrentUserView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
+    query_budget = {'get': 1}
     
     def get(self, request):
         """Get current user info"""
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
+class UserImportView(generics.GenericAPIView):
+    """
+    Staff-only bulk account creation from an uploaded CSV or JSON Lines file.
+    
+    The file is queued for the run_user_imports worker; the response points
+    at the job, whose summary appears once it is done.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+    serializer_class = UserImportSerializer
+    
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        fmt = serializer.validated_data.get('format') or guess_format(upload.name)
+        
+        data = upload.read()
+        try:
+            data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return Response({'detail': 'File must be UTF-8 encoded.'}, status=status.HTTP_400_BAD_REQUEST)
+        job = queue_import(data, fmt, activate=serializer.validated_data['activate'], created_by=request.user)
+        return Response(
+            {**UserImportJobSerializer(job).data, 'url': reverse('user_import_status', args=[job.id], request=request)},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+class UserImportStatusView(generics.RetrieveAPIView):
+    """Progress and summary of a queued user import"""
+    permission_classes = [IsAdminUser]
+    serializer_class = UserImportJobSerializer
+    queryset = UserImportJob.objects.defer('data')
+
 class FavoriteViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    # Queries per request regardless of page size (see config/query_budget.py)
+    query_budget = {'list': 4, 'check': 1}
     
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user)
+        # Properties and their images in two extra queries for the whole page
+        properties = Property.objects.annotate(
+            is_favorite=Value(True, output_field=BooleanField())
+        ).prefetch_related('images')
+        return Favorite.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('property', queryset=properties)
+        )
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -0,0 +1,11 @@
+"""
+Load-test harness for the PakBooking API.
+
+Standard library only, so it runs anywhere Python does:
+
+    python -m loadtest run --base-url http://localhost:8000 --users-file users.csv \
+        --concurrency 20 --duration 60 --output results/before.json
+    python -m loadtest compare results/before.json results/after.json
+
+See loadtest/README.md for the scenarios and how to prepare accounts.
+"""
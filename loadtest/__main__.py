@@ -0,0 +1,154 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from .client import Client
+from .scenarios import DEFAULT_MIX, NEEDS_ACCOUNT, SCENARIOS, Catalog
+from .stats import Recorder, compare, format_table
+
+def parse_mix(value):
+    mix = dict(DEFAULT_MIX)
+    for part in filter(None, value.split(',')):
+        name, _, weight = part.partition('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'unknown scenario {name!r} (choose from {", ".join(SCENARIOS)})')
+        mix[name] = int(weight)
+    return mix
+
+def read_accounts(path):
+    """email,password rows; a header row is optional"""
+    with open(path, newline='') as f:
+        rows = [row for row in csv.reader(f) if row and row[0].strip() and row[0] != 'email']
+    return [(row[0].strip(), row[1]) for row in rows]
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def virtual_user(number, options, catalog, account, mix, recorders, start, stop):
+    rng = random.Random(options.seed + number)
+    warmup, measured = recorders
+    client = Client(options.base_url, warmup if options.warmup else measured, timeout=options.timeout)
+    client.account = account
+    if account and not client.login(*account):
+        print(f'user {number}: login as {account[0]} failed', file=sys.stderr)
+        return
+
+    names = [name for name in mix if mix[name] > 0 and (account or name not in NEEDS_ACCOUNT)]
+    weights = [mix[name] for name in names]
+    start.wait()
+    measure_from = time.monotonic() + options.warmup
+    try:
+        while not stop.is_set():
+            if client.recorder is warmup and time.monotonic() >= measure_from:
+                client.recorder = measured
+            SCENARIOS[rng.choices(names, weights)[0]](client, catalog, rng, options)
+            if options.think:
+                stop.wait(rng.uniform(0, 2 * options.think))
+    finally:
+        client.close()
+
+def run(options):
+    accounts = read_accounts(options.users_file) if options.users_file else []
+    mix = options.mix or dict(DEFAULT_MIX)
+    if not accounts:
+        print('No --users-file: running anonymous scenarios only', file=sys.stderr)
+
+    setup = Recorder()
+    catalog = Catalog.discover(Client(options.base_url, setup, timeout=options.timeout), options.hot_properties)
+
+    recorders = (Recorder(), Recorder())
+    start, stop = threading.Barrier(options.concurrency + 1), threading.Event()
+    threads = [
+        threading.Thread(
+            target=virtual_user,
+            args=(n, options, catalog, accounts[n % len(accounts)] if accounts else None, mix, recorders, start, stop),
+            daemon=True,
+        )
+        for n in range(options.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    print(f'Running {options.concurrency} users for {options.warmup}s warm-up + {options.duration}s against {options.base_url}')
+    time.sleep(options.warmup)
+    measured_from = time.monotonic()
+    time.sleep(options.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - measured_from
+
+    result = {
+        'meta': {
+            'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'base_url': options.base_url,
+            'git_revision': git_revision(),
+            'concurrency': options.concurrency,
+            'duration_s': round(elapsed, 2),
+            'warmup_s': options.warmup,
+            'think_s': options.think,
+            'seed': options.seed,
+            'mix': mix,
+            'accounts': len(accounts),
+            'properties': len(catalog.property_ids),
+            'hot_properties': len(catalog.hot_ids),
+        },
+        **recorders[1].summary(elapsed),
+    }
+
+    print(format_table(result['endpoints']))
+    print(f'\n{result["requests"]} requests, {result["errors"]} errors, {result["throughput_rps"]} req/s overall')
+    if options.output:
+        os.makedirs(os.path.dirname(os.path.abspath(options.output)), exist_ok=True)
+        with open(options.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f'Results written to {options.output}')
+    return 1 if options.max_error_rate is not None and result['errors'] > options.max_error_rate * result['requests'] else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest', description='Load test the PakBooking API')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the scenario mix and report latency per endpoint')
+    run_parser.add_argument('--base-url', default=os.environ.get('LOADTEST_BASE_URL', 'http://localhost:8000'))
+    run_parser.add_argument('--users-file', help='CSV of email,password for active accounts')
+    run_parser.add_argument('--concurrency', type=int, default=10, help='Virtual users')
+    run_parser.add_argument('--duration', type=float, default=60, help='Measured seconds')
+    run_parser.add_argument('--warmup', type=float, default=5, help='Seconds of traffic before measuring')
+    run_parser.add_argument('--think', type=float, default=0, help='Mean pause between actions (0 = closed loop)')
+    run_parser.add_argument('--mix', type=parse_mix, help='Scenario weights, e.g. browse=50,book=0')
+    run_parser.add_argument('--hot-properties', type=int, default=3, help='Properties that all bookings target')
+    run_parser.add_argument('--booking-window', type=int, default=14, help='Bookings start within this many days')
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--timeout', type=float, default=30)
+    run_parser.add_argument('--output', help='Write JSON results here')
+    run_parser.add_argument('--max-error-rate', type=float, help='Exit 1 when errors exceed this fraction')
+
+    compare_parser = commands.add_parser('compare', help='Compare two JSON result files')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+
+    options = parser.parse_args(argv)
+    if options.command == 'compare':
+        with open(options.before) as f:
+            before = json.load(f)
+        with open(options.after) as f:
+            after = json.load(f)
+        print(compare(before, after))
+        return 0
+    return run(options)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+HTTP client for one virtual user.
+
+Each virtual user keeps its own keep-alive connection, like a browser tab,
+so latencies measure the server rather than TCP setup. Every request is
+timed and handed to the shared Recorder under an endpoint label.
+"""
+import http.client
+import json
+import re
+import time
+from urllib.parse import urlencode, urlsplit
+
+_TIMING = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+def parse_server_timing(header):
+    """{'db': ms, 'queries': n, ...} from the API's Server-Timing header"""
+    timings = {}
+    for name, duration, queries in _TIMING.findall(header or ''):
+        timings[name] = float(duration)
+        if queries:
+            timings['queries'] = int(queries)
+    return timings
+
+class Response:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body or b'null')
+        except ValueError:
+            return None
+
+class Client:
+    def __init__(self, base_url, recorder, timeout=30):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self._connect = lambda: connection_class(url.netloc, timeout=timeout)
+        self.prefix = url.path.rstrip('/')
+        self.recorder = recorder
+        self.connection = self._connect()
+        # (email, password) of the account this user logs in as, if any
+        self.account = None
+        self.token = None
+
+    def request(self, method, path, label, params=None, body=None, expect=(200,)):
+        """
+        Send a request and record it under `label`.
+
+        Statuses in `expect` count as successes; others as errors. Network
+        failures are recorded with status 0 and a fresh connection is opened.
+        """
+        if params:
+            path = f'{path}?{urlencode(params)}'
+        headers = {'Accept': 'application/json'}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            raw = self.connection.getresponse()
+            content = raw.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = self._connect()
+            self.recorder.record(label, 0, time.perf_counter() - started, False, {})
+            return Response(0, b'')
+
+        elapsed = time.perf_counter() - started
+        timings = parse_server_timing(raw.getheader('Server-Timing'))
+        self.recorder.record(label, raw.status, elapsed, raw.status in expect, timings)
+        return Response(raw.status, content)
+
+    def login(self, email, password):
+        response = self.request(
+            'POST', '/api/auth/login/', 'POST /api/auth/login/',
+            body={'email': email, 'password': password},
+        )
+        data = response.json() or {}
+        self.token = data.get('access')
+        return self.token is not None
+
+    def close(self):
+        self.connection.close()
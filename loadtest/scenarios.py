@@ -0,0 +1,102 @@
+"""
+Scenarios mirroring production traffic.
+
+Each scenario is one user action, possibly several requests. Virtual users
+pick scenarios at random according to the mix weights. Those needing an
+account are skipped when the harness runs without --users-file.
+"""
+import datetime
+
+DEFAULT_MIX = {
+    'browse': 30,
+    'search': 20,
+    'availability': 20,
+    'book': 10,
+    'notifications': 15,
+    'login': 5,
+}
+
+NEEDS_ACCOUNT = {'book', 'notifications', 'login'}
+
+class Catalog:
+    """Properties discovered from the API before the run starts"""
+
+    def __init__(self, property_ids, cities, pages, hot_count):
+        self.property_ids = property_ids
+        self.cities = cities
+        self.pages = pages
+        # Bookings all target these so they contend for the same dates
+        self.hot_ids = property_ids[:hot_count]
+
+    @classmethod
+    def discover(cls, client, hot_count, max_pages=5):
+        property_ids = []
+        cities = set()
+        pages = 1
+        for page in range(1, max_pages + 1):
+            response = client.request('GET', '/api/listings/', 'setup', params={'page': page})
+            data = response.json() or {}
+            results = data.get('results') or []
+            if response.status != 200 or not results:
+                break
+            if page == 1:
+                pages = -(-data['count'] // len(results))
+            for item in results:
+                property_ids.append(item['id'])
+                cities.add(item['city'])
+            if not data.get('next'):
+                break
+        if not property_ids:
+            raise SystemExit('No properties found; load some data first (see loadtest/README.md)')
+        return cls(property_ids, sorted(cities), pages, hot_count)
+
+def browse(client, catalog, rng, options):
+    client.request('GET', '/api/listings/', 'GET /api/listings/', params={'page': rng.randint(1, catalog.pages)})
+    client.request('GET', f'/api/listings/{rng.choice(catalog.property_ids)}/', 'GET /api/listings/{id}/')
+
+def search(client, catalog, rng, options):
+    params = {'search': rng.choice(catalog.cities)}
+    if rng.random() < 0.5:
+        params['max_price'] = rng.choice([5000, 10000, 20000, 50000])
+    client.request('GET', '/api/listings/', 'GET /api/listings/?search', params=params)
+
+def _stay(rng, options):
+    check_in = datetime.date.today() + datetime.timedelta(days=rng.randint(1, options.booking_window))
+    return check_in, check_in + datetime.timedelta(days=rng.randint(1, 3))
+
+def availability(client, catalog, rng, options):
+    check_in, check_out = _stay(rng, options)
+    client.request('GET', '/api/bookings/availability/', 'GET /api/bookings/availability/', params={
+        'property': rng.choice(catalog.property_ids),
+        'check_in': check_in.isoformat(),
+        'check_out': check_out.isoformat(),
+    })
+
+def book(client, catalog, rng, options):
+    check_in, check_out = _stay(rng, options)
+    # 400 is the expected answer when another user got the dates first
+    client.request('POST', '/api/bookings/', 'POST /api/bookings/', expect=(201, 400), body={
+        'property': rng.choice(catalog.hot_ids),
+        'check_in': check_in.isoformat(),
+        'check_out': check_out.isoformat(),
+        'guests': 1,
+        'contact_phone': '+923000000000',
+    })
+
+def notifications(client, catalog, rng, options):
+    client.request('GET', '/api/notifications/notifications/unread_count/', 'GET /api/notifications/notifications/unread_count/')
+    if rng.random() < 0.25:
+        client.request('GET', '/api/notifications/notifications/', 'GET /api/notifications/notifications/')
+
+def login(client, catalog, rng, options):
+    email, password = client.account
+    client.login(email, password)
+
+SCENARIOS = {
+    'browse': browse,
+    'search': search,
+    'availability': availability,
+    'book': book,
+    'notifications': notifications,
+    'login': login,
+}
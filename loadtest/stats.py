@@ -0,0 +1,109 @@
+"""
+Collecting samples and summarising them per endpoint.
+"""
+import math
+import threading
+from collections import Counter, defaultdict
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(list)
+        self._statuses = defaultdict(Counter)
+        self._errors = Counter()
+        self._server = defaultdict(lambda: defaultdict(float))
+
+    def record(self, label, status, seconds, ok, timings):
+        with self._lock:
+            self._latencies[label].append(seconds * 1000)
+            self._statuses[label][status] += 1
+            if not ok:
+                self._errors[label] += 1
+            server = self._server[label]
+            for name in ('db', 'queries', 'serialize', 'total'):
+                if name in timings:
+                    server[name] += timings[name]
+                    server[f'{name}_samples'] += 1
+
+    def summary(self, duration):
+        """Per-endpoint figures; latencies in milliseconds"""
+        endpoints = {}
+        with self._lock:
+            labels = sorted(self._latencies)
+            for label in labels:
+                latencies = sorted(self._latencies[label])
+                count = len(latencies)
+                stats = {
+                    'requests': count,
+                    'errors': self._errors[label],
+                    'error_rate': round(self._errors[label] / count, 4),
+                    'throughput_rps': round(count / duration, 2),
+                    'mean_ms': round(sum(latencies) / count, 2),
+                    'p50_ms': round(percentile(latencies, 0.50), 2),
+                    'p95_ms': round(percentile(latencies, 0.95), 2),
+                    'p99_ms': round(percentile(latencies, 0.99), 2),
+                    'max_ms': round(latencies[-1], 2),
+                    'statuses': {str(status): n for status, n in sorted(self._statuses[label].items())},
+                }
+                # Averages of the server's own Server-Timing breakdown
+                server = self._server[label]
+                for name in ('db', 'queries', 'serialize', 'total'):
+                    if server[f'{name}_samples']:
+                        key = 'server_queries' if name == 'queries' else f'server_{name}_ms'
+                        stats[key] = round(server[name] / server[f'{name}_samples'], 2)
+                endpoints[label] = stats
+
+        total = sum(stats['requests'] for stats in endpoints.values())
+        errors = sum(stats['errors'] for stats in endpoints.values())
+        return {
+            'requests': total,
+            'errors': errors,
+            'throughput_rps': round(total / duration, 2) if duration else 0,
+            'endpoints': endpoints,
+        }
+
+def format_table(endpoints):
+    columns = ('requests', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'error_rate', 'server_queries')
+    headers = ('requests', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors', 'queries')
+    width = max([len('endpoint')] + [len(label) for label in endpoints])
+    lines = ['  '.join([f'{"endpoint":<{width}}'] + [f'{h:>9}' for h in headers])]
+    for label, stats in endpoints.items():
+        cells = []
+        for column in columns:
+            value = stats.get(column)
+            if value is None:
+                cells.append(f'{"-":>9}')
+            elif column == 'error_rate':
+                cells.append(f'{value:>8.1%} ')
+            else:
+                cells.append(f'{value:>9}')
+        lines.append('  '.join([f'{label:<{width}}'] + cells))
+    return '\n'.join(lines)
+
+def compare(before, after):
+    """Side-by-side of two result files: p50/p95/p99 and throughput per endpoint"""
+    lines = []
+    labels = sorted(set(before['endpoints']) | set(after['endpoints']))
+    width = max([len('endpoint')] + [len(label) for label in labels])
+    metrics = ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms')
+    lines.append(f'{"endpoint":<{width}}  ' + '  '.join(f'{m:>24}' for m in metrics))
+    for label in labels:
+        old = before['endpoints'].get(label, {})
+        new = after['endpoints'].get(label, {})
+        cells = []
+        for metric in metrics:
+            a, b = old.get(metric), new.get(metric)
+            if a is None or b is None:
+                cells.append(f'{str(a) + " -> " + str(b):>24}')
+                continue
+            change = f'{(b - a) / a:+.0%}' if a else 'n/a'
+            cells.append(f'{f"{a} -> {b} ({change})":>24}')
+        lines.append(f'{label:<{width}}  ' + '  '.join(cells))
+    return '\n'.join(lines)
@@ -12,6 +12,7 @@ sys.path.append(str(backend_dir))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 from django.contrib.auth import authenticate
 from django.http import JsonResponse
@@ -24,6 +25,9 @@ from users.models import User
 from listings.models import Property
 from bookings.models import Booking
 from notifications.models import Notification
+from config.stats import stats_alias, table_counts
+from analytics.rollup import default_start, monthly_totals
+from django.utils import timezone
 
 # Configure Streamlit page
 st.set_page_config(
@@ -32,21 +36,58 @@ st.set_page_config(
     layout="wide"
 )
 
+# Dashboard data is cached for every session; counts come from config.stats,
+# which never scans large tables and reads from a replica when there is one
+CACHE_SECONDS = settings.DASHBOARD_STATS['CACHE_SECONDS']
+
+@st.cache_data(ttl=CACHE_SECONDS, show_spinner=False)
+def load_counts():
+    return table_counts()
+
+@st.cache_data(ttl=CACHE_SECONDS, show_spinner=False)
+def load_recent_bookings():
+    return list(
+        Booking.objects.using(stats_alias())
+        .order_by('-created_at')
+        .values_list('user__email', 'property__title', 'status')[:5]
+    )
+
+@st.cache_data(ttl=CACHE_SECONDS, show_spinner=False)
+def load_monthly_totals():
+    # Read from the daily rollups (refresh_rollups), never from the bookings table
+    end = timezone.localdate()
+    return [
+        {
+            'Month': row['month'].strftime('%b %Y'),
+            'Booked nights': row['nights'],
+            'Revenue (PKR)': f"{row['revenue']:,.0f}",
+            'ADR (PKR)': f"{row['revenue'] / row['nights']:,.0f}" if row['nights'] else '-',
+        }
+        for row in monthly_totals(default_start(end), end, using=stats_alias())
+    ]
+
+def count_metric(label, entry):
+    if entry['exact']:
+        st.metric(label, f"{entry['count']:,}", help=f"Exact count as of {entry['as_of']}")
+    else:
+        st.metric(label, f"~{entry['count']:,}", help="Estimated from table statistics")
+
 # Main Streamlit app
 def main():
     st.title("🏨 PakBooking API Server")
     st.markdown("---")
     
+    counts = load_counts()
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Users", User.objects.count())
+        count_metric("Total Users", counts[User._meta.label])
     
     with col2:
-        st.metric("Total Properties", Property.objects.count())
+        count_metric("Total Properties", counts[Property._meta.label])
     
     with col3:
-        st.metric("Total Bookings", Booking.objects.count())
+        count_metric("Total Bookings", counts[Booking._meta.label])
     
     st.markdown("---")
     
@@ -58,6 +99,7 @@ def main():
         ("Properties", "/api/listings/", "🏨"),
         ("Bookings", "/api/bookings/", "📋"),
         ("Notifications", "/api/notifications/", "🔔"),
+        ("Analytics", "/api/analytics/occupancy/", "📈"),
         ("Admin Panel", "/admin/", "👨‍💼"),
         ("API Docs", "/api/docs/", "📚")
     ]
@@ -71,17 +113,28 @@ def main():
     st.subheader("📊 Recent Activity")
     
     # Recent bookings
-    recent_bookings = Booking.objects.select_related('user', 'property').order_by('-created_at')[:5]
+    recent_bookings = load_recent_bookings()
     
     if recent_bookings:
         st.write("**Recent Bookings:**")
-        for booking in recent_bookings:
-            st.write(f"- {booking.user.email} booked {booking.property.title} ({booking.status})")
+        for email, title, booking_status in recent_bookings:
+            st.write(f"- {email} booked {title} ({booking_status})")
     else:
         st.write("No recent bookings")
     
     st.markdown("---")
     
+    # Occupancy and revenue
+    st.subheader("📈 Occupancy & Revenue (confirmed and completed stays)")
+    
+    monthly = load_monthly_totals()
+    if monthly:
+        st.table(monthly)
+    else:
+        st.write("No rollups yet; run `python manage.py refresh_rollups`")
+    
+    st.markdown("---")
+    
     # System Information
     st.subheader("ℹ️ System Information")
     